@@ -2,15 +2,37 @@
 # The functions imported here are the ONLY "maven.xxx()" functions that
 # users are expected to interact with
 
+# Standard imports
+import importlib
+
 # To regularize log calculations
 import numpy as np
 TINY = np.sqrt(np.finfo(np.float32).tiny)
 
-# Primary model class
-from mavenn.src.model import Model
+# Attributes whose modules import TensorFlow. These are imported only upon
+# first access, so that "import mavenn" does not import TensorFlow.
+_lazy_attributes = {
+    # Primary model class
+    'Model': 'mavenn.src.model',
+
+    # For running functional tests
+    'run_tests': 'mavenn.tests',
+}
+
 
-# For running functional tests
-from mavenn.tests import run_tests
+def __getattr__(name):
+    """Import TensorFlow-dependent attributes upon first access."""
+    if name in _lazy_attributes:
+        module = importlib.import_module(_lazy_attributes[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    """List attributes, including those not yet imported."""
+    return sorted(set(globals()) | set(_lazy_attributes))
 
 # Examples
 from mavenn.src.examples import list_tutorials
@@ -20,6 +42,12 @@ from mavenn.src.examples import load_example_model
 
 # For loading models
 from mavenn.src.utils import load
+from mavenn.src.inference import load_exported
+
+# For on-disk datasets
+from mavenn.src.dataset import save_sharded_dataset
+from mavenn.src.dataset import load_sharded_dataset
+from mavenn.src.dataset import load_csv_dataset
 
 # For visualizing G-P maps
 from mavenn.src.visualization import heatmap
@@ -0,0 +1,58 @@
+"""
+Benchmark parallel sequence validation and encoding.
+
+Times x_to_int(), which validates sequences and encodes them as integer
+codes, using n_jobs = 1, 2, 4, ... worker processes, up to the number of
+available CPUs. Run from the command line, e.g.:
+
+    python 26.10.18_parallel_encoding_benchmark.py --N 2000000 --L 100
+"""
+
+# Standard imports
+import argparse
+import os
+import time
+import numpy as np
+
+# MAVE-NN imports
+from mavenn.src.utils import x_to_int, p_lc_to_x
+from mavenn.src.validate import validate_alphabet
+
+if __name__ == '__main__':
+    # Parse arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--N', type=int, default=1000000,
+                        help='Number of sequences.')
+    parser.add_argument('--L', type=int, default=100,
+                        help='Length of sequences.')
+    parser.add_argument('--alphabet', default='protein',
+                        help='Alphabet from which sequences are drawn.')
+    parser.add_argument('--x_format', default='str', choices=['str', 'bytes'],
+                        help='Format of sequences.')
+    parser.add_argument('--max_jobs', type=int, default=os.cpu_count(),
+                        help='Maximum number of worker processes.')
+    args = parser.parse_args()
+
+    # Simulate sequences
+    alphabet = validate_alphabet(args.alphabet)
+    C = len(alphabet)
+    p_lc = np.ones([args.L, C]) / C
+    x = p_lc_to_x(args.N, p_lc, alphabet, x_format=args.x_format)
+    print(f'Encoding N={args.N:,} sequences of length L={args.L}, '
+          f'dtype={x.dtype}, on {os.cpu_count()} CPUs.')
+
+    # Time encoding for increasing numbers of worker processes
+    n_jobs_list = [1]
+    while 2 * n_jobs_list[-1] <= args.max_jobs:
+        n_jobs_list.append(2 * n_jobs_list[-1])
+    x_int_serial = None
+    for n_jobs in n_jobs_list:
+        start_time = time.time()
+        x_int = x_to_int(x, alphabet, n_jobs=n_jobs)
+        duration = time.time() - start_time
+        if x_int_serial is None:
+            x_int_serial = x_int
+            serial_duration = duration
+        assert np.array_equal(x_int, x_int_serial)
+        print(f'n_jobs={n_jobs:3d}: {duration:7.3f} sec, '
+              f'speedup={serial_duration / duration:5.2f}x')
@@ -0,0 +1,715 @@
+"""dataset.py: On-disk datasets, i.e., sharded datasets for out-of-core
+training and columnar caches of CSV datasets."""
+# Standard imports
+import numpy as np
+import pandas as pd
+import json
+import os
+import hashlib
+import shutil
+import tempfile
+
+# MAVE-NN imports
+from mavenn.src.error_handling import handle_errors, check
+from mavenn.src.validate import validate_alphabet, validate_1d_array
+from mavenn.src.utils import x_to_int, vec_data_to_mat_data, \
+    _y_norm_to_ge_labels
+
+# Name of the file, within a dataset directory, that describes the dataset
+META_FILE_NAME = 'meta.json'
+
+# Identifies the on-disk format
+FORMAT_NAME = 'mavenn_sharded_dataset'
+FORMAT_VERSION = 1
+
+# Identifies the format of cached CSV datasets
+CSV_CACHE_FORMAT_NAME = 'mavenn_csv_cache'
+CSV_CACHE_FORMAT_VERSION = 2
+
+
+class ShardedDatasetWriter:
+    """
+    Writes a sharded dataset to disk one batch of observations at a time.
+
+    A sharded dataset is a directory containing a ``meta.json`` file together
+    with a series of shards. Each shard comprises a ``.x.npy`` file holding an
+    ``(n,L)`` array of ``uint8`` integer-encoded sequences, a ``.y.npy``
+    file holding measurements (an ``(n,)`` array of floats for GE data, or an
+    ``(n,Y)`` array of counts for MPA data), and optionally a ``.val.npy``
+    file holding ``(n,)`` boolean validation flags. Observations are buffered
+    in memory until ``shard_size`` of them have accumulated, at which point
+    they are written as a shard.
+
+    Parameters
+    ----------
+    dirname: (str)
+        Directory in which to write the dataset. Is created if it does not
+        exist, and must not already contain a dataset.
+
+    L: (int)
+        Length of sequences.
+
+    alphabet: (str, np.ndarray)
+        Alphabet from which sequences are drawn.
+
+    regression_type: (str)
+        Type of data; either ``'GE'`` or ``'MPA'``.
+
+    Y: (int, None)
+        Number of bins. Required if ``regression_type='MPA'``.
+
+    shard_size: (int)
+        Number of observations per shard.
+    """
+
+    @handle_errors
+    def __init__(self,
+                 dirname,
+                 L,
+                 alphabet,
+                 regression_type='GE',
+                 Y=None,
+                 shard_size=100000):
+        """Construct writer instance."""
+        # Check and set arguments
+        check(isinstance(L, (int, np.integer)) and L > 0,
+              f'L={repr(L)}; must be a positive int.')
+        check(regression_type in ['GE', 'MPA'],
+              f'regression_type={repr(regression_type)}; '
+              f'must be "GE" or "MPA".')
+        if regression_type == 'MPA':
+            check(isinstance(Y, (int, np.integer)) and Y > 0,
+                  f'Y={repr(Y)}; must be a positive int for MPA data.')
+        check(isinstance(shard_size, (int, np.integer)) and shard_size > 0,
+              f'shard_size={repr(shard_size)}; must be a positive int.')
+        self.dirname = dirname
+        self.L = int(L)
+        self.alphabet = validate_alphabet(alphabet)
+        self.C = len(self.alphabet)
+        check(self.C <= 256,
+              f'len(alphabet)={self.C}; must be <= 256.')
+        self.regression_type = regression_type
+        self.Y = int(Y) if regression_type == 'MPA' else None
+        self.shard_size = int(shard_size)
+
+        # Create directory, making sure a dataset is not already there
+        os.makedirs(self.dirname, exist_ok=True)
+        check(not os.path.exists(os.path.join(self.dirname, META_FILE_NAME)),
+              f'A dataset already exists in {self.dirname}.')
+
+        # Initialize buffers and record of written shards
+        self._x_buffer = []
+        self._y_buffer = []
+        self._val_buffer = []
+        self._num_buffered = 0
+        self._has_validation_flags = None
+        self.shards = []
+        self.N = 0
+        self.closed = False
+
+    @handle_errors
+    def append(self, x, y, validation_flags=None):
+        """
+        Add observations to the dataset.
+
+        Parameters
+        ----------
+        x: (np.ndarray)
+            Either a 1D array of ``n`` sequences, or an ``(n,L)`` array of
+            integer-encoded sequences.
+
+        y: (np.ndarray)
+            Measurements. For GE data, a 1D array of ``n`` floats. For MPA
+            data, an ``(n,Y)`` array of nonnegative counts.
+
+        validation_flags: (np.ndarray, None)
+            1D array of ``n`` booleans, with ``True`` indicating observations
+            reserved for the validation set. Must be provided in every call,
+            or in no call, to ``append()``.
+
+        Returns
+        -------
+        None
+        """
+        check(not self.closed, 'Cannot append to a closed writer.')
+
+        # Encode x as integers
+        x_int = _x_to_shard_codes(x, self.L, self.alphabet)
+        n = len(x_int)
+
+        # Check y
+        y = np.asarray(y)
+        if self.regression_type == 'GE':
+            y = validate_1d_array(y).astype(float)
+            check(len(y) == n,
+                  f'len(y)={len(y)} does not match len(x)={n}.')
+        else:
+            check(y.shape == (n, self.Y),
+                  f'y.shape={y.shape}; must be {(n, self.Y)}.')
+            check(np.all(y >= 0),
+                  'y contains negative counts.')
+            y = y.astype(np.int64)
+
+        # Check validation flags, making sure they are used consistently
+        has_validation_flags = validation_flags is not None
+        if self._has_validation_flags is None:
+            self._has_validation_flags = has_validation_flags
+        check(has_validation_flags == self._has_validation_flags,
+              'validation_flags must be provided in every call to append(), '
+              'or in none.')
+        if has_validation_flags:
+            validation_flags = validate_1d_array(validation_flags)
+            check(len(validation_flags) == n,
+                  f'len(validation_flags)={len(validation_flags)} does not '
+                  f'match len(x)={n}.')
+            validation_flags = validation_flags.astype(bool)
+
+        # Buffer data, then write as many full shards as possible
+        self._x_buffer.append(x_int)
+        self._y_buffer.append(y)
+        if has_validation_flags:
+            self._val_buffer.append(validation_flags)
+        self._num_buffered += n
+        while self._num_buffered >= self.shard_size:
+            self._write_shard(self.shard_size)
+
+    @handle_errors
+    def close(self):
+        """
+        Write any buffered observations and the ``meta.json`` file.
+
+        Returns
+        -------
+        None
+        """
+        if self.closed:
+            return
+        if self._num_buffered > 0:
+            self._write_shard(self._num_buffered)
+        meta = {'format': FORMAT_NAME,
+                'version': FORMAT_VERSION,
+                'L': self.L,
+                'alphabet': [str(c) for c in self.alphabet],
+                'regression_type': self.regression_type,
+                'Y': self.Y,
+                'N': self.N,
+                'has_validation_flags': bool(self._has_validation_flags),
+                'shards': self.shards}
+        with open(os.path.join(self.dirname, META_FILE_NAME), 'w') as f:
+            json.dump(meta, f, indent=1)
+        self.closed = True
+
+    def __enter__(self):
+        """Enter context; returns self."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Exit context, closing the writer if no error occurred."""
+        if exc_type is None:
+            self.close()
+
+    def _write_shard(self, n):
+        """Write the first n buffered observations as a shard."""
+        # Assemble buffered data and split off the first n observations
+        x_int = np.concatenate(self._x_buffer, axis=0)
+        y = np.concatenate(self._y_buffer, axis=0)
+        self._x_buffer = [x_int[n:]]
+        self._y_buffer = [y[n:]]
+        if self._has_validation_flags:
+            val = np.concatenate(self._val_buffer)
+            self._val_buffer = [val[n:]]
+        self._num_buffered -= n
+
+        # Write shard files
+        name = f'shard_{len(self.shards):05d}'
+        root = os.path.join(self.dirname, name)
+        np.save(root + '.x.npy', x_int[:n])
+        np.save(root + '.y.npy', y[:n])
+        if self._has_validation_flags:
+            np.save(root + '.val.npy', val[:n])
+        self.shards.append({'name': name, 'N': int(n)})
+        self.N += int(n)
+
+
+class ShardedDataset:
+    """
+    Provides access to a sharded dataset stored on disk.
+
+    Use ``mavenn.load_sharded_dataset()`` to create instances of this class,
+    and ``mavenn.save_sharded_dataset()`` or ``ShardedDatasetWriter`` to
+    write sharded datasets.
+
+    Parameters
+    ----------
+    dirname: (str)
+        Directory containing the dataset.
+    """
+
+    @handle_errors
+    def __init__(self, dirname):
+        """Construct dataset instance."""
+        meta_file = os.path.join(dirname, META_FILE_NAME)
+        check(os.path.isfile(meta_file),
+              f'{meta_file} does not exist; {dirname} is not a '
+              f'sharded dataset.')
+        with open(meta_file, 'r') as f:
+            meta = json.load(f)
+        check(meta.get('format') == FORMAT_NAME,
+              f'{meta_file} does not describe a sharded dataset.')
+        check(meta.get('version') == FORMAT_VERSION,
+              f'Unsupported sharded dataset version {meta.get("version")}.')
+
+        self.dirname = dirname
+        self.L = meta['L']
+        self.alphabet = np.array(meta['alphabet'])
+        self.C = len(self.alphabet)
+        self.regression_type = meta['regression_type']
+        self.Y = meta['Y']
+        self.N = meta['N']
+        self.has_validation_flags = meta['has_validation_flags']
+        self.shard_names = [shard['name'] for shard in meta['shards']]
+        self.shard_sizes = np.array([shard['N'] for shard in meta['shards']],
+                                    dtype=np.int64)
+        self.num_shards = len(self.shard_names)
+
+    def __len__(self):
+        """Return number of observations."""
+        return self.N
+
+    @handle_errors
+    def load_shard(self, i, mmap=True):
+        """
+        Load a single shard.
+
+        Parameters
+        ----------
+        i: (int)
+            Index of shard to load.
+
+        mmap: (bool)
+            Whether to memory-map shard arrays rather than reading them
+            into memory.
+
+        Returns
+        -------
+        x_int: (np.ndarray)
+            ``(n,L)`` array of integer-encoded sequences.
+
+        y: (np.ndarray)
+            Measurements for each sequence.
+
+        validation_flags: (np.ndarray, None)
+            Validation flags for each sequence, if these were saved.
+        """
+        check(0 <= i < self.num_shards,
+              f'i={i}; must be in [0, {self.num_shards}).')
+        mmap_mode = 'r' if mmap else None
+        root = os.path.join(self.dirname, self.shard_names[i])
+        x_int = np.load(root + '.x.npy', mmap_mode=mmap_mode)
+        y = np.load(root + '.y.npy', mmap_mode=mmap_mode)
+        validation_flags = np.load(root + '.val.npy') \
+            if self.has_validation_flags else None
+        return x_int, y, validation_flags
+
+    def iter_shards(self, mmap=True):
+        """Iterate over (x_int, y, validation_flags) for each shard."""
+        for i in range(self.num_shards):
+            yield self.load_shard(i, mmap=mmap)
+
+
+@handle_errors
+def save_sharded_dataset(dirname,
+                         x,
+                         y,
+                         alphabet,
+                         ct=None,
+                         regression_type='GE',
+                         validation_flags=None,
+                         shard_size=100000):
+    """
+    Save data as a sharded dataset for out-of-core training.
+
+    The resulting directory can be passed to ``Model.set_data_from_disk()``.
+    For datasets too large to hold in memory, use ``ShardedDatasetWriter``
+    to write data incrementally.
+
+    Parameters
+    ----------
+    dirname: (str)
+        Directory in which to write the dataset.
+
+    x: (np.ndarray)
+        1D array of ``N`` sequences, each of length ``L``, or an ``(N,L)``
+        array of integer-encoded sequences.
+
+    y: (np.ndarray)
+        Measurements, in any format accepted by ``Model.set_data()``.
+
+    alphabet: (str, np.ndarray)
+        Alphabet from which sequences are drawn.
+
+    ct: (np.ndarray, None)
+        Counts; only used for MPA data when ``y`` is 1D.
+
+    regression_type: (str)
+        Type of data; either ``'GE'`` or ``'MPA'``.
+
+    validation_flags: (np.ndarray, None)
+        1D array of ``N`` booleans, with ``True`` indicating observations
+        reserved for the validation set. If ``None``, validation observations
+        are chosen when the dataset is loaded.
+
+    shard_size: (int)
+        Number of observations per shard.
+
+    Returns
+    -------
+    None
+    """
+    alphabet = validate_alphabet(alphabet)
+
+    # Convert MPA data to matrix form if needed
+    if regression_type == 'MPA':
+        if isinstance(y, pd.DataFrame):
+            y = y.values
+        y = np.asarray(y)
+        if y.ndim == 1:
+            check(validation_flags is None,
+                  'validation_flags cannot be used with 1D MPA data.')
+            y, x = vec_data_to_mat_data(y_n=y, ct_n=ct, x_n=x)
+        Y = y.shape[1]
+    else:
+        Y = None
+
+    # Encode x to get L
+    x_int = _x_to_shard_codes(x, None, alphabet)
+    L = x_int.shape[1]
+
+    # Write dataset
+    with ShardedDatasetWriter(dirname=dirname,
+                              L=L,
+                              alphabet=alphabet,
+                              regression_type=regression_type,
+                              Y=Y,
+                              shard_size=shard_size) as writer:
+        writer.append(x_int, y, validation_flags=validation_flags)
+
+
+@handle_errors
+def load_sharded_dataset(dirname):
+    """
+    Load a sharded dataset previously saved to disk.
+
+    Parameters
+    ----------
+    dirname: (str)
+        Directory containing the dataset.
+
+    Returns
+    -------
+    dataset: (ShardedDataset)
+        Object providing shard-by-shard access to the dataset.
+    """
+    return ShardedDataset(dirname)
+
+
+def _x_to_shard_codes(x, L, alphabet):
+    """
+    Return an (n,L) uint8 array of integer codes given either sequences or
+    integer codes. If L is None, it is not checked.
+    """
+    x = np.asarray(x)
+    if x.ndim == 2 and np.issubdtype(x.dtype, np.integer):
+        check(x.size == 0 or (x.min() >= 0 and x.max() < len(alphabet)),
+              f'Integer-encoded sequences must be in [0, {len(alphabet)}).')
+        x_int = x.astype(np.uint8)
+    else:
+        x_int = x_to_int(x, alphabet)
+    if L is not None:
+        check(x_int.shape[1] == L,
+              f'Sequences have length {x_int.shape[1]}; must be {L}.')
+    return x_int
+
+
+def _sharded_dataset_to_tf(dataset,
+                           validation_flags,
+                           use_validation,
+                           batch_size,
+                           shuffle,
+                           y_mean,
+                           y_std):
+    """
+    Return a tf.data.Dataset that streams batches of ((x_int, labels), labels)
+    from a sharded dataset, where labels are formed from normalized y values.
+    Only observations whose validation flag equals use_validation are
+    included. If shuffle is True, shard order and observation order within
+    each shard are shuffled on every pass. Only one shard at a time is
+    accessed, and batches are prefetched.
+    """
+    import tensorflow as tf
+
+    # Split validation flags by shard
+    offsets = np.concatenate([[0], np.cumsum(dataset.shard_sizes)])
+    shard_ix = [np.nonzero(validation_flags[offsets[i]:offsets[i+1]]
+                           == use_validation)[0]
+                for i in range(dataset.num_shards)]
+    is_ge = (dataset.regression_type == 'GE')
+    y_dim = 1 if is_ge else dataset.Y
+    labels_dim = 3 if is_ge else dataset.Y
+
+    def generate_batches():
+        order = np.random.permutation(dataset.num_shards) if shuffle \
+            else np.arange(dataset.num_shards)
+        for i in order:
+            ix = shard_ix[i]
+            if len(ix) == 0:
+                continue
+            if shuffle:
+                ix = np.random.permutation(ix)
+            x_int, y, _ = dataset.load_shard(i, mmap=True)
+            for start in range(0, len(ix), batch_size):
+                ix_batch = np.sort(ix[start:start+batch_size])
+                x_batch = np.asarray(x_int[ix_batch], dtype=np.int32)
+                y_batch = (np.asarray(y[ix_batch], dtype=float)
+                           - y_mean) / y_std
+                y_batch = y_batch.reshape(-1, y_dim).astype(np.float32)
+                if is_ge:
+                    y_batch = _y_norm_to_ge_labels(y_batch)
+                yield (x_batch, y_batch), y_batch
+
+    y_spec = tf.TensorSpec(shape=(None, labels_dim), dtype=tf.float32)
+    output_signature = ((tf.TensorSpec(shape=(None, dataset.L),
+                                       dtype=tf.int32), y_spec), y_spec)
+    tf_dataset = tf.data.Dataset.from_generator(
+        generate_batches,
+        output_signature=output_signature)
+    return tf_dataset.prefetch(tf.data.AUTOTUNE)
+
+
+@handle_errors
+def load_csv_dataset(filename,
+                     columns=None,
+                     cache=False,
+                     cache_dir=None,
+                     mmap=False,
+                     x_format='str'):
+    """
+    Load a dataset from a CSV file, optionally caching it in a columnar
+    binary format.
+
+    If ``cache=True``, the first time a file is loaded it is parsed with
+    ``pd.read_csv()`` and each column is saved as a separate ``.npy`` file
+    in a cache directory whose name includes a hash of the file contents.
+    Subsequent loads of an unchanged file read only the requested columns
+    from the cache, without parsing. Columns of strings are stored as
+    fixed-width bytes when they contain only ASCII characters, and missing
+    strings are recorded in a separate mask, so cached columns are never
+    pickled. Other columns that are neither numeric nor strings are not
+    cached, and are parsed from the file when requested.
+
+    Parameters
+    ----------
+    filename: (str)
+        Path to a CSV file, which may be compressed (e.g. ``.csv.gz``).
+
+    columns: (list, None)
+        Names of columns to load. If ``None``, all columns are loaded.
+
+    cache: (bool)
+        Whether to use the cache. If ``False``, the file is parsed directly
+        and nothing is written to disk.
+
+    cache_dir: (str, None)
+        Directory in which cached datasets are stored. If ``None``, the
+        directory given by the ``MAVENN_CACHE_DIR`` environment variable is
+        used, or ``~/.cache/mavenn`` if this is not set.
+
+    mmap: (bool)
+        If ``True``, columns are memory-mapped from the cache and returned
+        as a dictionary of arrays rather than as a dataframe, so that data
+        are only read from disk when accessed. Requires ``cache=True``.
+
+    x_format: (str)
+        Format of sequences in column ``'x'``, if present. Either ``'str'``
+        or ``'bytes'``.
+
+    Returns
+    -------
+    data_df: (pd.DataFrame, dict)
+        Dataframe containing the requested columns, or a dictionary of
+        arrays if ``mmap=True``.
+    """
+    # Check arguments
+    check(isinstance(filename, str) and os.path.isfile(filename),
+          f'filename={repr(filename)} is not an existing file.')
+    check(columns is None or isinstance(columns, (list, tuple)),
+          f'type(columns)={type(columns)}; must be list or None.')
+    check(isinstance(cache, bool),
+          f'type(cache)={type(cache)}; must be bool.')
+    check(isinstance(mmap, bool),
+          f'type(mmap)={type(mmap)}; must be bool.')
+    check(cache or not mmap, 'mmap=True requires cache=True.')
+    check(x_format in ['str', 'bytes'],
+          f'x_format={repr(x_format)}; must be "str" or "bytes".')
+
+    # Parse file directly if not using the cache, or if the cache cannot be
+    # written, e.g. due to a read-only filesystem
+    cache_path = None
+    if cache:
+        try:
+            cache_path = _get_csv_cache(filename, cache_dir)
+        except OSError:
+            check(not mmap, f'Could not write cache for {filename}.')
+    if cache_path is None:
+        if columns is not None:
+            file_columns = list(pd.read_csv(filename, nrows=0).columns)
+            missing = [c for c in columns if c not in file_columns]
+            check(len(missing) == 0,
+                  f'Columns {missing} not found in {filename}; '
+                  f'valid columns are {file_columns}.')
+        data_df = pd.read_csv(filename, usecols=columns)
+        if columns is not None:
+            data_df = data_df[list(columns)]
+        if x_format == 'bytes' and 'x' in data_df.columns:
+            data_df['x'] = _cast_str_column(data_df['x'].values, 'bytes')
+        return data_df
+
+    # Read metadata and check requested columns
+    with open(os.path.join(cache_path, META_FILE_NAME), 'r') as f:
+        meta = json.load(f)
+    kinds = dict(zip(meta['columns'], meta['kinds']))
+    if columns is None:
+        columns = meta['columns']
+    missing = [c for c in columns if c not in kinds]
+    check(len(missing) == 0,
+          f'Columns {missing} not found in {filename}; '
+          f'valid columns are {meta["columns"]}.')
+
+    # Parse requested columns that are not cached
+    uncached = [c for c in columns if kinds[c] == 'uncached']
+    if len(uncached) > 0:
+        uncached_df = pd.read_csv(filename, usecols=uncached)
+
+    # Load requested columns
+    data_dict = {}
+    for i, col in enumerate(meta['columns']):
+        if col not in columns:
+            continue
+        if kinds[col] == 'uncached':
+            data_dict[col] = uncached_df[col].values
+            continue
+        file_name = os.path.join(cache_path, f'col_{i:05d}.npy')
+        values = np.load(file_name,
+                         mmap_mode='r' if mmap else None,
+                         allow_pickle=False)
+        if kinds[col] == 'str':
+            values = _cast_str_column(
+                values, x_format if col == 'x' else 'str')
+        elif kinds[col] == 'str_na':
+            is_na = np.load(os.path.join(cache_path, f'col_{i:05d}_na.npy'),
+                            allow_pickle=False)
+            values = _cast_str_column(values, 'str').astype(object)
+            values[is_na] = np.nan
+        data_dict[col] = values
+    data_dict = {col: data_dict[col] for col in columns}
+
+    if mmap:
+        return data_dict
+    return pd.DataFrame(data_dict)
+
+
+def _get_csv_cache(filename, cache_dir):
+    """
+    Return the path of the cache of a CSV file, creating the cache if it
+    does not yet exist. The cache is first written to a temporary directory,
+    then renamed, so that partially written caches are never used.
+    """
+    # Get cache directory for this file
+    if cache_dir is None:
+        cache_dir = os.environ.get(
+            'MAVENN_CACHE_DIR',
+            os.path.join(os.path.expanduser('~'), '.cache', 'mavenn'))
+    base_name = os.path.basename(filename).split('.')[0]
+    cache_path = os.path.join(
+        cache_dir,
+        f'{base_name}.v{CSV_CACHE_FORMAT_VERSION}.{_file_hash(filename)}')
+    if os.path.exists(os.path.join(cache_path, META_FILE_NAME)):
+        return cache_path
+
+    # Parse file and save each column
+    data_df = pd.read_csv(filename)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        kinds = []
+        for i, col in enumerate(data_df.columns):
+            values, is_na, kind = _column_to_array(data_df[col])
+            if kind != 'uncached':
+                np.save(os.path.join(tmp_path, f'col_{i:05d}.npy'),
+                        values,
+                        allow_pickle=False)
+            if kind == 'str_na':
+                np.save(os.path.join(tmp_path, f'col_{i:05d}_na.npy'),
+                        is_na,
+                        allow_pickle=False)
+            kinds.append(kind)
+        meta = {'format': CSV_CACHE_FORMAT_NAME,
+                'version': CSV_CACHE_FORMAT_VERSION,
+                'source': os.path.abspath(filename),
+                'N': len(data_df),
+                'columns': [str(c) for c in data_df.columns],
+                'kinds': kinds}
+        with open(os.path.join(tmp_path, META_FILE_NAME), 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.rename(tmp_path, cache_path)
+
+    # If another process wrote the cache first, keep theirs
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.exists(os.path.join(cache_path, META_FILE_NAME)):
+            raise
+
+    return cache_path
+
+
+def _file_hash(filename, chunk_size=2**20):
+    """Return a hex digest of the contents of a file."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _column_to_array(series):
+    """
+    Return a fixed-width array to store a dataframe column in a cache,
+    a boolean array marking missing values, and the column's kind:
+    'numeric' for numbers and booleans, 'str' for strings, 'str_na' for
+    strings with missing values, and 'uncached' for anything else, which
+    would require pickling.
+    """
+    values = series.values
+    is_na = pd.isna(values)
+    if values.dtype.kind in 'biuf':
+        return values, None, 'numeric'
+    if pd.api.types.infer_dtype(values, skipna=True) != 'string':
+        return None, None, 'uncached'
+
+    # Store strings as fixed-width bytes if possible, otherwise as str
+    kind = 'str_na' if is_na.any() else 'str'
+    values = np.where(is_na, '', values).astype(str)
+    try:
+        values = values.astype(bytes)
+    except UnicodeEncodeError:
+        pass
+    return values, (is_na if kind == 'str_na' else None), kind
+
+
+def _cast_str_column(values, x_format):
+    """Cast a column of strings or bytes as str or bytes."""
+    if x_format == 'bytes':
+        if values.dtype.kind != 'S':
+            values = np.char.encode(values.astype(str), 'utf-8')
+        return values
+    return values.astype(str)
@@ -1,9 +1,11 @@
 # Standard imports
+import sys
 import numpy as np
 import pandas as pd
 
 # Imports from MAVE-NN
 from mavenn.src.validate import validate_alphabet, validate_seqs
+from mavenn.src.validate import _x_int_to_seqs
 from mavenn.src.error_handling import handle_errors, check
 
 
@@ -55,6 +57,247 @@ def get_mask_dict(x, alphabet):
     return mask_dict
 
 
+def _validate_wt_seq(wt_seq, alphabet):
+    """
+    Validate wt_seq and alphabet, returning the validated alphabet and
+    the integer encoding of wt_seq.
+    """
+    # Check that wt_seq is a string
+    check(isinstance(wt_seq, str),
+          f'wt_seq must be a string; is of type {type(wt_seq)}')
+    L = len(wt_seq)
+
+    # Check length
+    check(L >= 1,
+          f'len(wt_seq)={L}; must be >= 1.')
+
+    # Validate alphabet
+    alphabet = validate_alphabet(alphabet)
+
+    # Make sure wt_seq comprises alphabet
+    seq_set = set(list(wt_seq))
+    alphabet_set = set(alphabet)
+    check(seq_set <= alphabet_set,
+          f"wt_seq={wt_seq} contains the invalid characters {seq_set-alphabet_set}")
+
+    # Encode wt_seq
+    char_to_code = {c: i for i, c in enumerate(alphabet)}
+    wt_int = np.array([char_to_code[c] for c in wt_seq], dtype=np.int32)
+
+    return alphabet, wt_int
+
+
+def _get_mutant_chars(wt_int, C):
+    """
+    Return the (L,C-1) array listing, for each position, the integer codes
+    of all non-wild-type characters.
+    """
+    cs = np.arange(C, dtype=np.int32)
+    is_mut_lc = cs[np.newaxis, :] != wt_int[:, np.newaxis]
+    return np.tile(cs, [len(wt_int), 1])[is_mut_lc].reshape([-1, C-1])
+
+
+def _1pt_code_blocks(wt_int, C):
+    """
+    Yield arrays (ls, cs) listing all single-point mutants of wt_int,
+    ordered by position and then by character.
+    """
+    L = len(wt_int)
+    ls = np.repeat(np.arange(L, dtype=np.int32), C-1)
+    cs = _get_mutant_chars(wt_int, C).ravel()
+    yield ls, cs
+
+
+def _2pt_code_blocks(wt_int, C):
+    """
+    Yield arrays (l1s, c1s, l2s, c2s) listing all two-point mutants of
+    wt_int, one block for each l1, ordered lexicographically by
+    (l1, c1, l2, c2).
+    """
+    L = len(wt_int)
+    mut_cs = _get_mutant_chars(wt_int, C)
+    for l1 in range(L-1):
+        l2s = np.arange(l1+1, L, dtype=np.int32)
+        num_muts_2 = len(l2s)*(C-1)
+        yield (np.full(num_muts_2*(C-1), l1, dtype=np.int32),
+               np.repeat(mut_cs[l1], num_muts_2),
+               np.tile(np.repeat(l2s, C-1), C-1),
+               np.tile(mut_cs[l2s].ravel(), C-1))
+
+
+def _2pt_codes(wt_int, C):
+    """Return arrays (l1s, c1s, l2s, c2s) listing all two-point mutants."""
+    blocks = list(_2pt_code_blocks(wt_int, C))
+    if len(blocks) == 0:
+        return tuple(np.zeros(0, dtype=np.int32) for _ in range(4))
+    return tuple(np.concatenate(a) for a in zip(*blocks))
+
+
+def _code_batches(blocks, batch_size):
+    """
+    Regroup an iterable of blocks, each a tuple of equal-length arrays,
+    into batches of batch_size rows (except possibly the last).
+    """
+    pending = []
+    num_pending = 0
+    for block in blocks:
+        pending.append(block)
+        num_pending += len(block[0])
+        while num_pending >= batch_size:
+            arrays = [np.concatenate(a) for a in zip(*pending)]
+            yield tuple(a[:batch_size] for a in arrays)
+            pending = [tuple(a[batch_size:] for a in arrays)]
+            num_pending -= batch_size
+    if num_pending > 0:
+        yield tuple(np.concatenate(a) for a in zip(*pending))
+
+
+def _codes_to_x_int(wt_int, ls_list, cs_list):
+    """
+    Return an (N,L) array of integer-encoded mutants of wt_int, where
+    ls_list and cs_list list arrays of mutated positions and characters.
+    """
+    N = len(ls_list[0])
+    x_int = np.tile(wt_int, [N, 1])
+    for ls, cs in zip(ls_list, cs_list):
+        x_int[np.arange(N), ls] = cs
+    return x_int
+
+
+@handle_errors
+def get_1pt_variant_codes(wt_seq, alphabet):
+    """
+    Returns the positions and characters of all single-point mutants of
+    a given wild-type sequence as integer arrays, in the same order as the
+    rows of get_1pt_variants(include_wt=False).
+
+    parameters
+    ----------
+
+    wt_seq: (str)
+        The wild-type sequence. Must comprise characters from alphabet.
+
+    alphabet: (str, array-like)
+        The alphabet (name or list of characters) to use for mutations.
+
+    returns
+    -------
+
+    ls: (np.ndarray)
+        Positions mutated.
+
+    cs: (np.ndarray)
+        Indices in alphabet of mutant characters.
+    """
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    return next(_1pt_code_blocks(wt_int, len(alphabet)))
+
+
+@handle_errors
+def get_2pt_variant_codes(wt_seq, alphabet):
+    """
+    Returns the positions and characters of all two-point mutants of
+    a given wild-type sequence as integer arrays, in the same order as the
+    rows of get_2pt_variants(include_wt=False).
+
+    parameters
+    ----------
+
+    wt_seq: (str)
+        The wild-type sequence. Must comprise characters from alphabet.
+
+    alphabet: (str, array-like)
+        The alphabet (name or list of characters) to use for mutations.
+
+    returns
+    -------
+
+    l1s, c1s, l2s, c2s: (np.ndarray)
+        Positions mutated (l1s < l2s) and indices in alphabet of
+        the corresponding mutant characters.
+    """
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    return _2pt_codes(wt_int, len(alphabet))
+
+
+@handle_errors
+def iter_1pt_variants(wt_seq, alphabet, batch_size=10000):
+    """
+    Iterates over batches of integer-encoded single-point mutants of
+    a given wild-type sequence, in the same order as get_1pt_variant_codes().
+
+    parameters
+    ----------
+
+    wt_seq: (str)
+        The wild-type sequence. Must comprise characters from alphabet.
+
+    alphabet: (str, array-like)
+        The alphabet (name or list of characters) to use for mutations.
+
+    batch_size: (int)
+        Maximum number of mutants per batch.
+
+    returns
+    -------
+
+    batches: (generator)
+        Yields tuples (ls, cs, x_int), where ls and cs are as returned by
+        get_1pt_variant_codes() and x_int is the corresponding array of
+        integer-encoded mutant sequences, as returned by x_to_int().
+    """
+    check(isinstance(batch_size, int) and batch_size >= 1,
+          f'batch_size={repr(batch_size)}; must be an int >= 1.')
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    blocks = _1pt_code_blocks(wt_int, len(alphabet))
+    return ((ls, cs, _codes_to_x_int(wt_int, [ls], [cs]))
+            for ls, cs in _code_batches(blocks, batch_size))
+
+
+@handle_errors
+def iter_2pt_variants(wt_seq, alphabet, batch_size=10000):
+    """
+    Iterates over batches of integer-encoded two-point mutants of
+    a given wild-type sequence, in the same order as get_2pt_variant_codes().
+
+    parameters
+    ----------
+
+    wt_seq: (str)
+        The wild-type sequence. Must comprise characters from alphabet.
+
+    alphabet: (str, array-like)
+        The alphabet (name or list of characters) to use for mutations.
+
+    batch_size: (int)
+        Maximum number of mutants per batch.
+
+    returns
+    -------
+
+    batches: (generator)
+        Yields tuples (l1s, c1s, l2s, c2s, x_int), where l1s, c1s, l2s,
+        and c2s are as returned by get_2pt_variant_codes() and x_int is
+        the corresponding array of integer-encoded mutant sequences.
+    """
+    check(isinstance(batch_size, int) and batch_size >= 1,
+          f'batch_size={repr(batch_size)}; must be an int >= 1.')
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    blocks = _2pt_code_blocks(wt_int, len(alphabet))
+    return ((l1s, c1s, l2s, c2s,
+             _codes_to_x_int(wt_int, [l1s, l2s], [c1s, c2s]))
+            for l1s, c1s, l2s, c2s in _code_batches(blocks, batch_size))
+
+
+def _get_mutation_names(wt_seq, alphabet):
+    """
+    Return the (L,C) object array of names of single-point mutations,
+    e.g. 'A5G', for all positions and characters.
+    """
+    return np.array([[f'{c_wt}{l}{c}' for c in alphabet]
+                     for l, c_wt in enumerate(wt_seq)], dtype=object)
+
+
 @handle_errors
 def get_1pt_variants(wt_seq, alphabet, include_wt=True):
     """
@@ -83,60 +326,55 @@ def get_1pt_variants(wt_seq, alphabet, include_wt=True):
         include_wt is True.
     """
 
-    # Check that wt_seq is a string
-    check(isinstance(wt_seq, str),
-          f'wt_seq must be a string; is of type {type(wt_seq)}')
-    L = len(wt_seq)
-
     # Check that include_wt is bool
     check(isinstance(include_wt, bool),
           f'type(include_wt)={type(include_wt)}; must be bool.')
 
-    # Check length
-    check(L >= 1,
-          f'len(wt_seq)={L}; must be >= 1.')
+    # Enumerate single-point variants as integer arrays
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    ls, cs = next(_1pt_code_blocks(wt_int, len(alphabet)))
 
-    # Create a list of all single-point variants of wt sequence
-    alphabet = validate_alphabet(alphabet)
-    C = len(alphabet)
+    return _1pt_variants_df(wt_seq, alphabet, wt_int, ls, cs,
+                            include_wt=include_wt,
+                            include_seqs=True)
 
-    # Make sure wt_seq comprises alphabet
-    seq_set = set(list(wt_seq))
-    alphabet_set = set(alphabet)
-    check(seq_set <= alphabet_set,
-          f"wt_seq={wt_seq} contains the invalid characters {seq_set-alphabet_set}")
 
-    # Create a list of seqs with all single amino acid changes at all positions
-    pos = np.arange(L).astype(int)
-    cs = list(np.tile(np.reshape(alphabet, [1, C]), [L, 1]).ravel())
-    ls = list(np.tile(np.reshape(pos, [L, 1]), [1, C]).ravel())
-    cs_wt = [wt_seq[l] for c, l in zip(cs, ls)]
-    seqs = [wt_seq[:l] + c + wt_seq[l + 1:] for c, l in zip(cs, ls)]
-    names = [wt_seq[l] + str(l) + c for c, l in zip(cs, ls)]
-    ix = [wt_seq[l] != c for c, l in zip(cs, ls)]
+def _1pt_variants_df(wt_seq, alphabet, wt_int, ls, cs,
+                     include_wt, include_seqs):
+    """
+    Return the dataframe of get_1pt_variants() for single-point mutants
+    given as integer arrays. Variant sequences are only created, as
+    strings, if include_seqs is True.
+    """
+    # Create names and characters from integer arrays
+    wt_chars = np.array(list(wt_seq), dtype=object)
+    alphabet_chars = np.array(list(alphabet), dtype=object)
+    names = _get_mutation_names(wt_seq, alphabet)[ls, cs]
+    if include_seqs:
+        x_int = _codes_to_x_int(wt_int, [ls], [cs])
+        seqs = _x_int_to_seqs(x_int, alphabet).astype(str).astype(object)
+    cs_wt = wt_chars[ls]
+    cs = alphabet_chars[cs]
 
     # Include wt if requested
     if include_wt:
-        names = ['WT'] + names
-        cs_wt = [''] + cs_wt
-        cs = [''] + cs
-        ls = [-1] + ls
-        seqs = [wt_seq] + seqs
-        ix = [True] + ix
+        names = np.concatenate([['WT'], names])
+        cs_wt = np.concatenate([[''], cs_wt])
+        cs = np.concatenate([[''], cs])
+        ls = np.concatenate([[-1], ls])
+        if include_seqs:
+            seqs = np.concatenate([[wt_seq], seqs])
 
     # Report results in the form of a dataframe
     out_df = pd.DataFrame()
     out_df['name'] = names
-    out_df['l'] = ls
+    out_df['l'] = ls.astype(int)
     out_df['c_wt'] = cs_wt
     out_df['c_mut'] = cs
-    out_df['seq'] = seqs
-
-    # Remove sequences identical to wt
-    out_df = out_df[ix]
+    if include_seqs:
+        out_df['seq'] = seqs
     out_df.set_index('name', inplace=True)
 
-    # Return seqs
     return out_df
 
 
@@ -168,92 +406,296 @@ def get_2pt_variants(wt_seq, alphabet, include_wt=True):
         wild-type sequence if include_wt=True.
     """
 
-    # Check that wt_seq is a string
-    check(isinstance(wt_seq, str),
-          f'wt_seq must be a string; is of type {type(wt_seq)}')
-    L = len(wt_seq)
-
     # Check that include_wt is bool
     check(isinstance(include_wt, bool),
           f'type(include_wt)={type(include_wt)}; must be bool.')
 
-    # Check length
-    check(L >= 1,
-          f'len(wt_seq)={L}; must be >= 1.')
-
-    # Create a list of all single-point variants of wt sequence
-    alphabet = validate_alphabet(alphabet)
-    C = len(alphabet)
-
-    # Make sure wt_seq comprises alphabet
-    seq_set = set(list(wt_seq))
-    alphabet_set = set(alphabet)
-    check(seq_set <= alphabet_set,
-          f"wt_seq={wt_seq} contains the invalid characters {seq_set-alphabet_set}")
-
-    # Create a list of seqs with all single amino acid changes at all positions
-    pos = np.arange(L).astype(int)
-    l1s = np.tile(np.reshape(pos, [L, 1, 1, 1]), [1, C, L, C]).ravel()
-    c1s = np.tile(np.reshape(alphabet, [1, C, 1, 1]), [L, 1, L, C]).ravel()
-    l2s = np.tile(np.reshape(pos, [1, 1, L, 1]), [L, C, 1, C]).ravel()
-    c2s = np.tile(np.reshape(alphabet, [1, 1, 1, C]), [L, C, L, 1]).ravel()
-
-    # Remove indices for unallowed combinations of ls
-    ix = l2s > l1s
-    l1s = list(l1s[ix].astype(int))
-    c1s = list(c1s[ix])
-    l2s = list(l2s[ix].astype(int))
-    c2s = list(c2s[ix])
-
-    # Create all pairwise variants
-    seqs = [wt_seq[:l1] + c1 + wt_seq[l1 + 1:l2] + c2 + wt_seq[l2+1:]
-            for (l1, c1, l2, c2) in zip(l1s, c1s, l2s, c2s)]
+    # Enumerate two-point variants as integer arrays
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    l1s, c1s, l2s, c2s = _2pt_codes(wt_int, len(alphabet))
 
-    names = [wt_seq[l1] + str(l1) + c1 + ',' + wt_seq[l2] + str(l2) + c2
-             for l1, c1, l2, c2 in zip(l1s, c1s, l2s, c2s)]
+    return _2pt_variants_df(wt_seq, alphabet, wt_int, l1s, c1s, l2s, c2s,
+                            include_wt=include_wt,
+                            include_seqs=True)
 
-    ix = [(wt_seq[l1] != c1) & (wt_seq[l2] != c2)
-          for l1, c1, l2, c2 in zip(l1s, c1s, l2s, c2s)]
 
-    c1s_wt = [wt_seq[l1]
-              for l1, c1, l2, c2 in zip(l1s, c1s, l2s, c2s)]
-
-    c2s_wt = [wt_seq[l2]
-              for l1, c1, l2, c2 in zip(l1s, c1s, l2s, c2s)]
+def _2pt_variants_df(wt_seq, alphabet, wt_int, l1s, c1s, l2s, c2s,
+                     include_wt, include_seqs):
+    """
+    Return the dataframe of get_2pt_variants() for two-point mutants
+    given as integer arrays. Variant sequences are only created, as
+    strings, if include_seqs is True.
+    """
+    # Create names and characters from integer arrays
+    wt_chars = np.array(list(wt_seq), dtype=object)
+    alphabet_chars = np.array(list(alphabet), dtype=object)
+    names_lc = _get_mutation_names(wt_seq, alphabet)
+    names = names_lc[l1s, c1s] + ',' + names_lc[l2s, c2s]
+    if include_seqs:
+        x_int = _codes_to_x_int(wt_int, [l1s, l2s], [c1s, c2s])
+        seqs = _x_int_to_seqs(x_int, alphabet).astype(str).astype(object)
+    c1s_wt = wt_chars[l1s]
+    c2s_wt = wt_chars[l2s]
+    c1s = alphabet_chars[c1s]
+    c2s = alphabet_chars[c2s]
 
     # Include wt if requested
     if include_wt:
-        names = ['WT'] + names
-        c1s_wt = [''] + c1s_wt
-        c1s = [''] + c1s
-        l1s = [-1] + l1s
-        c2s_wt = [''] + c2s_wt
-        c2s = [''] + c2s
-        l2s = [-1] + l2s
-        seqs = [wt_seq] + seqs
-        ix = [True] + ix
+        names = np.concatenate([['WT'], names])
+        c1s_wt = np.concatenate([[''], c1s_wt])
+        c1s = np.concatenate([[''], c1s])
+        l1s = np.concatenate([[-1], l1s])
+        c2s_wt = np.concatenate([[''], c2s_wt])
+        c2s = np.concatenate([[''], c2s])
+        l2s = np.concatenate([[-1], l2s])
+        if include_seqs:
+            seqs = np.concatenate([[wt_seq], seqs])
 
     # Report results in the form of a dataframe
     out_df = pd.DataFrame()
     out_df['name'] = names
-    out_df['l1'] = l1s
+    out_df['l1'] = l1s.astype(int)
     out_df['c1_wt'] = c1s_wt
     out_df['c1_mut'] = c1s
-    out_df['l2'] = l2s
+    out_df['l2'] = l2s.astype(int)
     out_df['c2_wt'] = c2s_wt
     out_df['c2_mut'] = c2s
-    out_df['seq'] = seqs
-
-    # Remove sequences identical to wt
-    out_df = out_df[ix]
+    if include_seqs:
+        out_df['seq'] = seqs
     out_df.set_index('name', inplace=True)
 
-    # Return seqs
     return out_df
 
 
+def _is_model(func):
+    """Return True if func is a MAVE-NN model."""
+    # If mavenn.src.model has not been imported, func cannot be a model;
+    # checking first avoids importing TensorFlow unnecessarily.
+    model_module = sys.modules.get('mavenn.src.model')
+    return model_module is not None and isinstance(func, model_module.Model)
+
+
+def _check_model_alphabet(model, alphabet):
+    """Check that alphabet is the same as that of model."""
+    check(np.array_equal(alphabet, model.alphabet),
+          f'alphabet={alphabet} does not match '
+          f'model.alphabet={model.alphabet}.')
+
+
+def _get_wt_codes(model, wt_seq):
+    """Validate wt_seq and return its integer encoding for model."""
+    check(isinstance(wt_seq, str),
+          f'wt_seq must be a string; is of type {type(wt_seq)}')
+    check(len(wt_seq) == model.L,
+          f'len(wt_seq)={len(wt_seq)}; must be L={model.L}.')
+    _, x_int = validate_seqs(np.array([wt_seq]),
+                             alphabet=model.alphabet,
+                             return_codes=True)
+    return x_int[0].astype(np.int32)
+
+
+def _get_pair_matrix(theta_lclc):
+    """
+    Return the symmetric (L,C,L,C) matrix of pairwise parameters, i.e.,
+    theta_lclc[l1,:,l2,:] for l1 < l2 mirrored to l1 > l2, with zeros on
+    the l1 == l2 blocks.
+    """
+    L = theta_lclc.shape[0]
+    ls = np.arange(L)
+    mask = (ls[:, None, None, None] < ls[None, None, :, None])
+    theta_upper = np.where(mask, np.nan_to_num(theta_lclc), 0.0)
+    return theta_upper + theta_upper.transpose([2, 3, 0, 1])
+
+
+def _get_unfixed_phi_function(model):
+    """Return a function mapping integer-encoded sequences to unfixed phi."""
+    tf_function = model._get_inference_function('unfixed_phi', np.int32)
+    return lambda x_int: tf_function(x_int).numpy().astype(float)
+
+
+def _get_1pt_unfixed_dphi(model, wt_int, batch_size):
+    """
+    Compute unfixed phi for wt_int and the (L,C) array of unfixed dphi
+    values for all single-point mutants.
+    """
+    L, C = model.L, model.C
+    ls = np.arange(L)
+    engine = model._get_numpy_engine()
+
+    # For additive, neighbor, and pairwise maps, compute dphi from
+    # parameters: h_lc is the sum of all parameters that involve
+    # character c at position l, given wild-type characters elsewhere.
+    if engine.has_gpmap:
+        params = engine.params
+        u_wt = float(engine.unfixed_phi_from_codes(wt_int[np.newaxis, :])[0])
+        h_lc = np.array(params['theta_lc'], dtype=float)
+        if model.gpmap_type == 'neighbor':
+            theta_lcc = np.array(params['theta_lcc'], dtype=float)
+            h_lc[:-1] += theta_lcc[ls[:-1], :, wt_int[1:]]
+            h_lc[1:] += theta_lcc[ls[:-1], wt_int[:-1], :]
+        elif model.gpmap_type == 'pairwise':
+            theta_pairs = _get_pair_matrix(params['theta_lclc'])
+            h_lc += theta_pairs[:, :, ls, wt_int].sum(axis=2)
+        du_lc = h_lc - h_lc[ls, wt_int][:, np.newaxis]
+
+    # Otherwise, evaluate single-point mutants in batches
+    else:
+        unfixed_phi_func = _get_unfixed_phi_function(model)
+        u_wt = float(unfixed_phi_func(wt_int[np.newaxis, :])[0])
+        du_lc = np.zeros([L, C])
+        blocks = _1pt_code_blocks(wt_int, C)
+        for l, c in _code_batches(blocks, batch_size):
+            x_int = _codes_to_x_int(wt_int, [l], [c])
+            du_lc[l, c] = unfixed_phi_func(x_int) - u_wt
+
+    return u_wt, du_lc
+
+
+@handle_errors
+def get_1pt_dphi(model, wt_seq, batch_size=10000):
+    """
+    Computes the effects of all single-point mutations to a
+    wild-type sequence directly from a MAVE-NN model.
+
+    For additive, neighbor, and pairwise G-P maps, effects are computed
+    from model parameters. For other G-P maps, integer-encoded mutant
+    sequences are evaluated in batches. In neither case are mutant
+    sequences represented as strings.
+
+    parameters
+    ----------
+
+    model: (mavenn.Model)
+        The model used to compute phi values.
+
+    wt_seq: (str)
+        The wild-type sequence. Must have length model.L and
+        comprise characters from model.alphabet.
+
+    batch_size: (int)
+        Number of mutant sequences to evaluate at a time when the G-P map
+        cannot be evaluated from parameters.
+
+    returns
+    -------
+
+    phi_wt: (float)
+        Latent phenotype of the wild-type sequence.
+
+    dphi_lc: (np.ndarray)
+        Shape (L,C) array, where dphi_lc[l,c] is the change in phi upon
+        mutating position l to character c. Equals 0 for wild-type
+        characters.
+    """
+    check(isinstance(batch_size, int) and batch_size >= 1,
+          f'batch_size={repr(batch_size)}; must be an int >= 1.')
+    wt_int = _get_wt_codes(model, wt_seq)
+    u_wt, du_lc = _get_1pt_unfixed_dphi(model, wt_int, batch_size)
+
+    # Convert to diffeomorphic-mode fixed phi
+    phi_wt = (u_wt - model.unfixed_phi_mean) / model.unfixed_phi_std
+    dphi_lc = du_lc / model.unfixed_phi_std
+
+    return phi_wt, dphi_lc
+
+
+@handle_errors
+def get_2pt_ddphi(model, wt_seq, batch_size=10000):
+    """
+    Computes the effects of all single-point mutations and the epistatic
+    effects of all two-point mutations to a wild-type sequence directly
+    from a MAVE-NN model.
+
+    For additive, neighbor, and pairwise G-P maps, effects are computed
+    from model parameters. For other G-P maps, integer-encoded mutant
+    sequences are evaluated in batches. In neither case are mutant
+    sequences represented as strings.
+
+    parameters
+    ----------
+
+    model: (mavenn.Model)
+        The model used to compute phi values.
+
+    wt_seq: (str)
+        The wild-type sequence. Must have length model.L and
+        comprise characters from model.alphabet.
+
+    batch_size: (int)
+        Number of mutant sequences to evaluate at a time when the G-P map
+        cannot be evaluated from parameters.
+
+    returns
+    -------
+
+    phi_wt: (float)
+        Latent phenotype of the wild-type sequence.
+
+    dphi_lc: (np.ndarray)
+        Shape (L,C) array of single-point effects, as returned by
+        get_1pt_dphi().
+
+    ddphi_lclc: (np.ndarray)
+        Shape (L,C,L,C) array, where ddphi_lclc[l1,c1,l2,c2] is
+        phi_12 - phi_1 - phi_2 + phi_wt for the double mutant having
+        character c1 at position l1 and c2 at position l2. Values are
+        NaN unless l1 < l2, and are 0 if c1 or c2 is a wild-type character.
+    """
+    check(isinstance(batch_size, int) and batch_size >= 1,
+          f'batch_size={repr(batch_size)}; must be an int >= 1.')
+    wt_int = _get_wt_codes(model, wt_seq)
+    u_wt, du_lc = _get_1pt_unfixed_dphi(model, wt_int, batch_size)
+    L, C = model.L, model.C
+    ls = np.arange(L)
+    engine = model._get_numpy_engine()
+
+    # Compute epistatic effects from parameters. For a pair of positions,
+    # ddphi = theta[c1,c2] - theta[c1,w2] - theta[w1,c2] + theta[w1,w2].
+    if engine.has_gpmap:
+        params = engine.params
+        ddu_lclc = np.zeros([L, C, L, C])
+        if model.gpmap_type == 'neighbor':
+            theta_lcc = np.array(params['theta_lcc'], dtype=float)
+            w1s, w2s = wt_int[:-1], wt_int[1:]
+            ddu_lcc = theta_lcc \
+                - theta_lcc[ls[:-1], :, w2s][:, :, np.newaxis] \
+                - theta_lcc[ls[:-1], w1s, :][:, np.newaxis, :] \
+                + theta_lcc[ls[:-1], w1s, w2s][:, np.newaxis, np.newaxis]
+            ddu_lclc[ls[:-1], :, ls[1:], :] = ddu_lcc
+        elif model.gpmap_type == 'pairwise':
+            theta_pairs = _get_pair_matrix(params['theta_lclc'])
+            theta_lcl = theta_pairs[:, :, ls, wt_int]
+            theta_llc = theta_pairs[ls, wt_int, :, :]
+            theta_ll = theta_llc[:, ls, wt_int]
+            ddu_lclc = theta_pairs \
+                - theta_lcl[:, :, :, np.newaxis] \
+                - theta_llc[:, np.newaxis, :, :] \
+                + theta_ll[:, np.newaxis, :, np.newaxis]
+
+    # Otherwise, evaluate two-point mutants in batches
+    else:
+        unfixed_phi_func = _get_unfixed_phi_function(model)
+        ddu_lclc = np.zeros([L, C, L, C])
+        blocks = _2pt_code_blocks(wt_int, C)
+        for l1, c1, l2, c2 in _code_batches(blocks, batch_size):
+            x_int = _codes_to_x_int(wt_int, [l1, l2], [c1, c2])
+            ddu_lclc[l1, c1, l2, c2] = unfixed_phi_func(x_int) \
+                - du_lc[l1, c1] - du_lc[l2, c2] - u_wt
+
+    # Set values with l1 >= l2 to NaN
+    mask_lclc = (ls[:, None, None, None] < ls[None, None, :, None])
+    ddu_lclc = np.where(mask_lclc, ddu_lclc, np.nan)
+
+    # Convert to diffeomorphic-mode fixed phi
+    phi_wt = (u_wt - model.unfixed_phi_mean) / model.unfixed_phi_std
+    dphi_lc = du_lc / model.unfixed_phi_std
+    ddphi_lclc = ddu_lclc / model.unfixed_phi_std
+
+    return phi_wt, dphi_lc, ddphi_lclc
+
+
 @handle_errors
-def get_1pt_effects(func, wt_seq, alphabet):
+def get_1pt_effects(func, wt_seq, alphabet, include_seqs=False):
     """
     Returns effects of all single-point mutations to a
     wild-type sequence.
@@ -261,8 +703,10 @@ def get_1pt_effects(func, wt_seq, alphabet):
     parameters
     ----------
 
-    func: (function)
-        A function that maps sequences to phenotype values.
+    func: (function or mavenn.Model)
+        A function that maps sequences to phenotype values. If a
+        MAVE-NN model is passed, phi values are computed using
+        get_1pt_dphi() rather than by evaluating mutant sequences.
 
     wt_seq: (str)
         The wild-type sequence.
@@ -270,6 +714,12 @@ def get_1pt_effects(func, wt_seq, alphabet):
     alphabet: (str)
         The alphabet of allowable characters.
 
+    include_seqs: (bool)
+        Whether to include a "seq" column listing variant sequences when
+        func is a MAVE-NN model. Sequences are not otherwise created in
+        this case. If func is a function, it is evaluated on variant
+        sequences, and these are always included.
+
     returns
     -------
 
@@ -279,27 +729,44 @@ def get_1pt_effects(func, wt_seq, alphabet):
     """
 
     alphabet = validate_alphabet(alphabet)
-
-    # Get all 1pt variant sequences
-    df = get_1pt_variants(wt_seq=wt_seq,
-                          alphabet=alphabet,
-                          include_wt=False)
-    x = df['seq'].values
-
-    # Compute dphi values
-    df['phi'] = func(x)
-    df['phi_wt'] = func(wt_seq)
-    df['dphi'] = df['phi'] - df['phi_wt']
+    check(isinstance(include_seqs, bool),
+          f'type(include_seqs)={type(include_seqs)}; must be bool.')
+
+    # Enumerate all 1pt variants as integer arrays
+    alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+    ls, cs = next(_1pt_code_blocks(wt_int, len(alphabet)))
+
+    # Compute dphi values from model if possible, from sequences otherwise
+    if _is_model(func):
+        _check_model_alphabet(func, alphabet)
+        phi_wt, dphi_lc = get_1pt_dphi(model=func, wt_seq=wt_seq)
+        df = _1pt_variants_df(wt_seq, alphabet, wt_int, ls, cs,
+                              include_wt=False,
+                              include_seqs=include_seqs)
+        df['dphi'] = dphi_lc[ls, cs]
+        df['phi_wt'] = phi_wt
+        df['phi'] = df['phi_wt'] + df['dphi']
+    else:
+        include_seqs = True
+        df = _1pt_variants_df(wt_seq, alphabet, wt_int, ls, cs,
+                              include_wt=False,
+                              include_seqs=True)
+        df['phi'] = func(df['seq'].values)
+        df['phi_wt'] = func(wt_seq)
+        df['dphi'] = df['phi'] - df['phi_wt']
 
     # Order columns
-    out_df = df[["l", "c_wt", "c_mut", "phi", "phi_wt", "dphi", "seq"]].copy()
+    cols = ["l", "c_wt", "c_mut", "phi", "phi_wt", "dphi"]
+    if include_seqs:
+        cols.append("seq")
+    out_df = df[cols].copy()
 
     return out_df
 
 
 
 @handle_errors
-def get_2pt_effects(func, wt_seq, alphabet):
+def get_2pt_effects(func, wt_seq, alphabet, include_seqs=False):
     """
     Returns effects of all two-point mutations to a
     wild-type sequence.
@@ -307,8 +774,10 @@ def get_2pt_effects(func, wt_seq, alphabet):
     parameters
     ----------
 
-    func: (function)
-        A function that maps sequences to phenotype values.
+    func: (function or mavenn.Model)
+        A function that maps sequences to phenotype values. If a
+        MAVE-NN model is passed, phi values are computed using
+        get_2pt_ddphi() rather than by evaluating mutant sequences.
 
     wt_seq: (str)
         The wild-type sequence.
@@ -316,6 +785,14 @@ def get_2pt_effects(func, wt_seq, alphabet):
     alphabet: (str)
         The alphabet of allowable characters
 
+    include_seqs: (bool)
+        Whether to include a "seq" column listing variant sequences when
+        func is a MAVE-NN model. Sequences are not otherwise created in
+        this case, which matters for long wild-type sequences, where
+        there are many millions of two-point variants. If func is a
+        function, it is evaluated on variant sequences, and these are
+        always included.
+
     returns
     -------
 
@@ -325,6 +802,33 @@ def get_2pt_effects(func, wt_seq, alphabet):
     """
 
     alphabet = validate_alphabet(alphabet)
+    check(isinstance(include_seqs, bool),
+          f'type(include_seqs)={type(include_seqs)}; must be bool.')
+
+    # If func is a model, compute effects without evaluating sequences
+    if _is_model(func):
+        _check_model_alphabet(func, alphabet)
+        phi_wt, dphi_lc, ddphi_lclc = get_2pt_ddphi(model=func,
+                                                    wt_seq=wt_seq)
+        alphabet, wt_int = _validate_wt_seq(wt_seq, alphabet)
+        l1s, c1s, l2s, c2s = _2pt_codes(wt_int, len(alphabet))
+        df2 = _2pt_variants_df(wt_seq, alphabet, wt_int,
+                               l1s, c1s, l2s, c2s,
+                               include_wt=False,
+                               include_seqs=include_seqs)
+        df2['phi_wt'] = phi_wt
+        df2['phi_1'] = phi_wt + dphi_lc[l1s, c1s]
+        df2['phi_2'] = phi_wt + dphi_lc[l2s, c2s]
+        df2['ddphi'] = ddphi_lclc[l1s, c1s, l2s, c2s]
+        df2['phi_12'] = \
+            df2['ddphi'] + df2['phi_1'] + df2['phi_2'] - df2['phi_wt']
+        cols = ["l1", "c1_wt", "c1_mut",
+                "l2", "c2_wt", "c2_mut",
+                "phi_12", "phi_1", "phi_2", "phi_wt", "ddphi"]
+        if include_seqs:
+            cols.append("seq")
+        out_df = df2[cols].copy()
+        return out_df
 
     # Get single-point effects
     df1 = get_1pt_effects(func=func,
@@ -10,6 +10,7 @@ import os
 import mavenn
 from mavenn.src.error_handling import handle_errors, check
 from mavenn.src.utils import load
+from mavenn.src.dataset import load_csv_dataset
 
 
 @handle_errors
@@ -153,7 +154,7 @@ def load_example_model(name=None):
 
 
 @handle_errors
-def load_example_dataset(name=None):
+def load_example_dataset(name=None, columns=None, cache=False):
     """
     Load example dataset provided with MAVE-NN.
 
@@ -163,6 +164,14 @@ def load_example_dataset(name=None):
         Name of example dataset. If ``None``, a list of valid dataset names will
         be printed.
 
+    columns: (list, None)
+        Names of columns to load. If ``None``, all columns are loaded.
+
+    cache: (bool)
+        Whether to cache the dataset in a columnar binary format, which
+        makes subsequent loads much faster. The cache is written to the
+        directory described in ``load_csv_dataset()``.
+
     Returns
     -------
     data_df: (pd.DataFrame)
@@ -192,7 +201,9 @@ def load_example_dataset(name=None):
         return None
 
     elif name in dataset_names:
-        data_df = pd.read_csv(dataset_dir + f'{name}_data.csv.gz')
+        data_df = load_csv_dataset(dataset_dict[name],
+                                   columns=columns,
+                                   cache=cache)
         return data_df
 
     # Otherwise
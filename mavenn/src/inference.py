@@ -0,0 +1,382 @@
+"""inference.py: NumPy implementation of model evaluation, which does not
+require TensorFlow."""
+# Standard imports
+import numpy as np
+
+# Scipy imports
+from scipy.special import gammaln
+
+# MAVE-NN imports
+from mavenn.src.error_handling import check, handle_errors
+from mavenn.src.reshape import _shape_for_output
+from mavenn.src.validate import validate_seqs, validate_batch_size, \
+    _get_seqs_shape_and_return_1d_array
+
+# G-P map types that can be evaluated in NumPy
+NUMPY_GPMAP_TYPES = ['additive', 'neighbor', 'pairwise']
+
+# Version of the file format written by Model.export()
+EXPORT_FORMAT_VERSION = 1
+
+# Maximum number of parameters to gather at once when computing phi
+CHUNK_ELEMENTS = 2**22
+
+# Clipping bounds used by the safe functions in measurement_process_layers.py
+MAX_EXP_ARG = np.float32(20.0)
+MIN_LOG_ARG = np.float32(np.exp(-MAX_EXP_ARG))
+
+
+# Safe functions matching those used by measurement process layers
+def _exp(x):
+    return np.exp(np.clip(x, -MAX_EXP_ARG, MAX_EXP_ARG))
+
+
+def _log(x):
+    return np.log(np.clip(x, MIN_LOG_ARG, np.inf))
+
+
+def _log_gamma(x):
+    return gammaln(np.clip(x, MIN_LOG_ARG, np.inf))
+
+
+def _polynomial(w, yhat):
+    """Compute w[0] + w[1]*yhat + w[2]*yhat**2 + ... ."""
+    w = np.asarray(w).ravel()
+    result = np.full(yhat.shape, w[0])
+    for k in range(1, len(w)):
+        result = result + w[k] * yhat**k
+    return result
+
+
+class NumpyInferenceEngine:
+    """
+    Evaluates a trained model using NumPy rather than TensorFlow.
+
+    Latent phenotypes are computed from integer-encoded sequences by
+    gathering the relevant elements of ``theta_lc`` and of the pairwise
+    parameters, and GE nonlinearities, GE noise models, and MPA measurement
+    processes are evaluated using closed-form expressions. Results agree with
+    those of the TensorFlow network up to floating point error. The G-P map
+    can only be evaluated for additive, neighbor, and pairwise models; see
+    ``has_gpmap``.
+
+    Parameters
+    ----------
+    params: (dict)
+        Model metadata and parameter values, as assembled by
+        ``Model._get_numpy_params()``. G-P map parameters can be omitted,
+        in which case only the measurement process is evaluated.
+    """
+
+    @handle_errors
+    def __init__(self, params):
+        """Construct engine instance."""
+        # Set metadata
+        self.params = {}
+        self.regression_type = str(params['regression_type'])
+        self.gpmap_type = str(params['gpmap_type'])
+        self.L = int(params['L'])
+        self.C = int(params['C'])
+        self.alphabet = np.array(params['alphabet'])
+        self.update_params(params)
+        self.has_gpmap = self.gpmap_type in NUMPY_GPMAP_TYPES and \
+            'theta_lc' in params
+        check(self.regression_type in ['GE', 'MPA'],
+              f'regression_type={repr(self.regression_type)}; '
+              f'must be "GE" or "MPA".')
+
+        # Flatten G-P map parameters for gathering
+        if self.has_gpmap:
+            L, C = self.L, self.C
+            self._theta_0 = float(np.ravel(params['theta_0'])[0])
+            self._theta_lc_flat = np.ravel(params['theta_lc'])
+            self._lc_offsets = C * np.arange(L, dtype=np.int32)
+            if self.gpmap_type == 'neighbor':
+                self._theta_pairs_flat = np.ravel(params['theta_lcc'])
+                self._pair_ls1 = np.arange(L - 1)
+                self._pair_ls2 = np.arange(1, L)
+                self._pair_offsets = C * C * np.arange(L - 1, dtype=np.int32)
+                self._pair_strides = (C, 1)
+            elif self.gpmap_type == 'pairwise':
+                self._theta_pairs_flat = np.ravel(params['theta_lclc'])
+                self._pair_ls1, self._pair_ls2 = np.triu_indices(L, k=1)
+                self._pair_offsets = (self._pair_ls1 * (C * L * C) +
+                                      self._pair_ls2 * C).astype(np.int64)
+                self._pair_strides = (L * C, 1)
+
+    def update_params(self, params):
+        """
+        Update parameter values and normalization constants. G-P map
+        parameters are left unchanged unless included in ``params``.
+        """
+        self.params.update(params)
+        self.unfixed_phi_mean = float(self.params['unfixed_phi_mean'])
+        self.unfixed_phi_std = float(self.params['unfixed_phi_std'])
+        self.y_mean = float(self.params['y_mean'])
+        self.y_std = float(self.params['y_std'])
+
+    def unfixed_phi_from_codes(self, x_int):
+        """
+        Compute unfixed latent phenotypes, i.e. the raw output of the G-P
+        map, from an (N,L) array of integer-encoded sequences.
+        """
+        check(self.has_gpmap,
+              f'gpmap_type={repr(self.gpmap_type)} cannot be evaluated in '
+              f'NumPy; must be one of {NUMPY_GPMAP_TYPES}.')
+        x_int = np.asarray(x_int)
+        check(x_int.ndim == 2 and x_int.shape[1] == self.L,
+              f'x_int.shape={x_int.shape}; must be (N,{self.L}).')
+
+        # Process sequences in chunks, so that arrays of gathered
+        # parameters have at most CHUNK_ELEMENTS elements
+        num_terms = self.L + len(getattr(self, '_pair_ls1', []))
+        chunk_size = max(1, CHUNK_ELEMENTS // num_terms)
+        phi = np.empty(len(x_int))
+        for start in range(0, len(x_int), chunk_size):
+            x_chunk = x_int[start:start + chunk_size].astype(np.int32)
+
+            # Compute additive contribution
+            phi_chunk = self._theta_0 + \
+                self._theta_lc_flat[x_chunk + self._lc_offsets].sum(axis=1)
+
+            # Compute pairwise contribution
+            if self.gpmap_type in ['neighbor', 'pairwise']:
+                stride_1, stride_2 = self._pair_strides
+                ix = self._pair_offsets + \
+                    stride_1 * x_chunk[:, self._pair_ls1] + \
+                    stride_2 * x_chunk[:, self._pair_ls2]
+                phi_chunk += self._theta_pairs_flat[ix].sum(axis=1)
+
+            phi[start:start + chunk_size] = phi_chunk
+
+        return phi
+
+    def yhat_norm_from_unfixed_phi(self, unfixed_phi):
+        """
+        Compute normalized yhat from unfixed phi using the GE nonlinearity.
+        """
+        check(self.regression_type == 'GE',
+              'regression type must be "GE" for this function')
+        phi = np.asarray(unfixed_phi, dtype=float).ravel()
+        p = self.params
+        if str(p['ge_nonlinearity_type']) == 'linear':
+            yhat_norm = p['a'][0] + p['b'][0] * phi
+        else:
+            yhat_norm = p['a_0'][0] + np.sum(
+                p['b_k'][None, :] * np.tanh(p['c_k'][None, :] * phi[:, None]
+                                            + p['d_k'][None, :]), axis=1)
+        return yhat_norm
+
+    def p_of_y_norm_given_yhat_norm(self, y_norm, yhat_norm):
+        """
+        Compute p(y_norm|yhat_norm) for paired values using the GE noise
+        model, where y_norm and yhat_norm are normalized values.
+        """
+        check(self.regression_type == 'GE',
+              'regression type must be "GE" for this function')
+        y = np.asarray(y_norm, dtype=float)
+        yhat = np.asarray(yhat_norm, dtype=float)
+        p = self.params
+        noise_model = str(p['ge_noise_model_type'])
+
+        # Compute negative log likelihoods
+        if noise_model == 'Gaussian':
+            logsigma = _polynomial(p['noise_a'], yhat)
+            sigma = _exp(logsigma)
+            nlls = 0.5 * ((y - yhat) / sigma)**2 + logsigma + \
+                0.5 * np.log(2 * np.pi)
+
+        elif noise_model == 'Cauchy':
+            loggamma = _polynomial(p['noise_a'], yhat)
+            nlls = _log(_exp(2 * loggamma) + (y - yhat)**2) - loggamma + \
+                np.log(np.pi)
+
+        elif noise_model == 'SkewedT':
+            a = np.clip(_exp(_polynomial(p['w_a'], yhat)), 0.01, np.inf)
+            b = np.clip(_exp(_polynomial(p['w_b'], yhat)), 0.01, np.inf)
+            s = _exp(_polynomial(p['w_s'], yhat))
+            t_mode = (a - b) * np.sqrt(a + b) / \
+                (np.sqrt(2 * a + 1) * np.sqrt(2 * b + 1))
+            t = t_mode + (y - yhat) / s
+            arg = t / np.sqrt(a + b + t**2)
+            nlls = -((a + 0.5) * _log(1 + arg) +
+                     (b + 0.5) * _log(1 - arg) +
+                     -(a + b - 1) * _log(2.0) +
+                     -0.5 * _log(a + b) +
+                     _log_gamma(a + b) +
+                     -_log_gamma(a) +
+                     -_log_gamma(b) +
+                     -_log(s))
+
+        else:
+            assert False, 'This should not happen.'
+
+        return _exp(-nlls)
+
+    def p_of_all_y_given_unfixed_phi(self, unfixed_phi):
+        """
+        Compute the (N,Y) array of p(y|phi) values for all bins y using the
+        MPA measurement process.
+        """
+        check(self.regression_type == 'MPA',
+              'regression type must be "MPA" for this function')
+        phi = np.asarray(unfixed_phi, dtype=float).reshape(-1, 1, 1)
+        p = self.params
+        psi_my = p['a_y'][None, :] + np.sum(
+            p['b_yk'][None] * np.tanh(p['c_yk'][None] * phi + p['d_yk'][None]),
+            axis=2)
+        w_my = _exp(psi_my)
+        return w_my / w_my.sum(axis=1, keepdims=True)
+
+    def x_int_to_phi(self, x_int):
+        """Compute phi from an (N,L) array of integer-encoded sequences."""
+        unfixed_phi = self.unfixed_phi_from_codes(x_int)
+        return (unfixed_phi - self.unfixed_phi_mean) / self.unfixed_phi_std
+
+    def phi_to_yhat(self, phi):
+        """Compute yhat from a 1D array of phi values; GE models only."""
+        phi = np.asarray(phi, dtype=float).ravel()
+        unfixed_phi = self.unfixed_phi_mean + self.unfixed_phi_std * phi
+        yhat_norm = self.yhat_norm_from_unfixed_phi(unfixed_phi)
+        return self.y_mean + self.y_std * yhat_norm
+
+    def p_of_y_given_phi(self, y, phi):
+        """Compute p(y|phi) for paired 1D arrays of y and phi values."""
+        phi = np.asarray(phi, dtype=float).ravel()
+        if self.regression_type == 'GE':
+            yhat = self.phi_to_yhat(phi)
+            y_norm = (np.asarray(y, dtype=float).ravel() - self.y_mean) / \
+                self.y_std
+            yhat_norm = (yhat - self.y_mean) / self.y_std
+            return self.p_of_y_norm_given_yhat_norm(y_norm, yhat_norm) / \
+                self.y_std
+        else:
+            y = np.asarray(y).astype(int).ravel()
+            unfixed_phi = self.unfixed_phi_mean + self.unfixed_phi_std * phi
+            p_my = self.p_of_all_y_given_unfixed_phi(unfixed_phi)
+            return p_my[np.arange(len(y)), y]
+
+
+class ExportedModel(NumpyInferenceEngine):
+    """
+    Represents a model loaded from a file written by ``Model.export()``.
+
+    Sequences are scored using NumPy, without importing TensorFlow or
+    reconstructing the Keras network, so exported models load quickly
+    and are suitable for serving and batch-scoring jobs. In addition to the
+    methods of ``NumpyInferenceEngine``, which act on integer-encoded
+    sequences and arrays of latent phenotypes, exported models provide
+    ``x_to_phi()`` and ``x_to_yhat()``, which act on sequences as do the
+    corresponding methods of ``Model``.
+
+    Parameters
+    ----------
+    params: (dict)
+        Model metadata and parameter values, as stored in the exported file.
+    """
+
+    @handle_errors
+    def __init__(self, params):
+        """Construct exported model instance."""
+        super().__init__(params)
+        check(self.has_gpmap,
+              f'gpmap_type={repr(self.gpmap_type)} cannot be evaluated in '
+              f'NumPy; must be one of {NUMPY_GPMAP_TYPES}.')
+
+    @handle_errors
+    def x_to_phi(self, x, batch_size=None):
+        """
+        Compute ``phi`` given ``x``.
+
+        Parameters
+        ----------
+        x: (np.ndarray)
+            Sequences, provided as an ``np.ndarray`` of strings or fixed-width
+            bytes, each of length ``L``, or as an ``(N,L)`` array of
+            integer-encoded sequences.
+
+        batch_size: (int, None)
+            Maximum number of sequences to encode and evaluate at a time.
+            If ``None``, all sequences are evaluated at once.
+
+        Returns
+        -------
+        phi: (np.ndarray)
+            Latent phenotype values, provided as floats within an
+            ``np.ndarray`` the same shape as ``x``.
+        """
+        # Shape x for processing
+        batch_size = validate_batch_size(batch_size)
+        x, x_shape = _get_seqs_shape_and_return_1d_array(x)
+        N = len(x)
+        if batch_size is None:
+            batch_size = max(N, 1)
+
+        # Compute phi one batch at a time, filling preallocated array
+        phi = np.empty(N, dtype=float)
+        for start in range(0, N, batch_size):
+            x_batch, x_int = validate_seqs(x[start:start + batch_size],
+                                           alphabet=self.alphabet,
+                                           return_codes=True)
+            check(len(x_batch[0]) == self.L,
+                  f'len(x[0])={len(x_batch[0])}; should be L={self.L}')
+            phi[start:start + len(x_int)] = self.x_int_to_phi(x_int)
+
+        return _shape_for_output(phi, x_shape)
+
+    @handle_errors
+    def x_to_yhat(self, x, batch_size=None):
+        """
+        Compute ``yhat`` given ``x``; GE models only. See ``x_to_phi()``
+        for a description of parameters.
+        """
+        check(self.regression_type == 'GE',
+              'Regression type must be GE for this function.')
+        phi = self.x_to_phi(x, batch_size=batch_size)
+        yhat = self.phi_to_yhat(np.ravel(phi))
+        return _shape_for_output(yhat, np.shape(phi))
+
+
+@handle_errors
+def load_exported(filename, verbose=True):
+    """
+    Load a model written by ``Model.export()``.
+
+    Unlike ``mavenn.load()``, this function does not import TensorFlow or
+    reconstruct the Keras network. The returned object can compute
+    ``phi``, ``yhat``, and ``p(y|phi)``, but cannot be trained.
+
+    Parameters
+    ----------
+    filename: (str)
+        File directory and root. Do not include the ``.npz`` extension.
+
+    verbose: (bool)
+        Whether to print feedback.
+
+    Returns
+    -------
+    exported_model: (mavenn.src.inference.ExportedModel)
+        Model that evaluates sequences using NumPy.
+    """
+    # Load parameters, casting 0-dimensional arrays as scalars
+    filename_npz = filename + '.npz'
+    with np.load(filename_npz, allow_pickle=False) as data:
+        params = {key: data[key][()] if data[key].ndim == 0 else data[key]
+                  for key in data.files}
+
+    # Check format version
+    format_version = int(params.pop('format_version', -1))
+    check(format_version == EXPORT_FORMAT_VERSION,
+          f'format_version={format_version} in {filename_npz}; '
+          f'must be {EXPORT_FORMAT_VERSION}.')
+
+    # Create model
+    exported_model = ExportedModel(params)
+
+    # Provide feedback
+    if verbose:
+        print(f'Model loaded from this file:\n'
+              f'\t{filename_npz}')
+
+    return exported_model
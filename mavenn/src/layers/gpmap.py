@@ -43,6 +43,10 @@ class GPMapLayer(Layer):
         # Set mask type
         self.mask_type = mask_type
 
+        # Count changes to weights made via set_weights(), so that copies
+        # of parameters held elsewhere can be refreshed when needed
+        self.weights_version = 0
+
         # Call superclass constructor
         super().__init__()
 
@@ -60,6 +64,18 @@ class GPMapLayer(Layer):
         """Build layer."""
         super().build(input_shape)
 
+    def set_weights(self, weights):
+        """Set layer weights, recording that they have changed."""
+        super().set_weights(weights)
+        self.weights_version += 1
+
+    def x_int_to_lc_ix(self, x_int):
+        """
+        Convert (B,L) integer codes to (B,L) flat indices into an (L,C) array.
+        """
+        return tf.cast(x_int, tf.int32) + \
+            self.C * tf.range(self.L, dtype=tf.int32)[tf.newaxis, :]
+
     ### The following methods must be fully overridden
 
     def call(self, inputs):
@@ -78,7 +94,13 @@ class GPMapLayer(Layer):
 
 
 class AdditiveGPMapLayer(GPMapLayer):
-    """Represents an additive G-P map."""
+    """
+    Represents an additive G-P map.
+
+    Accepts either (B,L) integer-encoded sequences, in which case the relevant
+    elements of theta_lc are gathered directly, or (B,L*C) one-hot encoded
+    sequences.
+    """
 
     @handle_errors
     def __init__(self, *args, **kwargs):
@@ -106,14 +128,23 @@ class AdditiveGPMapLayer(GPMapLayer):
         # Call superclass build
         super().build(input_shape)
 
-    def call(self, x_lc):
+    def call(self, x):
         """Process layer input and return output."""
-        # Shape input
-        x_lc = tf.reshape(x_lc, [-1, self.L, self.C])
+        # If sequences are integer-encoded, gather theta_lc[l, x_l] for each
+        # position l. This requires O(L) rather than O(L*C) operations.
+        if x.dtype.is_integer:
+            theta_lc_flat = tf.reshape(self.theta_lc, [-1])
+            theta_x = tf.gather(theta_lc_flat, self.x_int_to_lc_ix(x))
+            phi = self.theta_0 + K.sum(theta_x, axis=1, keepdims=True)
+
+        # Otherwise, sequences are one-hot encoded
+        else:
+            # Shape input
+            x_lc = tf.reshape(x, [-1, self.L, self.C])
 
-        phi = self.theta_0 + \
-              tf.reshape(K.sum(self.theta_lc * x_lc, axis=[1, 2]),
-                         shape=[-1, 1])
+            phi = self.theta_0 + \
+                  tf.reshape(K.sum(self.theta_lc * x_lc, axis=[1, 2]),
+                             shape=[-1, 1])
 
         return phi
 
@@ -178,7 +209,13 @@ class AdditiveGPMapLayer(GPMapLayer):
 
 
 class PairwiseGPMapLayer(GPMapLayer):
-    """Represents a pairwise G-P map."""
+    """
+    Represents a pairwise G-P map.
+
+    Accepts either (B,L) integer-encoded sequences or (B,L*C) one-hot encoded
+    sequences. In both cases, phi is computed by gathering the active elements
+    of theta_lc and theta_lclc, so memory use scales as O(L^2) per sequence.
+    """
 
     @handle_errors
     def __init__(self, *args, **kwargs):
@@ -203,6 +240,15 @@ class PairwiseGPMapLayer(GPMapLayer):
         else:
             assert False, "This should not work"
 
+        # List the pairs of positions (l1,l2) having active parameters, and
+        # the offset of theta_lclc[l1,0,l2,0] in the flattened weight tensor
+        pair_ls1, pair_ls2 = np.nonzero(self.mask[0, :, 0, :, 0])
+        self.pair_ls1 = tf.constant(pair_ls1, dtype=tf.int32)
+        self.pair_ls2 = tf.constant(pair_ls2, dtype=tf.int32)
+        self.pair_offsets = tf.constant(
+            pair_ls1 * (self.C * self.L * self.C) + pair_ls2 * self.C,
+            dtype=tf.int32)
+
     @handle_errors
     def get_config(self):
         """Return configuration dictionary."""
@@ -242,22 +288,31 @@ class PairwiseGPMapLayer(GPMapLayer):
         # Call superclass build
         super().build(input_shape)
 
-    def call(self, x_lc):
+    def call(self, x):
         """Process layer input and return output."""
-        # Compute phi
-        phi = self.theta_0
-        phi = phi + tf.reshape(K.sum(self.theta_lc *
-                                     tf.reshape(x_lc, [-1, self.L, self.C]),
-                                     axis=[1, 2]),
-                               shape=[-1, 1])
-        phi = phi + tf.reshape(K.sum(self.theta_lclc *
-                                     self.mask *
-                                     tf.reshape(x_lc,
-                                         [-1, self.L, self.C, 1, 1]) *
-                                     tf.reshape(x_lc,
-                                         [-1, 1, 1, self.L, self.C]),
-                                     axis=[1, 2, 3, 4]),
-                               shape=[-1, 1])
+        # If sequences are one-hot encoded, recover integer codes. This
+        # avoids ever forming the (B,L,C,L,C) outer product of x_lc with itself
+        if not x.dtype.is_integer:
+            x = tf.argmax(tf.reshape(x, [-1, self.L, self.C]),
+                          axis=2,
+                          output_type=tf.int32)
+        x = tf.cast(x, tf.int32)
+
+        # Compute additive contribution
+        theta_lc_flat = tf.reshape(self.theta_lc, [-1])
+        theta_x = tf.gather(theta_lc_flat, self.x_int_to_lc_ix(x))
+        phi = self.theta_0 + K.sum(theta_x, axis=1, keepdims=True)
+
+        # Compute pairwise contribution by gathering
+        # theta_lclc[l1, x_l1, l2, x_l2] for each active pair (l1,l2).
+        # This requires O(L^2) rather than O(L^2*C^2) operations.
+        x_1 = tf.gather(x, self.pair_ls1, axis=1)
+        x_2 = tf.gather(x, self.pair_ls2, axis=1)
+        ix = self.pair_offsets[tf.newaxis, :] + \
+            x_1 * (self.L * self.C) + x_2
+        theta_lclc_flat = tf.reshape(self.theta_lclc, [-1])
+        theta_xx = tf.gather(theta_lclc_flat, ix)
+        phi = phi + K.sum(theta_xx, axis=1, keepdims=True)
 
         return phi
 
@@ -337,6 +392,198 @@ class PairwiseGPMapLayer(GPMapLayer):
         return param_dict
 
 
+class NeighborGPMapLayer(GPMapLayer):
+    """
+    Represents a neighbor G-P map.
+
+    Only the couplings between adjacent positions are stored, as a weight
+    tensor of shape (1,L-1,C,C), and phi is computed in O(L) operations per
+    sequence. Accepts either (B,L) integer-encoded sequences or (B,L*C)
+    one-hot encoded sequences. Parameters are expanded to the (L,C,L,C)
+    format used by PairwiseGPMapLayer only in get_params().
+    """
+
+    @handle_errors
+    def __init__(self, *args, **kwargs):
+        """Construct layer instance."""
+        kwargs['mask_type'] = 'neighbor'
+        super().__init__(*args, **kwargs)
+
+    @handle_errors
+    def build(self, input_shape):
+        """Build layer."""
+        # Define theta_0
+        self.theta_0 = self.add_weight(name='theta_0',
+                                       shape=(1,),
+                                       initializer=Constant(0.),
+                                       trainable=True,
+                                       regularizer=self.regularizer)
+
+        # Define theta_lc parameters
+        theta_lc_shape = (1, self.L, self.C)
+        theta_lc_init = np.random.randn(*theta_lc_shape)/np.sqrt(self.L)
+        self.theta_lc = self.add_weight(name='theta_lc',
+                                        shape=theta_lc_shape,
+                                        initializer=Constant(theta_lc_init),
+                                        trainable=True,
+                                        regularizer=self.regularizer)
+
+        # Define theta_lcc parameters; theta_lcc[l,c1,c2] is the coupling
+        # between character c1 at position l and character c2 at position l+1
+        theta_lcc_shape = (1, self.L-1, self.C, self.C)
+        theta_lcc_init = np.random.randn(*theta_lcc_shape)/np.sqrt(self.L**2)
+        self.theta_lcc = self.add_weight(name='theta_lcc',
+                                         shape=theta_lcc_shape,
+                                         initializer=Constant(theta_lcc_init),
+                                         trainable=True,
+                                         regularizer=self.regularizer)
+
+        # Call superclass build
+        super().build(input_shape)
+
+    def call(self, x):
+        """Process layer input and return output."""
+        # If sequences are one-hot encoded, recover integer codes
+        if not x.dtype.is_integer:
+            x = tf.argmax(tf.reshape(x, [-1, self.L, self.C]),
+                          axis=2,
+                          output_type=tf.int32)
+        x = tf.cast(x, tf.int32)
+
+        # Compute additive contribution
+        theta_lc_flat = tf.reshape(self.theta_lc, [-1])
+        theta_x = tf.gather(theta_lc_flat, self.x_int_to_lc_ix(x))
+        phi = self.theta_0 + K.sum(theta_x, axis=1, keepdims=True)
+
+        # Compute neighbor contribution by gathering theta_lcc[l, x_l, x_l+1]
+        ls = tf.range(self.L-1, dtype=tf.int32)[tf.newaxis, :]
+        ix = self.C * self.C * ls + self.C * x[:, :-1] + x[:, 1:]
+        theta_lcc_flat = tf.reshape(self.theta_lcc, [-1])
+        theta_xx = tf.gather(theta_lcc_flat, ix)
+        phi = phi + K.sum(theta_xx, axis=1, keepdims=True)
+
+        return phi
+
+    @handle_errors
+    def set_params(self, theta_0=None, theta_lc=None, theta_lclc=None):
+        """
+        Set values of layer parameters.
+
+        Parameters
+        ----------
+        theta_0: (float)
+
+        theta_lc: (np.ndarray)
+            Shape (L,C)
+
+        theta_lclc: (np.ndarray)
+            Shape (L,C,L,C). Only the elements theta_lclc[l,:,l+1,:] are used.
+
+        Returns
+        -------
+        None
+        """
+        # Check theta_0
+        if theta_0 is not None:
+            check(isinstance(theta_0, float),
+                  f'type(theta_0)={theta_0}; must be float')
+
+        # Check theta_lc
+        if theta_lc is not None:
+            check(isinstance(theta_lc, np.ndarray),
+                  f'type(theta_lc)={theta_lc}; must be np.ndarray')
+            check(theta_lc.size == self.L * self.C,
+                   f'theta_lc.size={repr(theta_lc.size)}; '
+                   f'must be ({self.L * self.C}).')
+            theta_lc = theta_lc.reshape([1, self.L, self.C])
+
+        # Check theta_lclc, then extract neighbor couplings
+        theta_lcc = None
+        if theta_lclc is not None:
+            check(isinstance(theta_lclc, np.ndarray),
+                  f'type(theta_lclc)={theta_lclc}; must be np.ndarray')
+            check(theta_lclc.size == self.L * self.C * self.L * self.C,
+                   f'theta_lclc.size={repr(theta_lclc.size)}; '
+                   f'must be ({self.L * self.C * self.L * self.C}).')
+            theta_lcc = theta_lclc_to_theta_lcc(
+                theta_lclc.reshape([self.L, self.C, self.L, self.C]))
+            theta_lcc = theta_lcc.reshape([1, self.L-1, self.C, self.C])
+
+        # Set weight values
+        self.set_weights([np.array([theta_0]), theta_lc, theta_lcc])
+
+    @handle_errors
+    def get_params(self):
+        """
+        Get values of layer parameters.
+
+        Parameters
+        ----------
+        None.
+
+        Returns
+        -------
+        param_dict: (dict)
+            Dictionary containing model parameters. Model parameters are
+            returned as matrices, NOT as individual named parameters, and are
+            NOT gauge-fixed. Neighbor couplings are returned as a (L,C,L,C)
+            array with non-neighbor elements set to NaN.
+        """
+        # Get list of weights
+        param_list = self.get_weights()
+
+        #  Fill param_dict
+        param_dict = {}
+        param_dict['theta_0'] = param_list[0]
+        param_dict['theta_lc'] = param_list[1].reshape([self.L, self.C])
+        param_dict['theta_lclc'] = theta_lcc_to_theta_lclc(
+            param_list[2].reshape([self.L-1, self.C, self.C]))
+
+        return param_dict
+
+
+def theta_lclc_to_theta_lcc(theta_lclc):
+    """
+    Extract neighbor couplings from a pairwise parameter array.
+
+    Parameters
+    ----------
+    theta_lclc: (np.ndarray)
+        Shape (L,C,L,C).
+
+    Returns
+    -------
+    theta_lcc: (np.ndarray)
+        Shape (L-1,C,C), with theta_lcc[l] = theta_lclc[l,:,l+1,:].
+    """
+    L = theta_lclc.shape[0]
+    ls = np.arange(L-1)
+    return theta_lclc[ls, :, ls+1, :]
+
+
+def theta_lcc_to_theta_lclc(theta_lcc):
+    """
+    Expand neighbor couplings into a pairwise parameter array.
+
+    Parameters
+    ----------
+    theta_lcc: (np.ndarray)
+        Shape (L-1,C,C).
+
+    Returns
+    -------
+    theta_lclc: (np.ndarray)
+        Shape (L,C,L,C), with theta_lclc[l,:,l+1,:] = theta_lcc[l] and all
+        other elements set to NaN.
+    """
+    L = theta_lcc.shape[0] + 1
+    C = theta_lcc.shape[1]
+    theta_lclc = np.full([L, C, L, C], np.nan)
+    ls = np.arange(L-1)
+    theta_lclc[ls, :, ls+1, :] = theta_lcc
+    return theta_lclc
+
+
 class MultilayerPerceptronGPMap(GPMapLayer):
     """Represents an MLP G-P map."""
 
@@ -387,23 +634,39 @@ class MultilayerPerceptronGPMap(GPMapLayer):
             self.num_features = L*C + L*(L-1)*(C**2)/2
         self.x_shape = (input_shape[0], int(self.num_features))
 
-        # Create mask
-        ls = np.arange(self.L).astype(int)
-        ls1 = np.tile(ls.reshape([L, 1, 1, 1]),
-                                 [1, C, L, C])
-        ls2 = np.tile(ls.reshape([1, 1, L, 1]),
-                                 [L, C, 1, C])
+        # List the pairs of positions (l1, l2) that have features
         if self.features in ['neighbor', 'pairwise']:
             if self.features == 'pairwise':
-                mask_lclc = (ls2 - ls1 >= 1)
+                pair_ls1, pair_ls2 = np.triu_indices(L, k=1)
             else:
-                mask_lclc = (ls2 - ls1 == 1)
-            mask_vec = np.reshape(mask_lclc, L*C*L*C)
-            self.mask_ints = np.arange(L*C*L*C, dtype=int)[mask_vec]
+                pair_ls1, pair_ls2 = np.arange(L-1), np.arange(1, L)
         elif self.features == 'additive':
-            self.mask_ints = None
+            pair_ls1, pair_ls2 = np.zeros(0, dtype=int), np.zeros(0, dtype=int)
         else:
             assert False, "This should not work"
+        self.pair_ls1 = pair_ls1.astype(np.int32)
+        self.pair_ls2 = pair_ls2.astype(np.int32)
+        num_pairs = len(pair_ls1)
+
+        # Map each (pair, c1, c2) to its feature column. Pairwise features
+        # are ordered lexicographically in (l1, c1, l2, c2) after the L*C
+        # additive features, so within the block of pairs that share l1,
+        # c1 has stride (number of partners of l1)*C. For neighbor features
+        # this reduces to L*C + pair*C*C + c1*C + c2.
+        partners = np.bincount(pair_ls1, minlength=L)
+        block_starts = C*C*(np.cumsum(partners) - partners)
+        pair_ranks = np.arange(num_pairs) - \
+            (np.cumsum(partners) - partners)[pair_ls1]
+        c1_strides = (partners*C)[pair_ls1]
+        cs = np.arange(C)
+        pair_columns = (L*C +
+                        block_starts[pair_ls1][:, None, None] +
+                        c1_strides[:, None, None]*cs[None, :, None] +
+                        C*pair_ranks[:, None, None] +
+                        cs[None, None, :])
+        self.pair_columns = pair_columns.reshape(-1).astype(np.int32)
+        self.pair_offsets = (C*C*np.arange(num_pairs)).astype(np.int32)
+        self.lc_offsets = (C*np.arange(L)).astype(np.int32)
 
         # Make sure self.layers is empty
         self.layers = []
@@ -447,31 +710,46 @@ class MultilayerPerceptronGPMap(GPMapLayer):
         else:
             assert False, 'This should not happen.'
 
+        # Build first layer now, so its kernel can be indexed in call()
+        self.layers[0].build((None, int(self.num_features)))
+
         # Build superclass
         super().build(input_shape)
 
-    def call(self, x_add):
-        """Process layer input and return output."""
+    def x_to_feature_columns(self, x_int):
+        """
+        Compute, for each integer-encoded sequence, the (L + num_pairs)
+        columns of the feature vector that are equal to one.
+        """
+        x_int = tf.cast(x_int, tf.int32)
 
-        # Create input features
+        # Compute columns of additive features
+        add_columns = x_int + self.lc_offsets[tf.newaxis, :]
         if self.features == 'additive':
-            tensor = x_add
-        elif self.features in ['neighbor', 'pairwise']:
-            L = self.L
-            C = self.C
-            x___lc = tf.reshape(x_add, [-1, 1, 1, L, C])
-            x_lc__ = tf.reshape(x_add, [-1, L, C, 1, 1])
-            x_lclc = x___lc * x_lc__
-            x_pair = tf.reshape(x_lclc, [-1, L*C*L*C])
-
-            # Only use relevant columns
-            x_2pt = tf.gather(x_pair, self.mask_ints, axis=1)
-
-            # Make input tensor
-            tensor = tf.concat([x_add, x_2pt], axis=1)
-
-        # Run tensor through layers
-        for layer in self.layers:
+            return add_columns
+
+        # Compute columns of pairwise features
+        x_ls1 = tf.gather(x_int, self.pair_ls1, axis=1)
+        x_ls2 = tf.gather(x_int, self.pair_ls2, axis=1)
+        pair_ints = self.pair_offsets[tf.newaxis, :] + self.C*x_ls1 + x_ls2
+        pair_columns = tf.gather(self.pair_columns, pair_ints)
+
+        return tf.concat([add_columns, pair_columns], axis=1)
+
+    def call(self, x_int):
+        """Process layer input and return output."""
+
+        # Because features are one-hot, the first layer's product with the
+        # feature vector is a sum over the kernel rows of active features.
+        # Gathering these rows avoids forming the one-hot encoding, the
+        # (L*C)^2 outer product, or the full pairwise feature vector.
+        first_layer = self.layers[0]
+        columns = self.x_to_feature_columns(x_int)
+        tensor = tf.reduce_sum(tf.gather(first_layer.kernel, columns), axis=1)
+        tensor = first_layer.activation(tensor + first_layer.bias)
+
+        # Run tensor through remaining layers
+        for layer in self.layers[1:]:
             tensor = layer(tensor)
         phi = tensor
 
@@ -369,6 +369,11 @@ class GlobalEpistasisLayer(Layer):
 class NoiseModelLayer(Layer):
     """Generic class representing the noise model of a GE model."""
 
+    # Whether compute_var_nlls() is implemented, i.e. whether the
+    # likelihood of repeated observations of the same sequence depends on
+    # their y values only through their mean and variance.
+    supports_sufficient_stats = False
+
     def __init__(self,
                  info_for_layers_dict,
                  polynomial_order=2,
@@ -401,8 +406,11 @@ class NoiseModelLayer(Layer):
         Parameters
         ----------
         inputs: (tf.Tensor)
-            A (B,2) tensor containing both yhat and ytrue, where B is batch
-            size.
+            A (B,4) tensor containing yhat followed by the training labels,
+            where B is batch size. The labels are ytrue, the number of
+            observations summarized by each row (weight), and the variance of
+            the observed y values about ytrue. For data that is not
+            deduplicated, weight is 1 and variance is 0.
 
         Returns
         -------
@@ -412,15 +420,23 @@ class NoiseModelLayer(Layer):
         yhat = inputs[:, 0:1]
 
         # these are the labels
-        ytrue = inputs[:, 1:]
+        ytrue = inputs[:, 1:2]
+        weights = inputs[:, 2:3]
+        yvars = inputs[:, 3:4]
 
         # Compute negative log likelihood
         nlls = self.compute_nlls(yhat=yhat,
                                  ytrue=ytrue)
 
+        # Add contribution from the spread of observed y values, then
+        # multiply by the number of observations summarized by each row
+        if self.supports_sufficient_stats:
+            nlls = nlls + self.compute_var_nlls(yhat=yhat, yvars=yvars)
+        nlls = weights * nlls
+
         # Compute I_var metric from nlls
         H_y = self.info_for_layers_dict.get('H_y_norm', np.nan)
-        H_y_given_phi = K.mean(np.log2(e) * nlls)
+        H_y_given_phi = np.log2(e) * K.sum(nlls) / K.sum(weights)
         I_var = H_y - H_y_given_phi
         self.add_metric(I_var, name="I_var", aggregation="mean")
 
@@ -450,6 +466,11 @@ class NoiseModelLayer(Layer):
         y = self.yhat_to_yq(yhat, q)
         return y
 
+    def compute_var_nlls(self, yhat, yvars):
+        """Compute the negative log likelihood contribution from the
+        variance of y values observed for each datum."""
+        assert False, 'Function must be overridden'
+
     ### The following functions must be overridden
     def compute_params(self, yhat, ytrue):
         """Compute the parameters governing p(y|yhat)."""
@@ -475,6 +496,9 @@ class NoiseModelLayer(Layer):
 class GaussianNoiseModelLayer(NoiseModelLayer):
     """Represents a Gaussian noise model for GE regression."""
 
+    # Gaussian likelihoods depend on y only through its mean and variance
+    supports_sufficient_stats = True
+
     def __init__(self, *args, **kwargs):
         """Construct layer instance."""
         super().__init__(*args, **kwargs)
@@ -520,6 +544,13 @@ class GaussianNoiseModelLayer(NoiseModelLayer):
 
         return nlls
 
+    @handle_arrays
+    def compute_var_nlls(self, yhat, yvars):
+        """Compute the negative log likelihood contribution from the
+        variance of y values observed for each datum."""
+        sigma = Exp(self.compute_params(yhat))
+        return 0.5 * yvars / K.square(sigma)
+
     @handle_arrays
     def yhat_to_yq(self, yhat, q):
         """Compute quantiles for p(y|yhat)."""
@@ -6,9 +6,10 @@ import pdb
 import pickle
 import time
 import numbers
+import os
 
 # Scipy imports
-from scipy.sparse import csc_matrix
+from scipy.sparse import csr_matrix
 from scipy.sparse.linalg import lsmr
 from scipy.stats import spearmanr
 
@@ -17,9 +18,6 @@ import tensorflow as tf
 import tensorflow.keras.backend as K
 from tensorflow.keras.callbacks import EarlyStopping
 
-# sklearn import
-import sklearn.preprocessing
-
 # MAVE-NN imports
 from mavenn import TINY
 from mavenn.src.error_handling import handle_errors, check
@@ -31,11 +29,28 @@ from mavenn.src.reshape import _shape_for_output, \
                                _broadcast_arrays
 from mavenn.src.validate import validate_seqs, \
                                 validate_1d_array, \
-                                validate_alphabet
-from mavenn.src.utils import mat_data_to_vec_data, \
-                             vec_data_to_mat_data, \
-                             x_to_stats, \
-                             p_lc_to_x, _x_to_mat
+                                validate_alphabet, \
+                                validate_batch_size, \
+                                _is_int_encoded, \
+                                _is_batch_iterator, \
+                                _x_int_to_seqs, \
+                                _get_seqs_shape_and_return_1d_array
+from mavenn.src.utils import vec_data_to_mat_data, \
+                             x_to_int, \
+                             p_lc_to_x_batches, \
+                             _x_to_mat, _x_int_to_csc, \
+                             _x_int_to_dataset, _dedup_ge_data, \
+                             _mpa_data_to_counts, _multinomial_rows, \
+                             _unique_seqs, _subsample_counts, \
+                             SequenceStatsAccumulator, \
+                             _y_norm_to_ge_labels
+from mavenn.src.inference import NumpyInferenceEngine, \
+                                 NUMPY_GPMAP_TYPES, \
+                                 EXPORT_FORMAT_VERSION
+from mavenn.src.dataset import ShardedDataset, \
+                               ShardedDatasetWriter, \
+                               load_sharded_dataset, \
+                               _sharded_dataset_to_tf
 
 
 class Model:
@@ -172,6 +187,14 @@ class Model:
         self.y_stats = {}
         self.history = {}
 
+        # Sharded dataset used for training, if set by set_data_from_disk()
+        self.sharded_dataset = None
+
+        # Row weights and within-row y variances, if set_data() dedups data
+        self.sample_weights = None
+        self.y_var = None
+        self.y_norm_var = None
+
         # Dictionary to pass information to layers
         self.info_for_layers_dict = {'H_y': np.nan,
                                      'H_y_norm': np.nan,
@@ -233,6 +256,153 @@ class Model:
             self.layer_measurement_process = \
                 self.model.layer_measurement_process
 
+        # Compiled inference functions, built on first use and cached
+        # for as long as the network is unchanged
+        self._inference_functions = {}
+        self._inference_nn = None
+
+        # NumPy inference engines, cached for as long as G-P map weights
+        # are unchanged. _weights_version is incremented whenever weights
+        # are changed other than via layer_gpmap.set_weights().
+        self._numpy_engines = {}
+        self._weights_version = 0
+
+    def _get_numpy_params(self, include_gpmap=True):
+        """
+        Return model metadata and current parameter values as a dict of
+        NumPy arrays, for use by NumpyInferenceEngine. G-P map parameters
+        are included only if ``include_gpmap=True`` and the G-P map can be
+        evaluated in NumPy.
+        """
+        params = {'regression_type': self.regression_type,
+                  'gpmap_type': self.gpmap_type,
+                  'L': self.L,
+                  'C': self.C,
+                  'alphabet': [str(c) for c in self.alphabet],
+                  'unfixed_phi_mean': self.unfixed_phi_mean,
+                  'unfixed_phi_std': self.unfixed_phi_std,
+                  'y_mean': self.y_mean,
+                  'y_std': self.y_std}
+
+        # Get G-P map parameters, removing leading singleton dimensions
+        if include_gpmap and self.gpmap_type in NUMPY_GPMAP_TYPES:
+            names = {'additive': ['theta_0', 'theta_lc'],
+                     'neighbor': ['theta_0', 'theta_lc', 'theta_lcc'],
+                     'pairwise': ['theta_0', 'theta_lc', 'theta_lclc']}
+            for name in names[self.gpmap_type]:
+                value = getattr(self.layer_gpmap, name).numpy()
+                params[name] = value if name == 'theta_0' else value[0]
+
+        # Get GE nonlinearity and noise model parameters
+        if self.regression_type == 'GE':
+            params['ge_nonlinearity_type'] = self.ge_nonlinearity_type
+            params['ge_noise_model_type'] = self.ge_noise_model_type
+            names = ['a', 'b'] if self.ge_nonlinearity_type == 'linear' \
+                else ['a_0', 'b_k', 'c_k', 'd_k']
+            for name in names:
+                params[name] = getattr(self.layer_nonlinearity, name).numpy()
+            if self.ge_noise_model_type == 'SkewedT':
+                for name in ['w_a', 'w_b', 'w_s']:
+                    params[name] = \
+                        getattr(self.layer_noise_model, name).numpy()
+            else:
+                params['noise_a'] = self.layer_noise_model.a.numpy()
+
+        # Get MPA measurement process parameters
+        elif self.regression_type == 'MPA':
+            for name in ['a_y', 'b_yk', 'c_yk', 'd_yk']:
+                params[name] = \
+                    getattr(self.layer_measurement_process, name).numpy()
+
+        return params
+
+    def _get_numpy_engine(self, include_gpmap=True):
+        """
+        Return a NumpyInferenceEngine for the model's current parameters.
+        Engines are cached, and G-P map parameters, which can be large, are
+        copied from the network only if the network has been replaced or
+        its weights changed since the engine was created, i.e., by fit(),
+        by mavenn.load(), or by layer_gpmap.set_weights() (which is called
+        by layer_gpmap.set_params()). Code that assigns G-P map variables
+        directly must increment ``_weights_version``. Measurement process
+        parameters and normalization constants are small, and are read anew
+        on each call.
+        """
+        # Discard cached engine if weights might have changed. The number
+        # of optimizer iterations changes with each training step.
+        nn = self.model.model
+        optimizer = getattr(nn, 'optimizer', None)
+        iterations = None if optimizer is None \
+            else int(optimizer.iterations.numpy())
+        version = (id(nn),
+                   self._weights_version,
+                   self.layer_gpmap.weights_version,
+                   iterations)
+        key = bool(include_gpmap)
+        engine, engine_version = self._numpy_engines.get(key, (None, None))
+        if engine is None or engine_version != version:
+            engine = NumpyInferenceEngine(
+                self._get_numpy_params(include_gpmap=include_gpmap))
+            self._numpy_engines[key] = (engine, version)
+
+        # Otherwise, update small parameters
+        else:
+            engine.update_params(self._get_numpy_params(include_gpmap=False))
+
+        return engine
+
+    def _get_inference_function(self, name, dtype=np.float32):
+        """
+        Return a cached, shape-polymorphic tf.function for inference.
+
+        ``name`` is ``'unfixed_phi'`` (integer codes of dtype ``dtype`` to
+        unfixed phi) or ``'p_all_y'`` (unfixed phi to p(y|phi) for all y;
+        MPA only). Functions read the current weights when called, so they
+        remain valid during training, and are rebuilt only if the
+        underlying network is replaced.
+        """
+        # Discard cached functions if the network has been replaced
+        nn = self.model.model
+        if self._inference_nn is not nn:
+            self._inference_functions = {}
+            self._inference_nn = nn
+
+        # Check name
+        check(name in ['unfixed_phi', 'p_all_y'],
+              f'name={repr(name)}; must be "unfixed_phi" or "p_all_y".')
+
+        # Return cached function if there is one
+        key = (name, np.dtype(dtype).name)
+        if key in self._inference_functions:
+            return self._inference_functions[key]
+
+        # Otherwise, create function
+        if name == 'unfixed_phi':
+            gpmap_nn = tf.keras.Model(inputs=nn.inputs[0],
+                                      outputs=self.layer_gpmap.output)
+            spec = tf.TensorSpec([None, self.L], tf.as_dtype(dtype))
+
+            @tf.function(input_signature=[spec])
+            def func(x_int):
+                x_int = tf.cast(x_int, nn.inputs[0].dtype)
+                return tf.reshape(gpmap_nn(x_int, training=False), [-1])
+
+        elif name == 'p_all_y':
+            check(self.regression_type == 'MPA',
+                  'regression type must be "MPA" for this function')
+            spec = tf.TensorSpec([None], tf.float32)
+
+            @tf.function(input_signature=[spec])
+            def func(phi):
+                return self.layer_measurement_process.p_of_all_y_given_phi(
+                    phi)
+
+        else:
+            assert False, 'This should not happen.'
+
+        self._inference_functions[key] = func
+        return func
+
 
     @handle_errors
     def set_data(self,
@@ -243,17 +413,24 @@ class Model:
                  validation_flags=None,
                  shuffle=True,
                  knn_fuzz=0.01,
+                 dedup=False,
+                 n_jobs=1,
                  verbose=True):
         """
         Set training data.
 
-        Prepares data for use during training, e.g. by shuffling and one-hot
-        encoding training data sequences. Must be called before ``Model.fit()``.
+        Prepares data for use during training, e.g. by shuffling and
+        integer-encoding training data sequences. Must be called before
+        ``Model.fit()``.
 
         Parameters
         ----------
         x: (np.ndarray)
-            1D array of ``N`` sequences, each of length ``L``.
+            1D array of ``N`` sequences, each of length ``L``, provided as
+            strings or fixed-width bytes. Alternatively, an ``(N,L)`` array
+            of integer-encoded sequences. Sequences provided as bytes or
+            integers are stored as fixed-width bytes, which use one byte
+            per character.
 
         y: (np.ndarray)
             Array of measurements.
@@ -296,6 +473,24 @@ class Model:
             multiple observations of the same sequence. Only used for GE
             regression.
 
+        dedup: (bool)
+            Whether to collapse repeated observations of the same sequence
+            into single rows, each weighted by its number of observations
+            during training. For Gaussian noise models, the observations of
+            each sequence are summarized by the mean and variance of their
+            ``y`` values, which leaves the likelihood unchanged. For other
+            noise models, only observations having identical sequences and
+            identical ``y`` values are collapsed. Observations with
+            different validation flags are never collapsed, and if
+            ``validation_flags`` is not set, flags are assigned to rows
+            rather than to observations. Only supported for GE regression.
+
+        n_jobs: (int)
+            Number of worker processes to use when validating and encoding
+            sequences. If ``-1``, all available CPUs are used. Scripts
+            that use ``n_jobs > 1`` must run under
+            ``if __name__ == '__main__':``.
+
         verbose: (bool)
             Whether to provide printed feedback.
 
@@ -306,9 +501,15 @@ class Model:
         # Start timer
         set_data_start = time.time()
 
-        # Validate x and set x
-        x = validate_1d_array(x)
-        x = validate_seqs(x, alphabet=self.alphabet)
+        # Validate x and set x. Sequences are integer-encoded during
+        # validation; these codes are what is passed to the network, which
+        # one-hot encodes sequences batch-by-batch.
+        if not _is_int_encoded(x):
+            x = validate_1d_array(x)
+        x, x_int = validate_seqs(x,
+                                 alphabet=self.alphabet,
+                                 return_codes=True,
+                                 n_jobs=n_jobs)
         check(len(x) > 0, f'len(x)=={len(x)}; must be > 0')
 
         # Validate y, note that this doesn't
@@ -321,12 +522,39 @@ class Model:
         elif self.regression_type == 'MPA':
             if y.ndim == 1:
                 y, x = vec_data_to_mat_data(y_n=y, ct_n=ct, x_n=x)
+                x_int = x_to_int(x,
+                                 self.alphabet,
+                                 check_seqs=False,
+                                 check_alphabet=False)
             else:
                 if isinstance(y, pd.DataFrame):
                     y = y.values
                 check(y.ndim == 2,
                       f'y.ndim={y.ndim}; must be 1 or 2.')
 
+        # Collapse repeated observations if requested. Each row of training
+        # data is then weighted by the number of observations it summarizes.
+        check(isinstance(dedup, bool),
+              f'type(dedup)={type(dedup)}; must be bool.')
+        self.sample_weights = None
+        self.y_var = None
+        if dedup:
+            check(self.regression_type == 'GE',
+                  'dedup=True is only supported for GE regression.')
+            if validation_flags is not None:
+                check(len(validation_flags) == len(x),
+                      f'len(validation_flags)={len(validation_flags)}; '
+                      f'must equal len(x)={len(x)}.')
+            N_obs = len(x)
+            ix, self.sample_weights, y, self.y_var, validation_flags = \
+                _dedup_ge_data(
+                    x_int=x_int,
+                    y=y,
+                    validation_flags=validation_flags,
+                    match_y=not self.layer_noise_model.supports_sufficient_stats)
+            x = x[ix]
+            x_int = x_int[ix]
+
         # Set N
         self.N = len(x)
 
@@ -335,18 +563,24 @@ class Model:
             self.validation_flags = (np.random.rand(self.N) < validation_frac)
         else:
             self.validation_flags = validation_flags
-        self.validation_frac = self.validation_flags.sum()/self.N
-
-        # Make sure x is valid
-        x = validate_seqs(x, alphabet=self.alphabet)
+        if dedup:
+            self.validation_frac = \
+                self.sample_weights[self.validation_flags].sum()/N_obs
+        else:
+            self.validation_frac = self.validation_flags.sum()/self.N
 
         # Set training and validation x
         self.x = x.copy()
+        self.x_int = x_int
         self.y = y.copy()
 
         # Provide feedback
         if verbose:
-            print(f'N = {self.N:,} observations set as training data.')
+            if dedup:
+                print(f'N = {N_obs:,} observations set as training data, '
+                      f'collapsed into {self.N:,} rows.')
+            else:
+                print(f'N = {self.N:,} observations set as training data.')
             print(f'Using {100*self.validation_frac:.1f}% for validation.')
 
         # Shuffle data if requested
@@ -356,7 +590,11 @@ class Model:
             ix = np.arange(self.N).astype(int)
             np.random.shuffle(ix)
             self.x = self.x[ix]
+            self.x_int = self.x_int[ix]
             self.validation_flags = self.validation_flags[ix]
+            if dedup:
+                self.sample_weights = self.sample_weights[ix]
+                self.y_var = self.y_var[ix]
             if self.regression_type == 'GE':
                 self.y = self.y[ix]
             else:
@@ -379,8 +617,15 @@ class Model:
             check(len(y_unique),
                   f'Only {len(y_unique)} unique y-values provided;'
                   f'At least 2 are requied')
-            self.y_std = self.y.std()
-            self.y_mean = self.y.mean()
+            if dedup:
+                # Moments over all observations, not rows
+                w = self.sample_weights
+                self.y_mean = np.average(self.y, weights=w)
+                self.y_std = np.sqrt(np.average(
+                    (self.y - self.y_mean)**2 + self.y_var, weights=w))
+            else:
+                self.y_std = self.y.std()
+                self.y_mean = self.y.mean()
             self.y_stats['y_mean'] = self.y_mean
             self.y_stats['y_std'] = self.y_std
 
@@ -395,19 +640,30 @@ class Model:
 
         # Set normalized y and relevant parameters
         self.y_norm = (self.y - self.y_stats['y_mean'])/self.y_stats['y_std']
+        self.y_norm_var = None if self.y_var is None \
+            else self.y_var / self.y_stats['y_std']**2
 
         # Reshape self.y_norm to facilitate input creation
         if self.regression_type == 'GE':
             self.y_norm = np.array(self.y_norm).reshape(-1, 1)
 
-            # Subsample y_norm for entropy estimation if necessary
+            # If data is deduplicated, draw approximate observations for
+            # entropy estimation from rows in proportion to their weights
             N_max = int(1E4)
-            if self.N > N_max:
+            if dedup:
+                ix = np.random.choice(a=self.N,
+                                      size=min(N_obs, N_max),
+                                      p=self.sample_weights/N_obs)
+                z = self.y_norm[ix, 0] + np.sqrt(self.y_norm_var[ix]) \
+                    * np.random.randn(len(ix))
+
+            # Otherwise, subsample y_norm if necessary
+            elif self.N > N_max:
                 z = np.random.choice(a=self.y_norm.squeeze(),
                                      size=N_max,
                                      replace=False)
             else:
-                z = self.y_norm.squeeze()
+                z = self.y_norm.squeeze().copy()
 
             # Add some noise to aid in entropy estimation
             z += knn_fuzz * z.std(ddof=1) * np.random.randn(z.size)
@@ -436,15 +692,212 @@ class Model:
             self.info_for_layers_dict['H_y_norm'] = H_y_norm
             self.info_for_layers_dict['dH_y'] = dH_y
 
-        # Compute sequence statistics (only on training set)
-        self.x_stats = x_to_stats(self.x, self.alphabet)
-
-        # Extract one-hot encoding of sequences
-        # This is what is passed to the network.
-        self.x_ohe = self.x_stats.pop('x_ohe')
+        # Compute sequence statistics from integer codes
+        x_stats_accumulator = SequenceStatsAccumulator(alphabet=self.alphabet,
+                                                       L=self.L)
+        x_stats_accumulator.update(self.x_int,
+                                   weights=self.sample_weights,
+                                   check_seqs=False)
+        self.x_stats = x_stats_accumulator.get_stats()
 
         # Extract consensus sequence
         self.x_consensus = self.x_stats['consensus_seq']
+
+        # Data is held in memory, not on disk
+        self.sharded_dataset = None
+
+        if verbose:
+            print(f'Time to set data: {time.time() - set_data_start:.3} sec.')
+
+    @handle_errors
+    def set_data_from_disk(self,
+                           dataset,
+                           validation_frac=.2,
+                           knn_fuzz=0.01,
+                           verbose=True):
+        """
+        Set training data from a sharded dataset stored on disk.
+
+        An alternative to ``Model.set_data()`` for datasets too large to hold
+        in memory. Sequence statistics, ``y`` statistics, the entropy of
+        ``y``, and the normal equations used for linear initialization are
+        computed in a single pass over the dataset's shards. During
+        ``Model.fit()``, shards are then streamed to the network in shuffled
+        batches. Memory use is dominated by the normal equations, which
+        require ``(L*C)**2`` floats.
+
+        Parameters
+        ----------
+        dataset: (str, ShardedDataset)
+            Directory of a sharded dataset written by
+            ``mavenn.save_sharded_dataset()``, or the dataset itself as
+            returned by ``mavenn.load_sharded_dataset()``.
+
+        validation_frac (float):
+            Fraction of observations to use for the validation set. Ignored
+            if the dataset was saved with validation flags. Must be in the
+            range [0,1].
+
+        knn_fuzz: (float>0)
+            Amount of noise to add to ``y`` values before passing them to the
+            KNN estimator; see ``Model.set_data()``. Only used for GE
+            regression.
+
+        verbose: (bool)
+            Whether to provide printed feedback.
+
+        Returns
+        -------
+        None
+        """
+        # Start timer
+        set_data_start = time.time()
+
+        # Load and check dataset
+        if not isinstance(dataset, ShardedDataset):
+            dataset = load_sharded_dataset(dataset)
+        check(dataset.L == self.L,
+              f'dataset.L={dataset.L}; must match model L={self.L}.')
+        check(np.array_equal(dataset.alphabet, self.alphabet),
+              f'dataset.alphabet={dataset.alphabet} does not match '
+              f'model alphabet={self.alphabet}.')
+        check(dataset.regression_type == self.regression_type,
+              f'dataset.regression_type={repr(dataset.regression_type)} '
+              f'does not match model regression_type='
+              f'{repr(self.regression_type)}.')
+        if self.regression_type == 'MPA':
+            check(dataset.Y == self.Y,
+                  f'dataset.Y={dataset.Y}; must match model Y={self.Y}.')
+        check(dataset.N > 0, f'dataset.N=={dataset.N}; must be > 0')
+
+        # Set N
+        self.N = dataset.N
+
+        # Accumulators for sequence stats, y stats, and normal equations
+        C = self.C
+        x_stats_accumulator = SequenceStatsAccumulator(alphabet=self.alphabet,
+                                                       L=self.L)
+        y_sum = 0.
+        y_sum_sq = 0.
+        c_y = np.zeros(self.Y) if self.regression_type == 'MPA' else None
+        xtx = csr_matrix((self.L*C, self.L*C))
+        xty = np.zeros(self.L*C)
+        xt1 = np.zeros(self.L*C)
+
+        # Random subsample of observations, used to estimate H_y and to fix
+        # the sign of phi after training. Keeping the N_max observations with
+        # the smallest random keys gives a uniform sample in a single pass.
+        N_max = int(1E4)
+        sample_keys = np.zeros(0)
+        sample_x_int = np.zeros([0, self.L], dtype=np.uint8)
+        sample_y = np.zeros(0) if self.regression_type == 'GE' \
+            else np.zeros([0, self.Y])
+
+        # Make a single pass through all shards
+        validation_flags = []
+        for x_int, y, flags in dataset.iter_shards():
+            x_int = np.asarray(x_int)
+            y = np.asarray(y, dtype=float)
+            n = len(x_int)
+            check(x_int.max() < C,
+                  f'Dataset contains integer codes >= C={C}.')
+
+            # Set validation flags
+            if flags is None:
+                flags = (np.random.rand(n) < validation_frac)
+            validation_flags.append(flags)
+
+            # Accumulate sequence and y stats
+            x_stats_accumulator.update(x_int, check_seqs=False)
+            if self.regression_type == 'GE':
+                y_sum += y.sum()
+                y_sum_sq += (y**2).sum()
+                y_targets = y
+            else:
+                num_zero_ct_rows = (y.sum(axis=1) == 0).sum()
+                check(num_zero_ct_rows == 0,
+                      f'Found {num_zero_ct_rows} sequences that have no '
+                      f'counts. There cannot be any such sequences.')
+                c_y += y.sum(axis=0)
+                y_targets = (y * np.arange(self.Y)[np.newaxis, :]).sum(axis=1)\
+                    / y.sum(axis=1)
+
+            # Accumulate normal equations over training observations
+            x_sparse = _x_int_to_csc(x_int[~flags], C).astype(float)
+            xtx = xtx + (x_sparse.T @ x_sparse).tocsr()
+            xty += x_sparse.T @ y_targets[~flags]
+            xt1 += np.asarray(x_sparse.sum(axis=0)).ravel()
+
+            # Update subsample
+            keys = np.concatenate([sample_keys, np.random.rand(n)])
+            keep = np.argsort(keys)[:N_max]
+            sample_keys = keys[keep]
+            sample_x_int = np.concatenate([sample_x_int, x_int])[keep]
+            sample_y = np.concatenate([sample_y, y])[keep]
+
+        # Set validation flags
+        self.validation_flags = np.concatenate(validation_flags)
+        self.validation_frac = self.validation_flags.sum()/self.N
+
+        # Provide feedback
+        if verbose:
+            print(f'N = {self.N:,} observations set as training data.')
+            print(f'Using {100*self.validation_frac:.1f}% for validation.')
+
+        # Set y stats
+        self.y_stats = {}
+        if self.regression_type == 'GE':
+            self.y_mean = y_sum / self.N
+            self.y_std = np.sqrt(max(y_sum_sq / self.N - self.y_mean**2, 0))
+            check(self.y_std > 0,
+                  'Only 1 unique y-value provided; At least 2 are requied')
+        else:
+            self.y_mean = 0
+            self.y_std = 1
+        self.y_stats['y_mean'] = self.y_mean
+        self.y_stats['y_std'] = self.y_std
+
+        # Compute entropy of y
+        if self.regression_type == 'GE':
+            z = (sample_y - self.y_mean) / self.y_std
+            z += knn_fuzz * z.std(ddof=1) * np.random.randn(z.size)
+            H_y_norm, dH_y = entropy_continuous(z, knn=7, resolution=0)
+            H_y = H_y_norm + np.log2(self.y_std + TINY)
+            sample_y_targets = (sample_y - self.y_mean) / self.y_std
+        else:
+            p_y = c_y / c_y.sum()
+            ix = p_y > 0
+            H_y_norm = -np.sum(p_y[ix] * np.log2(p_y[ix] + TINY))
+            H_y = H_y_norm + np.log2(self.y_std + TINY)
+            dH_y = 0
+            sample_y_targets = \
+                (sample_y * np.arange(self.Y)[np.newaxis, :]).sum(axis=1) \
+                / sample_y.sum(axis=1)
+        self.info_for_layers_dict['H_y'] = H_y
+        self.info_for_layers_dict['H_y_norm'] = H_y_norm
+        self.info_for_layers_dict['dH_y'] = dH_y
+
+        # Compute sequence statistics
+        self.x_stats = x_stats_accumulator.get_stats()
+        self.x_consensus = self.x_stats['consensus_seq']
+
+        # Store normal equations, with y targets normalized as in fit().
+        # These are only solved if fit() uses linear initialization.
+        self._xtx = xtx
+        self._xty = (xty - self.y_mean * xt1) / self.y_std
+
+        # Store dataset and subsample; in-memory data is cleared
+        self.sharded_dataset = dataset
+        self._sample_x_int = sample_x_int
+        self._sample_y_targets = sample_y_targets
+        self.x = None
+        self.y = None
+        self.x_int = None
+        self.y_norm = None
+        self.sample_weights = None
+        self.y_var = None
+        self.y_norm_var = None
+
         if verbose:
             print(f'Time to set data: {time.time() - set_data_start:.3} sec.')
 
@@ -468,7 +921,7 @@ class Model:
 
         Uses training algorithms from TensorFlow to learn model parameters.
         Before this is run, the training data must be set using
-        ``Model.set_data()``.
+        ``Model.set_data()`` or ``Model.set_data_from_disk()``.
 
         Parameters
         ----------
@@ -572,7 +1025,7 @@ class Model:
         check(isinstance(batch_size, (int, None)),
               f'type(batch_size)={type(batch_size)}; must be int or None.')
         if batch_size is None:
-            batch_size = len(self.x)
+            batch_size = self.N
         else:
             check(batch_size > 0,
                   f'batch_size={batch_size}; must be > 0.')
@@ -634,8 +1087,12 @@ class Model:
         self.y_mean = self.y_stats['y_mean']
         self.y_std = self.y_stats['y_std']
 
-        # Set y targets for linear regression and sign assignment
-        if self.regression_type == 'GE':
+        # Set y targets for linear regression and sign assignment. If data
+        # is on disk, these are only available for a random subsample.
+        if self.sharded_dataset is not None:
+            y_targets = self._sample_y_targets
+
+        elif self.regression_type == 'GE':
             y_targets = self.y_norm
 
         # If MPA regression, use mean bin number
@@ -651,16 +1108,37 @@ class Model:
         # Do linear regression if requested
         if self.linear_initialization:
 
-            # Extract training data
-            ix_val = self.validation_flags
-            x_sparse_train = csc_matrix(self.x_ohe[~ix_val])
-            y_targets_train = y_targets[~ix_val]
-
-            # Do linear regression
+            # If data is on disk, solve the sparse normal equations
+            # accumulated by set_data_from_disk(). Starting from zero, lsmr
+            # finds the minimum-norm solution, as for in-memory data. The
+            # normal equations square the condition number of the
+            # regression, so lsmr's default tolerances are squared too.
             t = time.time()
-            self.theta_lc_init = lsmr(x_sparse_train,
-                                      y_targets_train,
-                                      show=verbose)[0]
+            if self.sharded_dataset is not None:
+                self.theta_lc_init = lsmr(self._xtx,
+                                          self._xty,
+                                          atol=1E-12,
+                                          btol=1E-12,
+                                          maxiter=10*self.L*self.C,
+                                          show=verbose)[0]
+
+            # Otherwise, do linear regression on training data
+            else:
+                ix_val = self.validation_flags
+                x_sparse_train = _x_int_to_csc(self.x_int[~ix_val], self.C)
+                y_targets_train = y_targets[~ix_val]
+
+                # If rows summarize multiple observations, do weighted
+                # least squares by scaling rows by sqrt(weight)
+                if self.sample_weights is not None:
+                    w_sqrt = np.sqrt(self.sample_weights[~ix_val])
+                    x_sparse_train = \
+                        x_sparse_train.multiply(w_sqrt[:, np.newaxis]).tocsc()
+                    y_targets_train = y_targets_train.ravel() * w_sqrt
+
+                self.theta_lc_init = lsmr(x_sparse_train,
+                                          y_targets_train,
+                                          show=verbose)[0]
 
             linear_regression_time = time.time() - t
             if verbose:
@@ -683,43 +1161,81 @@ class Model:
             else:
                 assert False, "This should not happen."
 
-        # Concatenate seqs and ys
-        train_sequences = np.hstack([self.x_ohe,
-                                     self.y_norm])
+        # Get training and validation sets. These are streamed to the network
+        # in batches, each assembled from integer-encoded sequences and
+        # labels passed as separate inputs.
+        if self.sharded_dataset is not None:
+            train_dataset, val_dataset = [
+                _sharded_dataset_to_tf(dataset=self.sharded_dataset,
+                                       validation_flags=self.validation_flags,
+                                       use_validation=use_validation,
+                                       batch_size=batch_size,
+                                       shuffle=not use_validation,
+                                       y_mean=self.y_mean,
+                                       y_std=self.y_std)
+                for use_validation in [False, True]]
+        else:
+            if self.regression_type == 'GE':
+                labels = _y_norm_to_ge_labels(y_norm=self.y_norm,
+                                              weights=self.sample_weights,
+                                              y_norm_vars=self.y_norm_var)
+            else:
+                labels = self.y_norm
 
-        # Get training and validation sets
-        ix_val = self.validation_flags
-        x_train = train_sequences[~ix_val,:]
-        x_val = train_sequences[ix_val,:]
-        if self.regression_type == 'GE':
-            y_train = self.y_norm[~ix_val]
-            y_val = self.y_norm[ix_val]
-        elif self.regression_type == 'MPA':
-            y_train = self.y_norm[~ix_val,:]
-            y_val = self.y_norm[ix_val,:]
+            # Wrap data in tensors once, shared by both datasets; x_int
+            # keeps its compact integer dtype
+            x_tensor = tf.convert_to_tensor(self.x_int)
+            y_tensor = tf.convert_to_tensor(labels, dtype=tf.float32)
+            del labels
 
-        # Train neural network using TensorFlow
-        history = self.model.model.fit(x_train,
-                                       y_train,
-                                       validation_data=(x_val, y_val),
+            ix_val = self.validation_flags
+            ix_all = np.arange(len(ix_val))
+            train_dataset = _x_int_to_dataset(x_tensor=x_tensor,
+                                              y_tensor=y_tensor,
+                                              ix=ix_all[~ix_val],
+                                              batch_size=batch_size,
+                                              shuffle=True)
+            val_dataset = _x_int_to_dataset(x_tensor=x_tensor,
+                                            y_tensor=y_tensor,
+                                            ix=ix_all[ix_val],
+                                            batch_size=batch_size,
+                                            shuffle=False)
+
+        # Train neural network using TensorFlow. Weights change during
+        # training, so cached inference engines become invalid.
+        self._weights_version += 1
+        history = self.model.model.fit(train_dataset,
+                                       validation_data=val_dataset,
                                        epochs=epochs,
                                        verbose=verbose,
                                        callbacks=callbacks,
-                                       batch_size=batch_size,
                                        **fit_kwargs)
 
-        # Get function representing the raw gp_map
-        self._unfixed_gpmap = K.function(
-            [self.model.model.layers[1].input],
-            [self.model.model.layers[2].output])
-
-        # compute unfixed phi using the function unfixed_gpmap with
-        # training sequences.
-        unfixed_phi = self._unfixed_gpmap(self.x_ohe)[0].ravel()
-
-        # Set stats
-        self.unfixed_phi_mean = np.mean(unfixed_phi)
-        self.unfixed_phi_std = np.std(unfixed_phi)
+        # compute unfixed phi using the compiled G-P map function with
+        # training sequences. If data is on disk, stats are accumulated
+        # shard by shard, and phi is kept only for the subsample.
+        def unfixed_gpmap(x_int):
+            x_int = np.asarray(x_int)
+            func = self._get_inference_function('unfixed_phi', x_int.dtype)
+            return func(x_int).numpy()
+
+        if self.sharded_dataset is not None:
+            phi_sum = 0.
+            phi_sum_sq = 0.
+            for x_int, _, _ in self.sharded_dataset.iter_shards():
+                for start in range(0, len(x_int), batch_size):
+                    phi = unfixed_gpmap(x_int[start:start+batch_size])
+                    phi = phi.astype(float)
+                    phi_sum += phi.sum()
+                    phi_sum_sq += (phi**2).sum()
+            self.unfixed_phi_mean = phi_sum / self.N
+            self.unfixed_phi_std = np.sqrt(
+                max(phi_sum_sq / self.N - self.unfixed_phi_mean**2, 0))
+            unfixed_phi = unfixed_gpmap(self._sample_x_int)
+        else:
+            unfixed_phi = unfixed_gpmap(self.x_int)
+            self.unfixed_phi_mean = np.mean(unfixed_phi)
+            self.unfixed_phi_std = np.std(unfixed_phi)
 
         # Flip sign if correlation of phi with y_targets is negative
         r, p_val = spearmanr(unfixed_phi, y_targets)
@@ -762,9 +1278,9 @@ class Model:
         check(self.regression_type == 'GE',
               'regression type must be "GE" for this function')
 
-        # Compute normalized phi using nonlinearity layer
-        yhat_norm = self.layer_nonlinearity.phi_to_yhat(unfixed_phi,
-                                                        use_arrays=True)
+        # Compute normalized phi using nonlinearity layer parameters
+        engine = self._get_numpy_engine(include_gpmap=False)
+        yhat_norm = engine.yhat_norm_from_unfixed_phi(unfixed_phi)
 
         # Restore shift and scale
         yhat = self.y_mean + self.y_std * yhat_norm
@@ -1013,41 +1529,82 @@ class Model:
         return self.model.model
 
     @handle_errors
-    def x_to_phi(self, x):
+    def x_to_phi(self, x, n_jobs=1, batch_size=None):
         """
         Compute ``phi`` given ``x``.
 
         Parameters
         ----------
-        x: (np.ndarray)
-            Sequences, provided as an ``np.ndarray`` of strings, each of
-            length ``L``.
+        x: (np.ndarray, iterator)
+            Sequences, provided as an ``np.ndarray`` of strings or fixed-width
+            bytes, each of length ``L``. An ``(N,L)`` array of integer-encoded
+            sequences, as returned by ``x_to_int()``, is also accepted. Can
+            also be an iterator (e.g., a generator) over batches of
+            sequences in any of these formats, in which case ``phi`` values
+            are computed lazily, one batch at a time.
+
+        n_jobs: (int)
+            Number of worker processes to use when validating and encoding
+            sequences. If ``-1``, all available CPUs are used. Scripts
+            that use ``n_jobs > 1`` must run under
+            ``if __name__ == '__main__':``.
+
+        batch_size: (int, None)
+            Maximum number of sequences to encode and evaluate at a time.
+            If ``None``, all sequences (or all sequences in each batch
+            yielded by ``x``) are evaluated at once.
 
         Returns
         -------
-        phi: (array-like of float)
+        phi: (array-like of float, generator)
             Latent phenotype values, provided as floats within an ``np.ndarray``
-            the same shape as ``x``.
+            the same shape as ``x``. If ``x`` is an iterator, a generator
+            yielding an ``np.ndarray`` of ``phi`` values for each batch is
+            returned instead.
         """
-        # Shape x for processing
-        x, x_shape = _get_shape_and_return_1d_array(x)
-
-        # Check seqs
-        x = validate_seqs(x, alphabet=self.alphabet)
-        check(len(x[0]) == self.L,
-              f'len(x[0])={len(x[0])}; should be L={self.L}')
+        # Validate batch_size
+        batch_size = validate_batch_size(batch_size)
 
-        # Encode sequences as features
-        stats = x_to_stats(x=x, alphabet=self.alphabet)
-        x_ohe = stats.pop('x_ohe')
+        # If x is an iterator over batches, compute phi lazily
+        if _is_batch_iterator(x):
+            return (self.x_to_phi(x_batch,
+                                  n_jobs=n_jobs,
+                                  batch_size=batch_size)
+                    for x_batch in x)
 
-        # Keras function that computes phi from x
-        gpmap_function = K.function([self.model.model.layers[1].input],
-                                    [self.model.model.layers[2].output])
+        # Shape x for processing
+        x, x_shape = _get_seqs_shape_and_return_1d_array(x)
+        N = len(x)
+        if batch_size is None:
+            batch_size = max(N, 1)
+
+        # Use NumPy to evaluate G-P map if possible, TensorFlow otherwise
+        engine = self._get_numpy_engine()
+
+        # Compute phi one batch at a time, filling preallocated array
+        unfixed_phi = np.empty(N, dtype=float)
+        for start in range(0, N, batch_size):
+            x_batch = x[start:start + batch_size]
+
+            # Check seqs, encoding them as integer codes in the same pass
+            x_batch, x_int = validate_seqs(x_batch,
+                                           alphabet=self.alphabet,
+                                           return_codes=True,
+                                           n_jobs=n_jobs)
+            check(len(x_batch[0]) == self.L,
+                  f'len(x[0])={len(x_batch[0])}; should be L={self.L}')
+
+            # Function that computes phi from x
+            if engine.has_gpmap:
+                gpmap_function = engine.unfixed_phi_from_codes
+            else:
+                tf_function = self._get_inference_function('unfixed_phi',
+                                                           x_int.dtype)
+                gpmap_function = lambda x_int: tf_function(x_int).numpy()
 
-        # Compute latent phenotype values
-        # Note that these are NOT diffeomorphic-mode fixed
-        unfixed_phi = gpmap_function([x_ohe])
+            # Compute latent phenotype values
+            # Note that these are NOT diffeomorphic-mode fixed
+            unfixed_phi[start:start + len(x_int)] = gpmap_function(x_int)
 
         # Fix diffeomorphic models
         phi = (unfixed_phi - self.unfixed_phi_mean) / self.unfixed_phi_std
@@ -1060,29 +1617,44 @@ class Model:
 
     @handle_errors
     def x_to_yhat(self,
-                  x):
+                  x,
+                  batch_size=None):
         """
         Compute ``yhat`` given ``x``.
 
         Parameters
         ----------
-        x: (np.ndarray)
-            Sequences, provided as an ``np.ndarray`` of strings, each of
-            length ``L``.
+        x: (np.ndarray, iterator)
+            Sequences, provided as an ``np.ndarray`` of strings or fixed-width
+            bytes, each of length ``L``. An ``(N,L)`` array of integer-encoded
+            sequences, as returned by ``x_to_int()``, is also accepted. Can
+            also be an iterator over batches of sequences, as for
+            ``x_to_phi()``.
+
+        batch_size: (int, None)
+            Maximum number of sequences to encode and evaluate at a time.
+            If ``None``, all sequences are evaluated at once.
 
         Returns
         -------
-        yhat: (np.ndarray)
+        yhat: (np.ndarray, generator)
             Observation values, provided as floats within an ``np.ndarray``
-            the same shape as ``x``.
+            the same shape as ``x``. If ``x`` is an iterator, a generator
+            yielding an ``np.ndarray`` of ``yhat`` values for each batch is
+            returned instead.
         """
-        # Shape x for processing
-        x, x_shape = _get_shape_and_return_1d_array(x)
-
         check(self.regression_type == 'GE',
               'Regression type must be GE for this function.')
 
-        yhat = self.phi_to_yhat(self.x_to_phi(x))
+        # If x is an iterator over batches, compute yhat lazily
+        if _is_batch_iterator(x):
+            return (self.phi_to_yhat(phi)
+                    for phi in self.x_to_phi(x, batch_size=batch_size))
+
+        # Shape x for processing
+        x, x_shape = _get_seqs_shape_and_return_1d_array(x)
+
+        yhat = self.phi_to_yhat(self.x_to_phi(x, batch_size=batch_size))
 
         # Shape yhat for output
         yhat = _shape_for_output(yhat, x_shape)
@@ -1096,7 +1668,10 @@ class Model:
                          x=None,
                          ct=None,
                          validation_frac=.2,
-                         test_frac=.2):
+                         test_frac=.2,
+                         x_format='str',
+                         dirname=None,
+                         chunk_size=100000):
         """
         Generate a simulated dataset.
 
@@ -1131,13 +1706,34 @@ class Model:
             The fraction of unique sequences to reserve for the test set.
             Must be in the range [0,1].
 
+        x_format: (str)
+            Format of sequences in the ``'x'`` column of the returned
+            dataframe; either ``'str'`` or ``'bytes'``. Sequences are
+            handled as integer codes internally regardless of this setting.
+
+        dirname: (str, None)
+            If set, observations are simulated ``chunk_size`` sequences at a
+            time and written to disk as they go, rather than being returned
+            as a dataframe. Training and validation observations are saved
+            as a sharded dataset in ``dirname``, with validation flags, and
+            test observations are saved as a sharded dataset in
+            ``dirname/test``. Both can be read using
+            ``mavenn.load_sharded_dataset()``.
+
+        chunk_size: (int > 0)
+            Number of sequences to simulate at a time when ``dirname`` is set.
+            For MPA models, duplicate sequences are collapsed within, but not
+            across, chunks.
+
         Returns
         -------
-        data_df: (pd.DataFrame)
+        data_df: (pd.DataFrame, ShardedDataset)
             Simulated dataset in the form of a dataframe. Columns include
             ``'set'`` , ``'phi'`` , and ``'x'`` . For GE
             models, additional columns ``'yhat'`` and ``'y'`` are added.
             For MPA models, multiple columns of the form ``'ct_#'`` are added.
+            If ``dirname`` is set, the training and validation dataset
+            written to disk is returned instead.
         """
 
         # Validate validation_frac
@@ -1154,6 +1750,14 @@ class Model:
         check(0 <= test_frac <= 1,
               f'test_frac={test_frac}; must be in [0,1]')
 
+        # Validate x_format
+        check(x_format in ['str', 'bytes'],
+              f'x_format={repr(x_format)}; must be "str" or "bytes".')
+
+        # Validate chunk_size
+        check(isinstance(chunk_size, int) and chunk_size > 0,
+              f'chunk_size={repr(chunk_size)}; must be a positive int.')
+
         # If x is not set, generate from p_lc
         if x is None:
             # Validate N
@@ -1161,18 +1765,26 @@ class Model:
                   f'type(N)={type(N)}; must be int if x is not set.')
             check(N > 0, f'N={N}; must be > 0')
 
-            # Generate sequences
-            x = p_lc_to_x(N=N,
-                          p_lc=self.x_stats['probability_df'].values,
-                          alphabet=self.x_stats['alphabet'])
+            # Generate sequences as integer codes, in chunks if writing
+            # to disk, each sequence having a count of 1
+            x_batches = p_lc_to_x_batches(
+                N=N,
+                p_lc=self.x_stats['probability_df'].values,
+                alphabet=self.x_stats['alphabet'],
+                x_format='int',
+                chunk_size=chunk_size if dirname is not None else N)
+            chunks = ((x_int, np.ones(len(x_int)).astype(int))
+                      for x_int in x_batches)
 
         # Otherwise, validate x provided and expand if ct is provided too
         else:
             # Shape x for processing
-            x, x_shape = _get_shape_and_return_1d_array(x)
+            x, x_shape = _get_seqs_shape_and_return_1d_array(x)
 
-            # Validate sequences
-            x = validate_seqs(x, alphabet=self.alphabet)
+            # Validate sequences, encoding them as integer codes
+            x, x_int = validate_seqs(x,
+                                     alphabet=self.alphabet,
+                                     return_codes=True)
             check(len(x[0]) == self.L,
                   f'len(x[0])={len(x[0])}; should be L={self.L}')
 
@@ -1185,82 +1797,125 @@ class Model:
             else:
                 ct = np.ones(len(x)).astype(int)
 
-            # Expand sequence list according to ct
-            x = np.concatenate([[seq]*count for (seq, count) in zip(x, ct)])
+            # Split sequences into chunks if writing to disk
+            step = chunk_size if dirname is not None else len(x_int)
+            chunks = ((x_int[i:i + step], ct[i:i + step])
+                      for i in range(0, len(x_int), step))
 
-        # Compute phi values
-        phi = self.x_to_phi(x)
+        # Simulate measurements for a chunk of sequences and counts
+        def simulate_chunk(x_int, ct):
 
-        if self.regression_type == 'MPA':
+            if self.regression_type == 'MPA':
 
-            # Compute grid of p(y|\phi) values over all y for all phi
-            all_y = np.arange(self.Y).astype(int)
-            p_all_y_given_phi = self.p_of_y_given_phi(all_y,
-                                                      phi,
-                                                      paired=False).T
-
-            # Create function to choose y
-            def choose_y(p_all_y):
-                return np.random.choice(a=all_y,
-                                        size=1,
-                                        replace=True,
-                                        p=p_all_y)
-
-            # Choose y values
-            y = np.apply_along_axis(choose_y, axis=1, arr=p_all_y_given_phi)
-
-            # Get counts in bins. LabelBinarizer is efficient,
-            # e.g. N = 10^5 takes ~ 0.01 seconds.
-            label_binarizer = sklearn.preprocessing.LabelBinarizer()
-            label_binarizer.fit(range(self.Y))
-            ct_ = label_binarizer.transform(y)
+                # Collapse to unique sequences and their total counts
+                x_int, ix = _unique_seqs(x_int)
+                ct = np.bincount(ix, weights=ct, minlength=len(x_int))
+                ct = ct.astype(int)
+                x_int = x_int[ct > 0]
+                ct = ct[ct > 0]
 
-        elif self.regression_type == 'GE':
+                # Compute phi values
+                phi = self.x_to_phi(x_int)
 
-            # Compute yhat
-            yhat = self.phi_to_yhat(phi)
+                # Compute grid of p(y|\phi) values over all y for all phi,
+                # in chunks to limit memory used by the measurement process
+                phi_unfixed = self.unfixed_phi_mean + \
+                              phi * self.unfixed_phi_std
+                M_max = int(1E4)
+                p_all_y_func = self._get_inference_function('p_all_y')
+                p_all_y_given_phi = np.concatenate([
+                    p_all_y_func(
+                        phi_unfixed[i:i + M_max].astype(np.float32)).numpy()
+                    for i in range(0, len(phi_unfixed), M_max)])
 
-            # Normalize yhat
-            yhat_norm = (yhat - self.y_mean)/self.y_std
+                # Draw bin counts for each sequence from a multinomial
+                # distribution, as a sequence of conditional binomials
+                y = _multinomial_rows(ct, p_all_y_given_phi)
+                yhat = None
 
-            # Get layer
-            layer = self.layer_noise_model
+            elif self.regression_type == 'GE':
 
-            # Sample values
-            y_norm = layer.sample_y_given_yhat(yhat_norm)
+                # Expand sequences according to ct
+                x_int = np.repeat(x_int, ct, axis=0)
 
-            # Compute y from y_norm
-            y = self.y_mean + self.y_std * y_norm
+                # Compute phi values
+                phi = self.x_to_phi(x_int)
 
-        else:
-            assert False, 'This should not happen.'
+                # Compute yhat
+                yhat = self.phi_to_yhat(phi)
 
-        # Store results in dataframe and return
-        data_df = pd.DataFrame()
-        data_df['phi'] = phi
-        if self.regression_type == 'GE':
-            data_df['y'] = y
+                # Normalize yhat
+                yhat_norm = (yhat - self.y_mean)/self.y_std
 
-        data_df['x'] = x
+                # Get layer
+                layer = self.layer_noise_model
 
-        # If doing MPA regression, collapse by sequence and add ct col
-        if self.regression_type == 'MPA':
+                # Sample values
+                y_norm = layer.sample_y_given_yhat(yhat_norm, use_arrays=True)
 
-            # merge the y counts array with the dataframe created above
-            # and name bin columns with prefix 'ct_*'
-            y_cols = ['ct_' + str(n) for n in range(self.Y)]
-            y_df = pd.DataFrame(data=ct_,
-                                columns=y_cols)
-            data_df = pd.concat([data_df, y_df], axis=1)
+                # Compute y from y_norm
+                y = self.y_mean + self.y_std * y_norm
 
-            # Group by x so that can have multiple counts per bin
-            data_df = data_df.groupby('x').sum().reset_index()
+            else:
+                assert False, 'This should not happen.'
+
+            return x_int, phi, yhat, np.asarray(y)
+
+        # If dirname is set, write chunks to disk as they are simulated
+        if dirname is not None:
+            writer_kwargs = dict(L=self.L,
+                                 alphabet=self.alphabet,
+                                 regression_type=self.regression_type,
+                                 Y=self.Y if self.regression_type == 'MPA'
+                                 else None,
+                                 shard_size=chunk_size)
+            with ShardedDatasetWriter(dirname=dirname,
+                                      **writer_kwargs) as writer, \
+                    ShardedDatasetWriter(dirname=os.path.join(dirname,
+                                                              'test'),
+                                         **writer_kwargs) as test_writer:
+                for x_int, ct in chunks:
+                    x_int, _, _, y = simulate_chunk(x_int, ct)
+
+                    # Assign observations in chunk to sets and shuffle
+                    M = len(x_int)
+                    r = np.random.rand(M)
+                    ix = np.random.permutation(M)
+                    x_int, y, r = x_int[ix], y[ix], r[ix]
+                    ix_test = (r < test_frac)
+                    ix_val = (test_frac <= r) & \
+                             (r < test_frac + validation_frac)
+
+                    # Write test and training/validation observations
+                    test_writer.append(x_int[ix_test], y[ix_test])
+                    writer.append(x_int[~ix_test], y[~ix_test],
+                                  validation_flags=ix_val[~ix_test])
+
+            return load_sharded_dataset(dirname)
+
+        # Otherwise, simulate all sequences at once
+        x_int, phi, yhat, y = simulate_chunk(*next(chunks))
+
+        # Get sequences in requested format
+        x = _x_int_to_seqs(x_int, self.alphabet)
+        if x_format == 'str':
+            x = x.astype(str)
 
-            # Reorder columns
-            data_df = data_df[y_cols + ['x']]
+        # Store results in dataframe and return
+        data_df = pd.DataFrame()
+
+        # If doing MPA regression, add bin counts for each unique sequence
+        # and name bin columns with prefix 'ct_*'
+        if self.regression_type == 'MPA':
+            for n in range(self.Y):
+                data_df['ct_' + str(n)] = y[:, n]
+            data_df['x'] = x
 
         elif self.regression_type == 'GE':
-            data_df.insert(0, column='yhat', value=yhat)
+            data_df['yhat'] = yhat
+            data_df['phi'] = phi
+            data_df['y'] = y
+            data_df['x'] = x
 
         # Assign to training and test sets
         M = len(data_df)
@@ -1378,44 +2033,37 @@ class Model:
             # Compute H_y_given_phi
             H_y_given_phi_n = -np.log2(p_y_given_phi + TINY)
 
-        elif self.regression_type == 'MPA':
-
-            # If y is 2D, convert from mat data to vec data
-            if y.ndim == 2:
-                y, ct, x = mat_data_to_vec_data(ct_my=y, x_m=x)
+            # Each datapoint is a single observation
+            ct_n = np.ones(len(H_y_given_phi_n))
 
-            # If ct is not set, set to ones
-            if ct is None:
-                ct = np.ones(y.size)
+        elif self.regression_type == 'MPA':
 
-            # Expand x and y based on ct values
-            y = np.concatenate(
-                        [[y_n]*ct_n for y_n, ct_n in zip(y, ct)])
-            x = np.concatenate(
-                        [[x_n]*ct_n for x_n, ct_n in zip(x, ct)])
+            # Get unique sequences and counts for (sequence, bin) pairs
+            x_m, m_n, y_n, ct_n = _mpa_data_to_counts(x, y, ct)
 
             # Number of datapoints
-            ct_y = np.array([(y==i).sum() for i in range(self.Y)])
+            ct_y = np.bincount(y_n, weights=ct_n, minlength=self.Y)
             p_y = ct_y / ct_y.sum()
             ix = p_y > 0
             H_y_norm = -np.sum(p_y[ix] * np.log2(p_y[ix] + TINY))
             H_y = H_y_norm + np.log2(self.y_std + TINY)
             dH_y = 0  # Need NSB to estimate this well
 
-            # Compute phi
-            phi = self.x_to_phi(x)
+            # Compute phi once for each unique sequence
+            phi = self.x_to_phi(x_m)[m_n]
 
-            p_y_given_phi = self.p_of_y_given_phi(y, phi, paired=True)
+            p_y_given_phi = self.p_of_y_given_phi(y_n, phi, paired=True)
             H_y_given_phi_n = -np.log2(p_y_given_phi + TINY)
 
         # Get total number of independent observations
-        N = len(H_y_given_phi_n)
+        N = ct_n.sum()
 
-        # Compute H_y_given_phi
-        H_y_given_phi = np.mean(H_y_given_phi_n)
+        # Compute H_y_given_phi, weighting each value by its count
+        H_y_given_phi = np.sum(ct_n * H_y_given_phi_n) / N
 
         # Compute uncertainty
-        dH_y_given_phi = np.std(H_y_given_phi_n, ddof=1)/np.sqrt(N)
+        var_H = np.sum(ct_n * (H_y_given_phi_n - H_y_given_phi)**2) / (N - 1)
+        dH_y_given_phi = np.sqrt(var_H)/np.sqrt(N)
 
         # Compute I_var and dI_fit
         I_var = H_y - H_y_given_phi
@@ -1433,6 +2081,7 @@ class Model:
                      ct=None,
                      knn=5,
                      knn_fuzz=0.01,
+                     knn_max_points=1000000,
                      uncertainty=True,
                      num_subsamples=25,
                      use_LNC=False,
@@ -1481,6 +2130,14 @@ class Model:
             hack and is not ideal, but is needed to get the KNN estimates to
             behave well on real MAVE data.
 
+        knn_max_points: (int>knn)
+            Only used for MPA models. The KNN estimators require one point
+            per observation (i.e., per count). If the total number of
+            counts exceeds ``knn_max_points``, ``I_pred`` is estimated from
+            ``knn_max_points`` observations drawn at random without
+            replacement. This bounds the memory and runtime of the estimate
+            on deep-sequencing data.
+
         uncertainty: (bool)
             Whether to estimate the uncertainty in ``I_pred``.
             Substantially increases runtime if ``True``.
@@ -1529,22 +2186,22 @@ class Model:
 
         elif self.regression_type == 'MPA':
 
-            # If y is 2D, convert from mat data to vec data
-            if y.ndim == 2:
-                y, ct, x = mat_data_to_vec_data(ct_my=y, x_m=x)
+            check(isinstance(knn_max_points, numbers.Integral) and
+                  knn_max_points > knn,
+                  f'knn_max_points={knn_max_points}; must be an int greater '
+                  f'than knn={knn}.')
 
-            # If ct is not set, set to ones
-            if ct is None:
-                ct = np.ones(y.size)
+            # Get unique sequences and counts for (sequence, bin) pairs
+            x_m, m_n, y_n, ct_n = _mpa_data_to_counts(x, y, ct)
 
-            # Expand x and y based on ct values
-            y = np.concatenate(
-                        [[y_n]*ct_n for y_n, ct_n in zip(y, ct)])
-            x = np.concatenate(
-                        [[x_n]*ct_n for x_n, ct_n in zip(x, ct)])
+            # Subsample observations if there are more than knn_max_points
+            ct_n = _subsample_counts(ct_n, knn_max_points)
 
-            # Compute phi
-            phi = self.x_to_phi(x)
+            # Compute phi once for each unique sequence, then expand phi
+            # and y values by counts. The KNN estimators require one point
+            # per observation, but at most knn_max_points scalars are made.
+            phi = np.repeat(self.x_to_phi(x_m)[m_n], ct_n)
+            y = np.repeat(y_n, ct_n)
             N = len(phi)
 
             # Replace phi by rank order of phi
@@ -1719,10 +2376,9 @@ class Model:
 
             # Get values for all bins
             #p_of_all_y_given_phi = self.model.p_of_all_y_given_phi(phi_unfixed)
+            engine = self._get_numpy_engine(include_gpmap=False)
             p_of_all_y_given_phi = \
-                self.layer_measurement_process.p_of_all_y_given_phi(
-                    phi_unfixed,
-                    use_arrays=True)
+                engine.p_of_all_y_given_unfixed_phi(phi_unfixed)
 
             # Extract y-specific elements
             _ = np.newaxis
@@ -1796,11 +2452,9 @@ class Model:
         y_norm = (y - self.y_mean)/self.y_std
         yhat_norm = (yhat - self.y_mean)/self.y_std
 
-        # Get layer
-        layer = self.layer_noise_model
-
-        # Compute p_norm using layer
-        p_norm = layer.p_of_y_given_yhat(y_norm, yhat_norm, use_arrays=True)
+        # Compute p_norm using noise model parameters
+        engine = self._get_numpy_engine(include_gpmap=False)
+        p_norm = engine.p_of_y_norm_given_yhat_norm(y_norm, yhat_norm)
 
         # Unnormalize p
         p = p_norm / self.y_std
@@ -1851,9 +2505,9 @@ class Model:
                   'type(y), specifying bin number, must be of type int')
 
             # check that entered bin number doesn't exceed max bins
-            check(y < self.y_norm[0].shape[0],
+            check(y < self.Y,
                   "bin number cannot be larger than max bins = %d" %
-                  self.y_norm[0].shape[0])
+                  self.Y)
 
             phi = self.x_to_phi(x)
             p_of_y_given_x = self.p_of_y_given_phi(y, phi)
@@ -1911,5 +2565,49 @@ class Model:
                   f'\t{filename_pickle}\n'
                   f'\t{filename_h5}')
 
+    @handle_errors
+    def export(self,
+               filename,
+               verbose=True):
+        """
+        Export model for evaluation without TensorFlow.
+
+        Exported models are represented by a single ``.npz`` file containing
+        G-P map parameters, GE nonlinearity and noise model parameters or
+        MPA measurement process parameters, and the constants used to
+        standardize ``phi`` and ``y``. Exported models are loaded using
+        ``mavenn.load_exported()``, which is much faster than
+        ``mavenn.load()`` and does not require TensorFlow, but exported
+        models cannot be trained. Only models with additive, neighbor, or
+        pairwise G-P maps can be exported.
+
+        Parameters
+        ----------
+        filename: (str)
+            File directory and root. Do not include extensions.
+
+        verbose: (bool)
+            Whether to print feedback.
+
+        Returns
+        -------
+        None
+        """
+        check(self.gpmap_type in NUMPY_GPMAP_TYPES,
+              f'gpmap_type={repr(self.gpmap_type)} cannot be exported; '
+              f'must be one of {NUMPY_GPMAP_TYPES}.')
+
+        # Save parameters as npz file
+        params = self._get_numpy_params()
+        params['alphabet'] = np.array(params['alphabet'], dtype=str)
+        filename_npz = filename + '.npz'
+        np.savez(filename_npz,
+                 format_version=EXPORT_FORMAT_VERSION,
+                 **params)
+
+        if verbose:
+            print(f'Model exported to this file:\n'
+                  f'\t{filename_npz}')
+
 
 
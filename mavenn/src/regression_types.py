@@ -6,13 +6,16 @@ import numbers
 
 # Tensorflow imports
 from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Lambda, Concatenate
+from tensorflow.keras.layers import Input, Concatenate
 
 # MAVE-NN imports
 from mavenn.src.error_handling import handle_errors, check
 from mavenn.src.validate import validate_alphabet
 from mavenn.src.layers.gpmap \
-    import AdditiveGPMapLayer, PairwiseGPMapLayer, MultilayerPerceptronGPMap
+    import AdditiveGPMapLayer, \
+        PairwiseGPMapLayer, \
+        NeighborGPMapLayer, \
+        MultilayerPerceptronGPMap
 from mavenn.src.layers.measurement_process_layers \
     import GlobalEpistasisLayer, \
         AffineLayer, \
@@ -193,30 +196,27 @@ class GlobalEpistasisModel:
         check(ge_nonlinearity_hidden_nodes > 0,
               'ge_nonlinearity_hidden_nodes must be greater than 0.')
 
-        # Compute number of sequence nodes. Useful for model construction below.
-        number_x_nodes = int(self.L*self.C)
+        # Sequences are passed to the network as (B,L) integer codes.
+        sequence_input = Input((self.L,),
+                               dtype='int32',
+                               name='Sequence_input')
+        # Labels are (B,3) rows of y, weight, and y variance; see
+        # NoiseModelLayer.call()
+        labels_input = Input((3,),
+                             name='Labels_input')
 
-        number_input_layer_nodes = number_x_nodes + 1
-
-        inputTensor = Input((number_input_layer_nodes,),
-                            name='Sequence_labels_input')
-
-        sequence_input = Lambda(lambda x: x[:, 0:number_x_nodes],
-                                output_shape=((number_x_nodes,)),
-                                name='Sequence_only')(inputTensor)
-        labels_input = Lambda(
-            lambda x: x[:, number_x_nodes:number_x_nodes + 1],
-            output_shape=((1,)),
-            trainable=False, name='Labels_input')(inputTensor)
-
-
-        # Create G-P map layer
+        # Create G-P map layer. All G-P map layers operate on integer codes.
         if self.gpmap_type == 'additive':
             self.x_to_phi_layer = AdditiveGPMapLayer(
                 L=self.L,
                 C=self.C,
                 theta_regularization=self.theta_regularization)
-        elif self.gpmap_type in ['pairwise', 'neighbor']:
+        elif self.gpmap_type == 'neighbor':
+            self.x_to_phi_layer = NeighborGPMapLayer(
+                L=self.L,
+                C=self.C,
+                theta_regularization=self.theta_regularization)
+        elif self.gpmap_type == 'pairwise':
             self.x_to_phi_layer = PairwiseGPMapLayer(
                 L=self.L,
                 C=self.C,
@@ -275,7 +275,7 @@ class GlobalEpistasisModel:
         outputTensor = self.noise_model_layer(yhat_y_concat)
 
         # create the model:
-        model = Model(inputTensor, outputTensor)
+        model = Model([sequence_input, labels_input], outputTensor)
         self.model = model
         self.ge_nonlinearity_hidden_nodes = ge_nonlinearity_hidden_nodes
 
@@ -413,29 +413,25 @@ class MeasurementProcessAgnosticModel:
         check(mpa_hidden_nodes > 0,
               'mpa_hidden_nodes must be greater than 0.')
 
-        # Compute number of sequence nodes. Useful for model construction below.
-        number_x_nodes = int(self.L*self.C)
-        number_input_layer_nodes = number_x_nodes+self.number_of_bins
-
-        inputTensor = Input((number_input_layer_nodes,),
-                            name='Sequence_labels_input')
-
-        sequence_input = Lambda(lambda x: x[:, 0:number_x_nodes],
-                                output_shape=((number_x_nodes,)),
-                                name='Sequence_only')(inputTensor)
-        labels_input = Lambda(
-            lambda x: x[:, number_x_nodes:number_x_nodes + self.number_of_bins],
-            output_shape=((1,)),
-            trainable=False,
-            name='Labels_input')(inputTensor)
+        # Sequences are passed to the network as (B,L) integer codes.
+        sequence_input = Input((self.L,),
+                               dtype='int32',
+                               name='Sequence_input')
+        labels_input = Input((self.number_of_bins,),
+                             name='Labels_input')
 
-        # Create G-P map layer
+        # Create G-P map layer. All G-P map layers operate on integer codes.
         if self.gpmap_type == 'additive':
             self.x_to_phi_layer = AdditiveGPMapLayer(
                 L=self.L,
                 C=self.C,
                 theta_regularization=self.theta_regularization)
-        elif self.gpmap_type in ['pairwise', 'neighbor']:
+        elif self.gpmap_type == 'neighbor':
+            self.x_to_phi_layer = NeighborGPMapLayer(
+                L=self.L,
+                C=self.C,
+                theta_regularization=self.theta_regularization)
+        elif self.gpmap_type == 'pairwise':
             self.x_to_phi_layer = PairwiseGPMapLayer(
                 L=self.L,
                 C=self.C,
@@ -465,7 +461,7 @@ class MeasurementProcessAgnosticModel:
         outputTensor = self.layer_measurement_process(phi_ct)
 
         #create the model:
-        model = Model(inputTensor, outputTensor)
+        model = Model([sequence_input, labels_input], outputTensor)
         self.model = model
         self.mpa_hidden_nodes = mpa_hidden_nodes
         return model
@@ -10,13 +10,18 @@ import pickle
 import time
 import os
 
-# Import Tensorflow
-import tensorflow as tf
+# Scipy imports
+from scipy.sparse import csc_matrix, csr_matrix, issparse
+
+# Note: TensorFlow and h5py are imported only within functions that use
+# them, so that importing this module does not import TensorFlow.
 
 # Imports from MAVE-NN
+from mavenn import TINY
 from mavenn.src.error_handling import handle_errors, check
 from mavenn.src.validate import validate_1d_array, validate_nd_array, \
-    validate_alphabet, validate_seqs
+    validate_alphabet, validate_seqs, _seqs_to_chars, _chars_to_codes, \
+    _cast_seqs, _is_int_encoded, _x_int_to_seqs
 
 @handle_errors
 def load(filename, verbose=True):
@@ -60,9 +65,17 @@ def load(filename, verbose=True):
         loaded_model.info_for_layers_dict = \
             config_dict.get('info_for_layers_dict', {})
 
-        # Load and set weights
+        # Load and set weights. Neighbor models saved by earlier versions of
+        # MAVE-NN store couplings as a dense (1,L,C,L,C) array, and so
+        # must be converted upon loading.
         filename_h5 = filename + '.h5'
-        loaded_model.get_nn().load_weights(filename_h5)
+        try:
+            loaded_model.get_nn().load_weights(filename_h5)
+        except ValueError:
+            if loaded_model.gpmap_type != 'neighbor':
+                raise
+            _load_dense_neighbor_weights(loaded_model.get_nn(), filename_h5)
+        loaded_model._weights_version += 1
 
         # Provide feedback
         if verbose:
@@ -74,10 +87,102 @@ def load(filename, verbose=True):
         return loaded_model
 
 
+def _load_dense_neighbor_weights(nn, filename_h5):
+    """
+    Load weights of a neighbor model whose couplings were saved as a dense
+    (1,L,C,L,C) array. Layers are matched to saved weights by topology.
+    """
+    import h5py
+    from mavenn.src.layers.gpmap import NeighborGPMapLayer, \
+        theta_lclc_to_theta_lcc
+
+    # Read weights of each saved layer that has weights
+    saved_weights = []
+    with h5py.File(filename_h5, 'r') as f:
+        for layer_name in f.attrs['layer_names']:
+            group = f[layer_name.decode('utf8')]
+            weight_names = [w.decode('utf8')
+                            for w in group.attrs['weight_names']]
+            if len(weight_names) > 0:
+                saved_weights.append([np.array(group[w])
+                                      for w in weight_names])
+
+    # Match to layers of nn
+    layers = [layer for layer in nn.layers if layer.weights]
+    check(len(layers) == len(saved_weights),
+          f'{filename_h5} contains weights for {len(saved_weights)} layers; '
+          f'model has {len(layers)} layers with weights.')
+
+    # Set weights, extracting neighbor couplings where needed
+    for layer, weights in zip(layers, saved_weights):
+        if isinstance(layer, NeighborGPMapLayer) and weights[2].ndim == 5:
+            theta_lcc = theta_lclc_to_theta_lcc(weights[2][0])
+            weights[2] = theta_lcc[np.newaxis, ...]
+        layer.set_weights(weights)
+
+
+def _unique_seqs(x):
+    """
+    Return the sorted unique elements of x and, for each element of x, the
+    index of the corresponding unique element, as does
+    np.unique(x, return_inverse=True). Sequences are grouped by sorting
+    their character codes packed into 64-bit integers, which is much faster
+    than sorting strings. (N,L) arrays of integer codes are treated as N
+    sequences.
+    """
+    # Get (N,L) array of character codes; if x does not contain sequences,
+    # use np.unique() directly
+    if _is_int_encoded(x):
+        chars = x
+    elif x.dtype.kind in 'US' and x.ndim == 1 and len(x) > 0:
+        chars = _seqs_to_chars(x)
+    else:
+        return np.unique(x, return_inverse=True)
+    N, L = chars.shape
+
+    # Replace character codes by their ranks, which preserves ordering. Null
+    # characters pad shorter strings, and so sort first as they should.
+    present = np.bincount(chars.ravel()) > 0
+    ranks = np.cumsum(present) - 1
+    codes = ranks.astype(np.min_scalar_type(ranks[-1]))[chars.T]
+
+    # Pack codes into 64-bit words, with earlier positions more significant
+    bits = max(int(np.ceil(np.log2(present.sum()))), 1)
+    per_word = 64 // bits
+    words = []
+    shifted = np.empty(N, dtype=np.uint64)
+    for l in range(L):
+        if l % per_word == 0:
+            words.append(np.zeros(N, dtype=np.uint64))
+        shift = np.uint64(bits * (per_word - 1 - l % per_word))
+        shifted[:] = codes[l]
+        np.left_shift(shifted, shift, out=shifted)
+        np.bitwise_or(words[-1], shifted, out=words[-1])
+
+    # Sort words lexicographically, then mark the start of each group
+    if len(words) == 1:
+        order = np.argsort(words[0], kind='stable')
+    else:
+        order = np.lexsort(words[::-1])
+    is_first = np.zeros(N, dtype=bool)
+    is_first[0] = True
+    for word in words:
+        word = word[order]
+        is_first[1:] |= (word[1:] != word[:-1])
+
+    # Compute unique elements and inverse indices
+    inverse = np.empty(N, dtype=np.int64)
+    inverse[order] = np.cumsum(is_first) - 1
+    x_unique = x[order[is_first]]
+
+    return x_unique, inverse
+
+
 @handle_errors
 def vec_data_to_mat_data(y_n,
                          ct_n=None,
-                         x_n=None):
+                         x_n=None,
+                         sparse=False):
     """
     Transform from vector data format to matrix data format.
 
@@ -92,12 +197,18 @@ def vec_data_to_mat_data(y_n,
 
     x_n: (np.ndarray)
         List of N sequences. If None, each y_n will be
-        assumed to come from a unique sequence.
+        assumed to come from a unique sequence. Can also be an (N,L) array
+        of integer-encoded sequences.
+
+    sparse: (bool)
+        Whether to return ct_my as a ``scipy.sparse.csr_matrix``.
 
     Returns
     -------
     ct_my: (2D array of ints)
-        Matrix of counts.
+        Matrix of counts. Rows correspond to the unique sequences in
+        x_n in sorted order, and columns correspond to the unique bin
+        numbers in y_n in sorted order.
 
     x_m: (array)
         Corresponding list of x-values.
@@ -107,10 +218,10 @@ def vec_data_to_mat_data(y_n,
     # indices
     y_n = validate_1d_array(y_n).astype(int)
     N = len(y_n)
-    if x_n is not None:
-        x_n = validate_1d_array(x_n)
-    else:
+    if x_n is None:
         x_n = np.arange(N)
+    elif not _is_int_encoded(x_n):
+        x_n = validate_1d_array(x_n)
 
     if ct_n is not None:
         ct_n = validate_1d_array(ct_n).astype(int)
@@ -119,7 +230,9 @@ def vec_data_to_mat_data(y_n,
 
     # Cast y as array of ints
     y_n = np.array(y_n).astype(int)
-    N = len(x_n)
+    check(len(x_n) == N and len(ct_n) == N,
+          f'len(y_n)={N}, len(ct_n)={len(ct_n)}, and len(x_n)={len(x_n)} '
+          f'must be equal.')
 
     # This case is only for loading data. Should be tested/made more robust
     if N == 1:
@@ -127,33 +240,23 @@ def vec_data_to_mat_data(y_n,
 
         return y_n.reshape(-1, y_n.shape[0]), x_n
 
-    # Create dataframe
-    data_df = pd.DataFrame()
-    data_df['x'] = x_n
-    data_df['y'] = y_n
-    data_df['ct'] = ct_n
-
-    # Sum over repeats
-    data_df = data_df.groupby(['x', 'y']).sum().reset_index()
+    # Index unique sequences and bin numbers
+    x_m, x_ix = _unique_seqs(x_n)
+    _, y_ix = np.unique(y_n, return_inverse=True)
+    M = len(x_m)
+    Y = y_ix.max() + 1
 
-    # Pivot dataframe
-    data_df = data_df.pivot(index='x', columns='y', values='ct')
-    data_df = data_df.fillna(0).astype(int)
-
-    # Clean dataframe
-    data_df.reset_index(inplace=True)
-    data_df.columns.name = None
-
-    # Get ct_my values
-    cols = [c for c in data_df.columns if not c in ['x']]
-
-    ct_my = data_df[cols].values.astype(int)
-
-    # Get x_m values
-    x_m = data_df['x'].values
+    # Sum counts over repeats of each (sequence, bin) pair
+    if sparse:
+        ct_my = csr_matrix((ct_n, (x_ix, y_ix)), shape=(M, Y))
+        ct_my.sum_duplicates()
+    else:
+        ct_my = np.bincount(x_ix * Y + y_ix, weights=ct_n, minlength=M * Y)
+        ct_my = ct_my.reshape(M, Y).astype(int)
 
     return ct_my, x_m
 
+
 @handle_errors
 def mat_data_to_vec_data(ct_my,
                          x_m=None):
@@ -163,7 +266,7 @@ def mat_data_to_vec_data(ct_my,
     Parameters
     ----------
     ct_my: (2D array of ints)
-        Matrix of counts.
+        Matrix of counts. Can be a ``scipy.sparse`` matrix.
 
     x_m: (array)
         Corresponding list of x-values.
@@ -184,41 +287,125 @@ def mat_data_to_vec_data(ct_my,
     # Note: this use of validate_1d_array is needed to avoid a subtle
     # bug that occurs when inputs are pandas series with non-continguous
     # indices
-    ct_my = validate_nd_array(ct_my).astype(int)
+    if not issparse(ct_my):
+        ct_my = validate_nd_array(ct_my).astype(int)
     check(ct_my.ndim == 2,
           f'ct_my.ndim={ct_my.ndim}; must be 2.')
     M, Y = ct_my.shape
 
-    if x_m is not None:
-        x_m = validate_1d_array(x_m)
-    else:
+    if x_m is None:
         x_m = np.arange(M)
+    elif not _is_int_encoded(x_m):
+        x_m = validate_1d_array(x_m)
 
-    # Create dataframe
-    data_df = pd.DataFrame()
-    y_cols = list(range(Y))
-    data_df.loc[:, 'x'] = x_m
-    data_df.loc[:, y_cols] = ct_my
-
-    # Melt dataframe
-    data_df = data_df.melt(id_vars='x',
-                           value_vars=y_cols,
-                           value_name='ct',
-                           var_name='y')
+    # Get nonzero (sequence, bin) pairs
+    if issparse(ct_my):
+        ct_my = ct_my.tocoo()
+        m_n, y_n, ct_n = ct_my.row, ct_my.col, ct_my.data.astype(int)
+        ix = ct_n > 0
+        m_n, y_n, ct_n = m_n[ix], y_n[ix], ct_n[ix]
+    else:
+        m_n, y_n = np.nonzero(ct_my > 0)
+        ct_n = ct_my[m_n, y_n]
 
-    # Remove zero count rows
-    ix = data_df['ct'] > 0
-    data_df = data_df[ix].reset_index()
-    data_df.sort_values(by=['ct','y'], ascending=False, inplace=True)
+    # Sort by count, then bin number, in descending order. Ties are
+    # ordered by bin number, then sequence, in ascending order.
+    order = np.lexsort((m_n, -y_n, -ct_n))
+    m_n = m_n[order]
+    y_n = y_n[order].astype(int)
+    ct_n = ct_n[order]
 
     # Get return values values
-    x_n = data_df['x'].values
-    y_n = data_df['y'].values
-    ct_n = data_df['ct'].values
+    x_n = x_m[m_n]
 
     return y_n, ct_n, x_n
 
 
+def _multinomial_rows(n, p):
+    """
+    Draw counts from a multinomial distribution for each row of p, using
+    the total counts in n. Rows are sampled together by drawing the count in
+    each bin from a binomial distribution conditioned on the counts drawn
+    for previous bins, so the number of random calls scales with the number
+    of bins rather than with the number of rows or observations.
+    """
+    n = np.asarray(n).astype(int)
+    p = np.asarray(p, dtype=float)
+    M, Y = p.shape
+
+    # Normalize probabilities for each row
+    p = p / p.sum(axis=1, keepdims=True)
+
+    # Draw counts in each bin from the remaining counts and probability
+    ct = np.zeros((M, Y), dtype=int)
+    n_left = n.copy()
+    p_left = np.ones(M)
+    for y in range(Y - 1):
+        q = np.clip(p[:, y] / np.maximum(p_left, TINY), 0, 1)
+        ct[:, y] = np.random.binomial(n_left, q)
+        n_left -= ct[:, y]
+        p_left -= p[:, y]
+    ct[:, Y - 1] = n_left
+
+    return ct
+
+
+def _mpa_data_to_counts(x, y, ct=None):
+    """
+    Return MPA data as unique sequences together with (sequence, bin, count)
+    triples, without expanding observations by their counts. ``y`` can be
+    either an (M,Y) count matrix or a 1D array of bin numbers; in the latter
+    case ``ct`` gives the counts of each (sequence, bin) pair, and
+    sequences that occur in multiple rows are grouped together.
+    """
+    # If y is 2D, use nonzero elements of the count matrix
+    if y.ndim == 2:
+        x_m = x if _is_int_encoded(x) else validate_1d_array(x)
+        if issparse(y):
+            y = y.tocoo()
+            m_n, y_n, ct_n = y.row, y.col, y.data.astype(int)
+        else:
+            y = validate_nd_array(y).astype(int)
+            m_n, y_n = np.nonzero(y)
+            ct_n = y[m_n, y_n]
+
+    # Otherwise, group repeated sequences
+    else:
+        y_n = validate_1d_array(y).astype(int)
+        if ct is None:
+            ct_n = np.ones(len(y_n), dtype=int)
+        else:
+            ct_n = validate_1d_array(ct).astype(int)
+        if not _is_int_encoded(x):
+            x = validate_1d_array(x)
+        check(len(x) == len(y_n) and len(ct_n) == len(y_n),
+              f'len(y)={len(y_n)}, len(ct)={len(ct_n)}, and len(x)={len(x)} '
+              f'must be equal.')
+        x_m, m_n = _unique_seqs(x)
+
+    # Keep only observed (sequence, bin) pairs
+    ix = ct_n > 0
+    m_n, y_n, ct_n = m_n[ix], y_n[ix].astype(int), ct_n[ix]
+
+    return x_m, m_n, y_n, ct_n
+
+
+def _subsample_counts(ct_n, max_total):
+    """
+    Return counts for a random subset of min(max_total, ct_n.sum())
+    observations drawn without replacement, where observations are grouped
+    into the entries of ct_n. Observations are never expanded one per row.
+    """
+    if ct_n.sum() <= max_total:
+        return ct_n
+
+    # Draw from a generator seeded by numpy's global state, so that results
+    # are reproducible after np.random.seed()
+    rng = np.random.default_rng(np.random.randint(np.iinfo(np.int32).max))
+    return rng.multivariate_hypergeometric(ct_n, max_total,
+                                           method='marginals')
+
+
 @handle_errors
 def x_to_alphabet(x, return_name=False):
     """
@@ -267,7 +454,7 @@ def x_to_alphabet(x, return_name=False):
 
 
 @handle_errors
-def p_lc_to_x(N, p_lc, alphabet):
+def p_lc_to_x(N, p_lc, alphabet, x_format='str', chunk_size=100000):
     """
     Generate an array of N sequences given a probability matrix.
 
@@ -283,11 +470,79 @@ def p_lc_to_x(N, p_lc, alphabet):
     alphabet: (np.array)
         The alphabet, length C, from which sequences will be generated.
 
+    x_format: (str)
+        Format of returned sequences. If ``'str'``, an (N,) array of strings
+        is returned. If ``'bytes'``, an (N,) array of fixed-width bytes is
+        returned. If ``'int'``, an (N,L) array of integer codes, stored as
+        np.uint8 values, is returned.
+
+    chunk_size: (int > 0)
+        Number of sequences to sample at a time.
+
     Returns
     -------
     x: (np.array)
         An (N,) array of sequences drawn from p_lc
     """
+    # Validate alphabet and x_format
+    alphabet = validate_alphabet(alphabet)
+    check(x_format in ['str', 'bytes', 'int'],
+          f'x_format={repr(x_format)}; must be "str", "bytes", or "int".')
+
+    # Generate sequences as integer codes in chunks
+    batches = p_lc_to_x_batches(N=N,
+                                p_lc=p_lc,
+                                alphabet=alphabet,
+                                x_format='int',
+                                chunk_size=chunk_size)
+    x_int = np.concatenate(list(batches), axis=0)
+
+    # Return sequences in requested format
+    if x_format == 'int':
+        x = x_int
+    else:
+        x = _x_int_to_seqs(x_int, alphabet)
+        if x_format == 'str':
+            x = x.astype(str)
+
+    return x
+
+
+@handle_errors
+def p_lc_to_x_batches(N, p_lc, alphabet, x_format='int', chunk_size=100000):
+    """
+    Generate N sequences given a probability matrix, in batches.
+
+    Characters are drawn at every position at once by inverse-CDF sampling,
+    and batches are yielded as they are generated, so that large libraries
+    can be scored (e.g. by passing integer codes to ``Model.x_to_phi()``)
+    without holding all sequences in memory.
+
+    Parameters
+    ----------
+    N: (int > 0)
+        Total number of sequences to generate.
+
+    p_lc: (np.array)
+        An (L,C) array  listing the probability of each base (columns) for each
+        position (rows).
+
+    alphabet: (np.array)
+        The alphabet, length C, from which sequences will be generated.
+
+    x_format: (str)
+        Format of yielded sequences; one of ``'int'`` (an (n,L) array of
+        np.uint8 codes), ``'bytes'`` (an (n,) array of fixed-width bytes),
+        or ``'str'`` (an (n,) array of strings).
+
+    chunk_size: (int > 0)
+        Maximum number of sequences in each batch.
+
+    Returns
+    -------
+    batches: (generator)
+        Generator yielding batches of sequences drawn from p_lc.
+    """
     # Validate N
     check(isinstance(N, int),
           f'type(N)={type(N)}; must be int')
@@ -310,18 +565,40 @@ def p_lc_to_x(N, p_lc, alphabet):
     check(len(alphabet) == C,
           f'len(alphabet)={len(alphabet)} does not match p_lc.shape[1]={C}')
 
-    # Create function to fill in a set of characters given p_l
-    def fill_x_arr_col(p_l):
-        return np.random.choice(a=alphabet,
-                                size=N,
-                                replace=True,
-                                p=p_l)
+    # Validate x_format
+    check(x_format in ['str', 'bytes', 'int'],
+          f'x_format={repr(x_format)}; must be "str", "bytes", or "int".')
 
-    # Create seqs
-    x_arr = np.apply_along_axis(fill_x_arr_col, axis=1, arr=p_lc).T
-    x = np.apply_along_axis(''.join, axis=1, arr=x_arr)
+    # Validate chunk_size
+    check(isinstance(chunk_size, int) and chunk_size > 0,
+          f'chunk_size={chunk_size}; must be a positive int.')
 
-    return x
+    # Compute cumulative distribution at each position
+    cdf_lc = np.cumsum(p_lc, axis=1)
+    cdf_lc = cdf_lc / cdf_lc[:, -1:]
+
+    return _p_lc_to_x_batches(N, cdf_lc, alphabet, x_format, chunk_size)
+
+
+def _p_lc_to_x_batches(N, cdf_lc, alphabet, x_format, chunk_size):
+    """Yield batches of sequences sampled from cdf_lc."""
+    L, C = cdf_lc.shape
+    for start in range(0, N, chunk_size):
+        n = min(chunk_size, N - start)
+
+        # Code for each character is the number of CDF values below a
+        # uniform random number
+        u = np.random.rand(n, L)
+        x_int = np.zeros([n, L], dtype=np.uint8)
+        for c in range(C - 1):
+            x_int += (u >= cdf_lc[:, c])
+
+        # Yield sequences in requested format
+        if x_format == 'int':
+            yield x_int
+        else:
+            x = _x_int_to_seqs(x_int, alphabet)
+            yield x.astype(str) if x_format == 'str' else x
 
 
 @handle_errors
@@ -352,47 +629,194 @@ def x_to_stats(x, alphabet, weights=None, verbose=False):
     # Start timer
     start_time = time.time()
 
-    # Validate alphabet
-    alphabet = validate_alphabet(alphabet)
+    # Accumulate stats over all sequences
+    accumulator = SequenceStatsAccumulator(alphabet=alphabet)
+    accumulator.update(x, weights=weights)
+    stats = accumulator.get_stats()
 
-    # Validate sequences
-    x = validate_seqs(x=x,
-                      alphabet=alphabet,
-                      restrict_seqs_to_alphabet=True)
+    # Provide feedback if requested
+    duration_time = time.time() - start_time
+    if verbose:
+        print(f'Stats computation time: {duration_time:.5f} sec.')
 
-    # Check weights and set if not provided
-    if weights is None:
-        weights = np.ones(len(x))
-    else:
-        weights = validate_1d_array(weights)
-        weights = weights.astype(float)
-        check(len(weights) == len(x),
-              f"len(weights)={len(weights)} does not match len(x)={len(x)}")
-
-    # Do one-hot encoding of sequences
-    t = time.time()
-    x_nlc = x_to_ohe(x,
-                     alphabet,
-                     check_seqs=False,
-                     check_alphabet=False,
-                     ravel_seqs=False)
-    #print(f'Time for x_to_ohe: {time.time()-t:.3f} sec.')
-    N, L, C = x_nlc.shape
+    return stats
 
-    # Dictionary to hold results
-    stats = {}
 
-    # Compute x_ohe
-    stats['x_ohe'] = x_nlc.reshape([N, L*C]).astype(np.int8)
+class SequenceStatsAccumulator:
+    """
+    Accumulates the sequence statistics returned by ``x_to_stats()`` over
+    successive batches of sequences.
+
+    Only the weighted counts of each character at each position are stored,
+    so memory use does not grow with the number of sequences. Statistics
+    can be updated as new data arrive, and accumulators filled separately
+    (e.g., from different chunks of a dataset, or in different processes)
+    can be combined using ``merge()``.
 
-    # Multiply by weights
-    x_nlc = x_nlc.astype(float) * weights[:, np.newaxis, np.newaxis]
+    Parameters
+    ----------
+    alphabet: (str, np.ndarray)
+        Alphabet from which sequences are drawn.
 
-    # Compute lc encoding of consensus sequence
-    x_sum_lc = x_nlc.sum(axis=0)
-    x_sum_lc = x_sum_lc.reshape([L, C])
+    L: (int, None)
+        Length of sequences. If ``None``, is set by the first call to
+        ``update()``.
+
+    chunk_size: (int)
+        Maximum number of sequences to encode at once in ``update()``.
+    """
+
+    @handle_errors
+    def __init__(self, alphabet, L=None, chunk_size=100000):
+        """Construct accumulator instance."""
+        # Check and set arguments
+        self.alphabet = validate_alphabet(alphabet)
+        self.C = len(self.alphabet)
+        check(L is None or (isinstance(L, (int, np.integer)) and L > 0),
+              f'L={repr(L)}; must be None or a positive int.')
+        check(isinstance(chunk_size, (int, np.integer)) and chunk_size > 0,
+              f'chunk_size={repr(chunk_size)}; must be a positive int.')
+        self.L = None if L is None else int(L)
+        self.chunk_size = int(chunk_size)
+
+        # Initialize accumulated quantities
+        self.x_sum_lc = None if L is None else np.zeros([self.L, self.C])
+        self.N = 0
+        self.num_nonzero_weights = 0
+
+    @handle_errors
+    def update(self, x, weights=None, check_seqs=True):
+        """
+        Add sequences to the accumulated statistics.
+
+        Parameters
+        ----------
+        x: (np.ndarray)
+            1D array of sequences, or an ``(N,L)`` array of
+            integer-encoded sequences.
+
+        weights: (None, np.ndarray)
+            Weights for each sequence. If ``None``, a value of 1 will be
+            assumed for each sequence.
+
+        check_seqs: (bool)
+            Whether to validate sequences.
+
+        Returns
+        -------
+        self: (SequenceStatsAccumulator)
+            This accumulator, so that calls can be chained.
+        """
+        # Validate x and weights
+        if not _is_int_encoded(x):
+            x = validate_1d_array(x)
+        N = len(x)
+        if weights is not None:
+            weights = validate_1d_array(weights)
+            weights = weights.astype(float)
+            check(len(weights) == N,
+                  f"len(weights)={len(weights)} does not match len(x)={N}")
+
+        # Encode and count sequences one chunk at a time
+        for start in range(0, N, self.chunk_size):
+            stop = start + self.chunk_size
+            x_int = x_to_int(x[start:stop],
+                             self.alphabet,
+                             check_seqs=check_seqs,
+                             check_alphabet=False)
+            w = None if weights is None else weights[start:stop]
+
+            # Set or check sequence length
+            if self.L is None:
+                self.L = x_int.shape[1]
+                self.x_sum_lc = np.zeros([self.L, self.C])
+            check(x_int.shape[1] == self.L,
+                  f'Sequences have length {x_int.shape[1]}; '
+                  f'must be {self.L}.')
+
+            # Accumulate counts
+            self.x_sum_lc += _x_int_to_sum_lc(x_int, self.C, w)
+            self.N += len(x_int)
+            self.num_nonzero_weights += \
+                len(x_int) if w is None else int((w != 0).sum())
+
+        return self
+
+    @handle_errors
+    def merge(self, other):
+        """
+        Add the statistics accumulated by another accumulator to this one.
+
+        Parameters
+        ----------
+        other: (SequenceStatsAccumulator)
+            Accumulator for the same alphabet and sequence length.
+
+        Returns
+        -------
+        self: (SequenceStatsAccumulator)
+            This accumulator, so that calls can be chained.
+        """
+        check(isinstance(other, SequenceStatsAccumulator),
+              f'type(other)={type(other)}; '
+              f'must be SequenceStatsAccumulator.')
+        check(np.array_equal(self.alphabet, other.alphabet),
+              'Accumulators have different alphabets.')
+        if other.L is None:
+            return self
+        if self.L is None:
+            self.L = other.L
+            self.x_sum_lc = np.zeros([self.L, self.C])
+        check(self.L == other.L,
+              f'Accumulators have different sequence lengths '
+              f'{self.L} and {other.L}.')
+        self.x_sum_lc += other.x_sum_lc
+        self.N += other.N
+        self.num_nonzero_weights += other.num_nonzero_weights
+        return self
+
+    @handle_errors
+    def get_stats(self):
+        """
+        Compute statistics of all sequences accumulated so far.
+
+        Returns
+        -------
+        stats: (dict)
+            Dictionary of the statistics returned by ``x_to_stats()``.
+        """
+        check(self.N > 0, 'No sequences have been accumulated.')
+        return _sum_lc_to_stats(x_sum_lc=self.x_sum_lc,
+                                N=self.N,
+                                num_nonzero_weights=self.num_nonzero_weights,
+                                alphabet=self.alphabet)
+
+
+def _x_int_to_sum_lc(x_int, C, weights=None):
+    """
+    Return the (L,C) array of weighted character counts at each position.
+    One bincount per position avoids creating an (N,L,C) one-hot array.
+    """
+    L = x_int.shape[1]
+    x_sum_lc = np.zeros([L, C])
+    for l in range(L):
+        x_sum_lc[l, :] = np.bincount(x_int[:, l],
+                                     weights=weights,
+                                     minlength=C)
+    return x_sum_lc
+
+
+def _sum_lc_to_stats(x_sum_lc, N, num_nonzero_weights, alphabet):
+    """
+    Compute the sequence statistics returned by x_to_stats() from an (L,C)
+    array of weighted character counts.
+    """
+    L, C = x_sum_lc.shape
     x_support_lc = (x_sum_lc != 0)
 
+    # Dictionary to hold results
+    stats = {}
+
     # Set number of sequences
     stats['N'] = N
 
@@ -411,12 +835,13 @@ def x_to_stats(x, alphabet, weights=None, verbose=False):
                                            columns=alphabet,
                                            data=p_lc)
 
-    # Compute sparsity factor
-    stats['sparsity_factor'] = (x_nlc != 0).sum().sum() / x_nlc.size
+    # Compute sparsity factor, i.e. the fraction of nonzero elements in the
+    # weighted one-hot encoding of x
+    stats['sparsity_factor'] = num_nonzero_weights / (N * C)
 
     # Compute the consensus sequence and corresponding matrix.
     # Adding noise prevents ties
-    x_sum_lc += 1E-1 * np.random.rand(*x_sum_lc.shape)
+    x_sum_lc = x_sum_lc + 1E-1 * np.random.rand(*x_sum_lc.shape)
     stats['consensus_seq'] = \
         ''.join([alphabet[np.argmax(x_sum_lc[l, :])] for l in range(L)])
 
@@ -427,11 +852,6 @@ def x_to_stats(x, alphabet, weights=None, verbose=False):
             missing_dict[l] = ''.join(alphabet[~x_support_lc[l, :]])
     stats['missing_char_dict'] = missing_dict
 
-    # Provide feedback if requested
-    duration_time = time.time() - start_time
-    if verbose:
-        print(f'Stats computation time: {duration_time:.5f} sec.')
-
     return stats
 
 
@@ -455,6 +875,7 @@ def set_seed(seed):
           f'type(seed)={type(seed)}; must be int')
 
     # Set seed
+    import tensorflow as tf
     os.environ['PYTHONHASHSEED'] = '0'
     tf.random.set_seed(seed)
     np.random.seed(seed)
@@ -466,14 +887,17 @@ def x_to_ohe(x,
              alphabet,
              check_seqs=True,
              check_alphabet=True,
-             ravel_seqs=True):
+             ravel_seqs=True,
+             n_jobs=1):
     """
     Convert a sequence array to a one-hot encoded matrix.
 
     Parameters
     ----------
     x: (np.ndarray)
-        (N,) array of input sequences, each of length L
+        (N,) array of input sequences, each of length L, provided as str or
+        fixed-width bytes. An (N,L) array of integer-encoded sequences is
+        also accepted.
 
     alphabet: (np.ndarray)
         (C,) array describing the alphabet sequences are drawn from.
@@ -487,6 +911,11 @@ def x_to_ohe(x,
     ravel_seqs: (bool)
         Whether to return an (N, L*C) array, as opposed to an (N, L, C) array.
 
+    n_jobs: (int)
+        Number of worker processes to use when validating and encoding
+        sequences. If ``-1``, all available CPUs are used. Scripts that use
+        ``n_jobs > 1`` must run under ``if __name__ == '__main__':``.
+
     Returns
     -------
     x_ohe: (np.ndarray)
@@ -496,26 +925,21 @@ def x_to_ohe(x,
     if check_alphabet:
         alphabet = validate_alphabet(alphabet)
 
-    # Validate sequences as (N,) array
-    if check_seqs:
-        x = validate_seqs(x, alphabet=alphabet)
+    # Encode sequences as an (N,L) array of integer codes
+    x_int = x_to_int(x,
+                     alphabet,
+                     check_seqs=check_seqs,
+                     check_alphabet=False,
+                     n_jobs=n_jobs)
 
     # Get dimensions
-    L = len(x[0])
-    N = len(x)
+    N, L = x_int.shape
     C = len(alphabet)
 
-    # Shape sequences as array of int8s
-    x_arr = np.frombuffer(bytes(''.join(x), 'utf-8'),
-                          np.int8, N * L).reshape([N, L])
-
-    # Create alphabet as array of int8s
-    alphabet_arr = np.frombuffer(bytes(''.join(alphabet), 'utf-8'),
-                                 np.int8, C)
-
     # Compute (N,L,C) grid of one-hot encoded values
-    x_nlc = (x_arr[:, :, np.newaxis] ==
-             alphabet_arr[np.newaxis, np.newaxis, :]).astype(np.int8)
+    x_nlc = np.zeros([N, L, C], dtype=np.int8)
+    np.put_along_axis(x_nlc, x_int[:, :, np.newaxis].astype(np.intp), 1,
+                      axis=2)
 
     # Ravel if requested
     if ravel_seqs:
@@ -525,6 +949,154 @@ def x_to_ohe(x,
 
     return x_ohe
 
+@handle_errors
+def x_to_int(x,
+             alphabet,
+             check_seqs=True,
+             check_alphabet=True,
+             n_jobs=1):
+    """
+    Convert a sequence array to a matrix of integer character codes.
+
+    This is a compact alternative to one-hot encoding: each character is
+    represented by its index within the alphabet, so an (N,L) matrix of codes
+    carries the same information as an (N,L*C) one-hot matrix.
+
+    Parameters
+    ----------
+    x: (np.ndarray)
+        (N,) array of input sequences, each of length L, provided as str or
+        fixed-width bytes. For sequences of bytes, encoding requires no
+        copy of the sequence data. An (N,L) array of integer-encoded
+        sequences is also accepted, and is returned as np.uint8 values.
+
+    alphabet: (np.ndarray)
+        (C,) array describing the alphabet sequences are drawn from.
+
+    check_seqs: (bool)
+        Whether to validate the sequences
+
+    check_alphabet: (bool)
+        Whether to validate the alphabet
+
+    n_jobs: (int)
+        Number of worker processes to use when validating and encoding
+        sequences. Only used if ``check_seqs=True``. If ``-1``, all
+        available CPUs are used. Scripts that use ``n_jobs > 1`` must run
+        under ``if __name__ == '__main__':``.
+
+    Returns
+    -------
+    x_int: (np.ndarray)
+        (N,L) array of character indices, stored as np.uint8 values.
+    """
+    # Validate alphabet as (C,) array
+    if check_alphabet:
+        alphabet = validate_alphabet(alphabet)
+
+    # Validate sequences, computing integer codes in the same pass
+    if check_seqs:
+        x, x_int = validate_seqs(x,
+                                 alphabet=alphabet,
+                                 return_codes=True,
+                                 n_jobs=n_jobs)
+
+    # Otherwise, look up integer codes of characters directly
+    elif _is_int_encoded(x):
+        x_int = x.astype(np.uint8, copy=False)
+    else:
+        x = _cast_seqs(x)
+        x_int = _chars_to_codes(_seqs_to_chars(x), alphabet)
+        x_int = x_int.astype(np.uint8, copy=False)
+
+    return x_int
+
+
+def _x_int_to_csc(x_int, C):
+    """Return the (N,L*C) one-hot encoding of x_int as a sparse matrix."""
+    N, L = x_int.shape
+    rows = np.repeat(np.arange(N), L)
+    cols = (x_int.astype(np.int64) + C * np.arange(L)[np.newaxis, :]).ravel()
+    vals = np.ones(N * L, dtype=np.int8)
+    return csc_matrix((vals, (rows, cols)), shape=(N, L * C))
+
+
+def _dedup_ge_data(x_int, y, validation_flags=None, match_y=False):
+    """
+    Collapse repeated observations of the same sequence into single rows.
+    Observations are grouped by sequence and validation flag, as well as by
+    y value if match_y is True. Returns the index of the first observation
+    in each group, the number of observations in each group, the mean and
+    variance of y within each group, and the validation flag of each group.
+    """
+    N, L = x_int.shape
+    y = np.asarray(y, dtype=float).ravel()
+
+    # Represent each observation as a fixed-width byte string, so that
+    # groups can be found with a single call to np.unique()
+    cols = [x_int.astype(np.uint8, copy=False)]
+    if validation_flags is not None:
+        cols.append(np.asarray(validation_flags, dtype=np.uint8)[:, None])
+    if match_y:
+        cols.append(y[:, None].view(np.uint8))
+    keys = np.ascontiguousarray(np.concatenate(cols, axis=1))
+    keys = keys.view(f'V{keys.shape[1]}').ravel()
+    _, ix, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Compute group sizes and within-group y stats
+    weights = np.bincount(inverse, minlength=len(ix)).astype(float)
+    y_means = np.bincount(inverse, weights=y) / weights
+    y_vars = np.bincount(inverse,
+                         weights=(y - y_means[inverse])**2) / weights
+
+    # Set validation flags of groups
+    flags = None if validation_flags is None \
+        else np.asarray(validation_flags, dtype=bool)[ix]
+
+    return ix, weights, y_means, y_vars, flags
+
+
+def _y_norm_to_ge_labels(y_norm, weights=None, y_norm_vars=None):
+    """
+    Return the (N,3) float32 array of GE training labels, with columns
+    listing y_norm, the number of observations summarized by each row, and
+    the variance of these observations about y_norm. By default, each row
+    is a single observation.
+    """
+    y_norm = np.asarray(y_norm, dtype=np.float32).reshape(-1, 1)
+    labels = np.zeros([len(y_norm), 3], dtype=np.float32)
+    labels[:, 0:1] = y_norm
+    labels[:, 1] = 1 if weights is None else weights
+    labels[:, 2] = 0 if y_norm_vars is None else y_norm_vars
+    return labels
+
+
+def _x_int_to_dataset(x_tensor, y_tensor, ix, batch_size, shuffle):
+    """
+    Return a tf.data.Dataset that streams batches of ((x_int, y), y) for the
+    rows ix of x_tensor and y_tensor. Batches are assembled by gathering
+    rows from these tensors, so datasets for different subsets of the rows
+    share one copy of the data, and no per-epoch copies are made.
+    """
+    import tensorflow as tf
+
+    # Gather one batch of sequences and labels given their indices
+    def gather_batch(ix_batch):
+        x_batch = tf.cast(tf.gather(x_tensor, ix_batch), tf.int32)
+        y_batch = tf.gather(y_tensor, ix_batch)
+        return (x_batch, y_batch), y_batch
+
+    # Stream indices, shuffling if requested, then gather batches
+    dataset = tf.data.Dataset.from_tensor_slices(ix.astype(np.int64))
+    if shuffle:
+        dataset = dataset.shuffle(buffer_size=len(ix),
+                                  reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(gather_batch,
+                          num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
 # Converts sequences to matrices
 def _x_to_mat(x, alphabet):
     return (np.array(list(x))[:, np.newaxis] ==
@@ -4,6 +4,12 @@
 import numpy as np
 import pandas as pd
 import pdb
+import os
+import mmap
+import tempfile
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 
 # MAVE-NN imports
 from mavenn.src.reshape import _get_shape_and_return_1d_array
@@ -134,7 +140,9 @@ def validate_alphabet(alphabet):
 @handle_errors
 def validate_seqs(x,
                   alphabet=None,
-                  restrict_seqs_to_alphabet=True):
+                  restrict_seqs_to_alphabet=True,
+                  return_codes=False,
+                  n_jobs=1):
     """
     Validate sequences for use in MAVE-NN.
 
@@ -143,10 +151,21 @@ def validate_seqs(x,
     a version of seqs cast as a numpy array of strings. Note that
     alphabet must be set when setting restrict_seqs_to_alphabet=True.
 
+    Arrays of fixed-width bytes (dtype ``S{L}``) are accepted and returned
+    as such, using one byte per character. 2D arrays of integers are
+    interpreted as integer-encoded sequences, i.e., as the output of
+    ``x_to_int()``, and are returned as an array of fixed-width bytes (or
+    strings, if the alphabet contains non-ASCII characters).
+
+    Validation is performed in a single vectorized pass over the characters
+    of the fixed-width array of sequences, using a lookup table from
+    character values to alphabet indices.
+
     Parameters
     ----------
     x: (array-like)
-        Array of equal-length sequences.
+        Array of equal-length sequences, or an (N,L) array of integer-encoded
+        sequences.
 
     alphabet: (str, array-like)
         Alphabet from which strings are drawn.
@@ -154,20 +173,55 @@ def validate_seqs(x,
     restrict_seqs_to_alphabet: (bool)
         Whether to restrict sequences to the specified alphabet.
 
+    return_codes: (bool)
+        Whether to also return the integer encoding of the sequences, as
+        computed during validation. Requires
+        ``restrict_seqs_to_alphabet=True``.
+
+    n_jobs: (int)
+        Number of worker processes to use when checking sequences against
+        the alphabet. Sequences are split into ``n_jobs`` chunks, which are
+        encoded in parallel. If ``-1``, all available CPUs are used.
+        Workers are started with the ``forkserver`` (or ``spawn``) method,
+        since forking a process in which TensorFlow has started threads can
+        deadlock. Scripts that use ``n_jobs > 1`` must therefore run under
+        ``if __name__ == '__main__':``.
+
     Returns
     -------
     x: (np.array)
         Nrray of validated sequences
+
+    x_int: (np.ndarray)
+        (N,L) array of character indices, stored as np.uint8 values.
+        Only returned if ``return_codes=True``.
     """
+    # Check return_codes
+    check(isinstance(return_codes, bool),
+          f'type(return_codes)={type(return_codes)}; must be bool.')
+    check(restrict_seqs_to_alphabet or not return_codes,
+          'return_codes=True requires restrict_seqs_to_alphabet=True.')
+
+    # Check n_jobs
+    n_jobs = validate_n_jobs(n_jobs)
+
+    # Handle integer-encoded sequences
+    if _is_int_encoded(x):
+        check(alphabet is not None,
+              'alphabet must be specified for integer-encoded sequences.')
+        alphabet = validate_alphabet(alphabet)
+        check(len(x) >= 1, f'N={len(x)} must be >= 1')
+        check(x.min() >= 0 and x.max() < len(alphabet),
+              f'Integer-encoded sequences must have values in '
+              f'[0, {len(alphabet)}).')
+        x_int = x.astype(np.uint8)
+        x = _x_int_to_seqs(x_int, alphabet)
+        return (x, x_int) if return_codes else x
+
     # Cast as np.array
-    if isinstance(x, str):
-        x = np.array([x])
-    elif isinstance(x, (list, np.ndarray)):
-        x = np.array(x).astype(str)
-    elif isinstance(x, pd.Series):
-        x = x.values.astype(str)
-    else:
-        check(False, f'type(x)={type(x)} is invalid.')
+    check(isinstance(x, (str, bytes, list, np.ndarray, pd.Series)),
+          f'type(x)={type(x)} is invalid.')
+    x = _cast_seqs(x)
 
     # Make sure array is 1D
     check(len(x.shape) == 1, f'x should be 1D; x.shape={x.shape}')
@@ -176,11 +230,17 @@ def validate_seqs(x,
     N = len(x)
     check(N >= 1, f'N={N} must be >= 1')
 
-    # Make sure all x are the same length
-    lengths = np.unique([len(seq) for seq in x])
-    check(len(lengths) == 1,
-          f"Sequences should all be the same length"
-          "; found multiple lengths={lengths}")
+    # Get (N,L) array of character values
+    chars = _seqs_to_chars(x)
+
+    # Make sure all x are the same length. Since sequences are null-padded
+    # to the length of the longest one, this is so iff the last
+    # character of every sequence is non-null.
+    if chars.shape[1] > 0 and not np.all(chars[:, -1]):
+        lengths = np.unique((chars != 0).sum(axis=1))
+        check(False,
+              f"Sequences should all be the same length"
+              f"; found multiple lengths={lengths}")
 
     # If user requests to restrict sequences to a given alphabet
     if restrict_seqs_to_alphabet:
@@ -192,11 +252,217 @@ def validate_seqs(x,
         # Validate alphabet
         alphabet = validate_alphabet(alphabet)
 
-        # Make sure all sequences are in alphabet
-        seq_chars = set(''.join(x))
-        alphabet_chars = set(alphabet)
-        check(seq_chars <= alphabet_chars,
-              f"x contain the following characters not in alphabet:"
-              f"{seq_chars-alphabet_chars}")
+        # Make sure all sequences are in alphabet. Characters not in the
+        # alphabet are assigned the code len(alphabet).
+        if n_jobs == 1:
+            x_int = _chars_to_codes(chars, alphabet)
+            invalid = (x_int == len(alphabet))
+            invalid_chars = np.unique(chars[invalid]) if invalid.any() \
+                else []
+        else:
+            x_int, invalid_chars = _seqs_to_codes_parallel(x, alphabet, n_jobs)
+        if len(invalid_chars) > 0:
+            seq_chars = set(chr(c) for c in invalid_chars)
+            check(False,
+                  f"x contain the following characters not in alphabet:"
+                  f"{seq_chars}")
+
+        if return_codes:
+            return x, x_int.astype(np.uint8, copy=False)
 
     return x
+
+
+@handle_errors
+def validate_n_jobs(n_jobs):
+    """
+    Return a validated number of worker processes. A value of -1 is
+    replaced by the number of available CPUs.
+    """
+    check(isinstance(n_jobs, (int, np.integer)) and
+          (n_jobs >= 1 or n_jobs == -1),
+          f'n_jobs={repr(n_jobs)}; must be a positive int or -1.')
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    return int(n_jobs)
+
+
+def _is_int_encoded(x):
+    """Return True if x is a 2D array of integer-encoded sequences."""
+    return isinstance(x, np.ndarray) and x.ndim == 2 and x.dtype.kind in 'iu'
+
+
+def _cast_seqs(x):
+    """
+    Cast sequences as a numpy array of fixed-width str or bytes. Arrays
+    of either type are returned as is.
+    """
+    if isinstance(x, (str, bytes)):
+        x = np.array([x])
+    elif isinstance(x, pd.Series):
+        x = x.values
+    if not (isinstance(x, np.ndarray) and x.dtype.kind in 'US'):
+        # Going through a list ensures that objects of type bytes are
+        # not cast as their str representations
+        x = np.array(list(x) if isinstance(x, np.ndarray) else x)
+        if x.dtype.kind not in 'US':
+            x = x.astype(str)
+    return x
+
+
+def _is_batch_iterator(x):
+    """
+    Return True if x is an iterator (e.g. a generator) over batches of
+    sequences, rather than an array-like collection of sequences.
+    """
+    return isinstance(x, Iterator) and not isinstance(x, np.ndarray)
+
+
+def validate_batch_size(batch_size):
+    """Validate batch_size, which must be None or a positive int."""
+    check(batch_size is None or
+          (isinstance(batch_size, (int, np.integer)) and batch_size > 0),
+          f'batch_size={repr(batch_size)}; must be None or a positive int.')
+    return batch_size
+
+
+def _get_seqs_shape_and_return_1d_array(x):
+    """
+    Get shape and return 1D array of sequences. An (N,L) array of
+    integer-encoded sequences is returned as is, with shape [N].
+    """
+    if _is_int_encoded(x):
+        return x, [len(x)]
+    return _get_shape_and_return_1d_array(x)
+
+
+def _x_int_to_seqs(x_int, alphabet):
+    """
+    Convert an (N,L) array of integer codes to an (N,) array of fixed-width
+    bytes sequences. If alphabet contains non-ASCII characters, an array of
+    fixed-width str sequences is returned instead.
+    """
+    N, L = x_int.shape
+    alphabet_chars = np.array([ord(c) for c in alphabet])
+    if alphabet_chars.max() < 128:
+        chars = alphabet_chars.astype(np.uint8)[x_int]
+        return chars.view(f'S{L}').reshape(N)
+    else:
+        chars = alphabet_chars.astype(np.uint32)[x_int]
+        return chars.view(f'U{L}').reshape(N)
+
+
+def _seqs_to_chars(x):
+    """
+    Return an (N,L) array of the character values in a 1D array of
+    fixed-width str or bytes sequences, where L is the width of the array.
+    Shorter sequences are padded with zeros. No copy is made if x is
+    contiguous.
+    """
+    if x.dtype.kind == 'U':
+        char_dtype = np.uint32
+    elif x.dtype.kind == 'S':
+        char_dtype = np.uint8
+    else:
+        assert False, 'This should not happen.'
+    L = x.dtype.itemsize // np.dtype(char_dtype).itemsize
+    return np.ascontiguousarray(x).view(char_dtype).reshape([len(x), L])
+
+
+def _chars_to_codes(chars, alphabet, out=None):
+    """
+    Convert an array of character values into alphabet indices using a
+    lookup table. Characters not in alphabet are given the value
+    len(alphabet). If out is given, codes are written into it.
+    """
+    C = len(alphabet)
+    alphabet_chars = np.array([ord(c) for c in alphabet])
+
+    # Build lookup table covering all possible character values
+    num_chars = 256 if chars.dtype.itemsize == 1 else 0x110000
+    code_dtype = np.uint8 if C < 255 else np.uint16
+    lookup = np.full(num_chars, C, dtype=code_dtype)
+    ix = alphabet_chars < num_chars
+    lookup[alphabet_chars[ix]] = np.arange(C)[ix]
+
+    # The lookup table covers all character values, so no index is clipped
+    return np.take(lookup, chars, out=out, mode='clip')
+
+
+def _seqs_to_codes_parallel(x, alphabet, n_jobs):
+    """
+    Compute _chars_to_codes(_seqs_to_chars(x), alphabet) by splitting x into
+    n_jobs chunks that are encoded in parallel worker processes. Sequences
+    are passed to workers, and codes returned by them, through memory-mapped
+    temporary files rather than by pickling. Also returns the sorted values
+    of characters not in alphabet.
+    """
+    x = np.ascontiguousarray(x)
+    N = len(x)
+    L = _seqs_to_chars(x[:1]).shape[1]
+    codes_dtype = np.dtype(np.uint8 if len(alphabet) < 255 else np.uint16)
+    codes_nbytes = max(N * L * codes_dtype.itemsize, 1)
+
+    # Start workers without fork: by the time sequences are encoded,
+    # TensorFlow has often started threads, and forking a multithreaded
+    # process can deadlock.
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context('forkserver')
+    else:
+        mp_context = multiprocessing.get_context('spawn')
+
+    # Place temporary files in memory when possible
+    tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    with tempfile.NamedTemporaryFile(dir=tmp_dir) as x_file, \
+            tempfile.NamedTemporaryFile(dir=tmp_dir) as codes_file:
+
+        # Write sequences for workers to read
+        x.tofile(x_file)
+        x_file.flush()
+
+        # Map the codes file. Workers write codes into it directly, and
+        # the returned array is a view of this mapping, so codes are never
+        # copied. The mapping outlives the file, which is deleted on exit.
+        codes_file.truncate(codes_nbytes)
+        codes_mmap = mmap.mmap(codes_file.fileno(), codes_nbytes)
+
+        # Encode chunks in parallel
+        bounds = np.linspace(0, N, n_jobs + 1).astype(int)
+        tasks = [(x_file.name, x.dtype.str, codes_file.name, codes_dtype.str,
+                  L, start, stop, alphabet)
+                 for start, stop in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 mp_context=mp_context) as executor:
+            invalid_chars = list(executor.map(_encode_chunk, tasks))
+        invalid_chars = np.unique(np.concatenate(invalid_chars))
+
+    codes = np.frombuffer(codes_mmap, dtype=codes_dtype, count=N*L)
+    return codes.reshape([N, L]), invalid_chars
+
+
+def _encode_chunk(task):
+    """
+    Encode the chunk x[start:stop] of sequences held in a file, writing
+    codes into the memory-mapped codes file. Runs in a worker process.
+    Returns the values of characters not in alphabet.
+    """
+    x_name, x_dtype, codes_name, codes_dtype, L, start, stop, alphabet = task
+    x_dtype = np.dtype(x_dtype)
+    codes_dtype = np.dtype(codes_dtype)
+    if stop <= start or L == 0:
+        return np.array([], dtype=np.uint32)
+
+    # Read this chunk of sequences and map this chunk of codes
+    x = np.fromfile(x_name, dtype=x_dtype, count=stop-start,
+                    offset=start*x_dtype.itemsize)
+    codes = np.memmap(codes_name, dtype=codes_dtype, mode='r+',
+                      offset=start*L*codes_dtype.itemsize,
+                      shape=(stop-start, L))
+
+    # Encode sequences, writing codes into the shared file
+    chars = _seqs_to_chars(x)
+    _chars_to_codes(chars, alphabet, out=codes)
+    invalid_chars = np.unique(chars[codes == len(alphabet)])
+    codes.flush()
+    del codes
+    return invalid_chars
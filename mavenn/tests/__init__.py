@@ -1,9 +1,34 @@
 from mavenn.tests.specific_tests import \
     test_GlobalEpistasisModel, \
     test_NoiseAgnosticModel, \
+    test_import_without_tensorflow, \
     test_validate_alphabet, \
+    test_validate_seqs, \
+    test_x_to_int, \
+    test_parallel_encoding, \
+    test_vec_mat_data_conversion, \
+    test_sequence_stats_accumulator, \
+    test_gpmap_layer_input_types, \
+    test_pairwise_gpmap_layer_vs_dense, \
+    test_neighbor_gpmap_layer_vs_pairwise, \
+    test_mlp_pair_features_vs_outer_product, \
     test_load, \
+    test_set_data_from_disk, \
+    test_p_lc_to_x_batches, \
+    test_load_csv_dataset, \
+    test_mpa_information_counts, \
+    test_mpa_knn_max_points, \
+    test_simulate_mpa_counts, \
+    test_simulate_dataset_to_disk, \
+    test_inference_function_cache, \
+    test_x_to_phi_batches, \
+    test_numpy_inference_engine, \
+    test_export, \
+    test_landscape_model_effects, \
+    test_variant_codes, \
+    test_set_data_dedup, \
     test_x_to_phi_or_yhat, \
+    test_x_to_phi_seq_formats, \
     test_GE_fit, \
     test_MPA_fit
 
@@ -14,8 +39,33 @@ def run_tests():
 
     test_GlobalEpistasisModel()
     test_NoiseAgnosticModel()
+    test_import_without_tensorflow()
     test_validate_alphabet()
+    test_validate_seqs()
+    test_x_to_int()
+    test_parallel_encoding()
+    test_vec_mat_data_conversion()
+    test_sequence_stats_accumulator()
+    test_gpmap_layer_input_types()
+    test_pairwise_gpmap_layer_vs_dense()
+    test_neighbor_gpmap_layer_vs_pairwise()
+    test_mlp_pair_features_vs_outer_product()
     test_load()
+    test_set_data_from_disk()
+    test_p_lc_to_x_batches()
+    test_load_csv_dataset()
+    test_mpa_information_counts()
+    test_mpa_knn_max_points()
+    test_simulate_mpa_counts()
+    test_simulate_dataset_to_disk()
+    test_inference_function_cache()
+    test_x_to_phi_batches()
+    test_numpy_inference_engine()
+    test_export()
+    test_landscape_model_effects()
+    test_variant_codes()
+    test_set_data_dedup()
     test_x_to_phi_or_yhat()
+    test_x_to_phi_seq_formats()
     test_GE_fit()
     test_MPA_fit()
@@ -2,16 +2,56 @@
 import numpy as np
 import pandas as pd
 import glob
+import os
 import pdb
 
 # MAVE-NN imports
 import mavenn
 from mavenn.src.examples import load_example_dataset, load_example_model
-from mavenn.src.validate import validate_alphabet
-from mavenn.src.utils import load
+from mavenn.src.validate import validate_alphabet, validate_seqs
+from mavenn.src.utils import load, x_to_int, x_to_ohe
 from mavenn.src.error_handling import check, handle_errors
 from mavenn.tests.testing_utils import test_parameter_values
 
+@handle_errors
+def _test_import_without_tensorflow(module_name, max_import_time=10.0):
+    """Check that importing a module in a fresh interpreter does not import
+    TensorFlow, and that the import takes less than max_import_time sec."""
+    import os
+    import subprocess
+    import sys
+    code = (f'import sys, time\n'
+            f't = time.time()\n'
+            f'import {module_name}\n'
+            f'print(time.time() - t, "tensorflow" in sys.modules)')
+    result = subprocess.run([sys.executable, '-c', code],
+                            cwd=os.path.dirname(mavenn.__path__[0]),
+                            capture_output=True,
+                            text=True)
+    check(result.returncode == 0,
+          f'import {module_name} failed:\n{result.stderr}')
+    import_time, tf_imported = result.stdout.split()[-2:]
+    check(tf_imported == 'False',
+          f'import {module_name} imported TensorFlow.')
+    check(float(import_time) < max_import_time,
+          f'import {module_name} took {float(import_time):.2f} sec; '
+          f'must take less than {max_import_time} sec.')
+
+
+def test_import_without_tensorflow():
+    """Test that TensorFlow is imported only when needed."""
+    test_parameter_values(func=_test_import_without_tensorflow,
+                          var_name='module_name',
+                          success_list=['mavenn',
+                                        'mavenn.src.entropy',
+                                        'mavenn.src.mavedb',
+                                        'mavenn.src.visualization',
+                                        'mavenn.src.dataset',
+                                        'mavenn.src.inference',
+                                        'mavenn.src.dev.landscape'],
+                          fail_list=['mavenn.src.model'])
+
+
 # Need to incorporate into model before testing.
 def test_validate_alphabet():
     """ 20.09.10 JBK """
@@ -47,6 +87,578 @@ def test_validate_alphabet():
                           success_list=success_list)
 
 
+def test_validate_seqs():
+    """Test validation of sequences."""
+
+    # Tests that should pass
+    success_list = [
+        'ACGT',
+        ['ACGT', 'TTTT'],
+        np.array(['AC', 'GT']),
+        np.array([b'ACGT', b'GGGG']),
+        pd.Series(['ACGT', 'TTTT']),
+        np.array([[0, 1, 2, 3], [3, 3, 3, 3]], dtype=np.uint8)
+    ]
+
+    # Tests that should fail
+    fail_list = [
+        ['ACGT', 'ACG'],
+        ['ACGN'],
+        ['ACGé'],
+        [],
+        np.array([['ACGT']]),
+        np.array([[0, 1, 2, 4]]),
+        5
+    ]
+
+    # Run tests of validate_seqs, with and without returning codes
+    for return_codes in [False, True]:
+        test_parameter_values(func=validate_seqs,
+                              var_name='x',
+                              fail_list=fail_list,
+                              success_list=success_list,
+                              alphabet='dna',
+                              return_codes=return_codes)
+
+
+@handle_errors
+def _test_x_to_int_matches_ohe(x, alphabet):
+    """Check that x_to_int() agrees with x_to_ohe()."""
+    x_int = x_to_int(x, alphabet)
+    x_ohe = x_to_ohe(x, alphabet, ravel_seqs=False)
+    check(x_int.dtype == np.uint8,
+          f'x_int.dtype={x_int.dtype}; should be uint8.')
+    check(np.all(x_ohe.argmax(axis=2) == x_int),
+          'x_to_int() and x_to_ohe() do not agree.')
+
+
+def test_x_to_int():
+    """Test integer encoding of sequences."""
+
+    # Tests that should pass, and tests that should fail
+    test_parameter_values(func=_test_x_to_int_matches_ohe,
+                          var_name='x',
+                          success_list=['ACGT',
+                                        ['ACGT', 'TTTT', 'GCGC'],
+                                        np.array(['AAAA', 'CCCC']),
+                                        np.array([b'AAAA', b'CCCC']),
+                                        np.array([[0, 1, 2, 3]])],
+                          fail_list=['ACGU',
+                                     ['ACGT', 'ACG'],
+                                     [np.nan]],
+                          alphabet='dna')
+
+
+@handle_errors
+def _test_gpmap_layer_input_types(layer, seed=0):
+    """Check that a G-P map layer gives the same phi on integer and one-hot
+    encoded input."""
+    L, C = layer.L, layer.C
+    np.random.seed(seed)
+    x_int = np.random.randint(C, size=(10, L)).astype(np.int32)
+    x_ohe = np.eye(C, dtype=np.float32)[x_int].reshape([-1, L*C])
+    phi_int = layer(x_int).numpy()
+    phi_ohe = layer(x_ohe).numpy()
+    check(phi_int.shape == (10, 1),
+          f'phi_int.shape={phi_int.shape}; should be (10, 1).')
+    check(np.allclose(phi_int, phi_ohe, atol=1E-5),
+          f'phi_int and phi_ohe differ by up to '
+          f'{np.max(np.abs(phi_int - phi_ohe))}.')
+
+
+def test_gpmap_layer_input_types():
+    """Test that G-P map layers accept integer and one-hot input."""
+    from mavenn.src.layers.gpmap import AdditiveGPMapLayer
+
+    from mavenn.src.layers.gpmap import PairwiseGPMapLayer
+    from mavenn.src.layers.gpmap import NeighborGPMapLayer
+
+    layers = [AdditiveGPMapLayer(L=5, C=4, theta_regularization=0.1),
+              PairwiseGPMapLayer(L=5, C=4, theta_regularization=0.1,
+                                 mask_type='pairwise'),
+              PairwiseGPMapLayer(L=5, C=4, theta_regularization=0.1,
+                                 mask_type='neighbor'),
+              NeighborGPMapLayer(L=5, C=4, theta_regularization=0.1)]
+    test_parameter_values(func=_test_gpmap_layer_input_types,
+                          var_name='layer',
+                          success_list=layers,
+                          fail_list=[])
+
+
+@handle_errors
+def _test_pairwise_gpmap_layer_vs_dense(mask_type, seed=0):
+    """Check that a pairwise G-P map layer agrees with a dense computation
+    of phi from the parameters returned by get_params()."""
+    from mavenn.src.layers.gpmap import PairwiseGPMapLayer
+    L, C = 6, 3
+    layer = PairwiseGPMapLayer(L=L, C=C, theta_regularization=0.1,
+                               mask_type=mask_type)
+    np.random.seed(seed)
+    x_int = np.random.randint(C, size=(20, L)).astype(np.int32)
+    x_lc = np.eye(C)[x_int]
+    phi = layer(x_int).numpy().ravel()
+    params = layer.get_params()
+    theta_lclc = np.nan_to_num(params['theta_lclc'])
+    phi_dense = params['theta_0'] + \
+        np.einsum('nlc,lc->n', x_lc, params['theta_lc']) + \
+        np.einsum('nlc,lcmd,nmd->n', x_lc, theta_lclc, x_lc)
+    check(np.allclose(phi, phi_dense, atol=1E-5),
+          f'phi and phi_dense differ by up to '
+          f'{np.max(np.abs(phi - phi_dense))}.')
+
+
+def test_pairwise_gpmap_layer_vs_dense():
+    """Test pairwise G-P map layers against a dense computation of phi."""
+    test_parameter_values(func=_test_pairwise_gpmap_layer_vs_dense,
+                          var_name='mask_type',
+                          success_list=['pairwise', 'neighbor'],
+                          fail_list=[])
+
+
+@handle_errors
+def _test_neighbor_gpmap_layer_vs_pairwise(L, C=3, seed=0):
+    """Check that a neighbor G-P map layer agrees with a pairwise G-P map
+    layer having mask_type='neighbor' and the same parameters."""
+    from mavenn.src.layers.gpmap import PairwiseGPMapLayer
+    from mavenn.src.layers.gpmap import NeighborGPMapLayer
+    np.random.seed(seed)
+    x_int = np.random.randint(C, size=(20, L)).astype(np.int32)
+    pairwise_layer = PairwiseGPMapLayer(L=L, C=C, theta_regularization=0.1,
+                                        mask_type='neighbor')
+    neighbor_layer = NeighborGPMapLayer(L=L, C=C, theta_regularization=0.1)
+    phi_pairwise = pairwise_layer(x_int).numpy()
+    neighbor_layer(x_int)
+
+    # Transfer parameters and make sure they come back unchanged
+    params = pairwise_layer.get_params()
+    neighbor_layer.set_params(theta_0=float(params['theta_0'][0]),
+                              theta_lc=params['theta_lc'],
+                              theta_lclc=params['theta_lclc'])
+    neighbor_params = neighbor_layer.get_params()
+    check(np.array_equal(params['theta_lclc'], neighbor_params['theta_lclc'],
+                         equal_nan=True),
+          'theta_lclc was not recovered by NeighborGPMapLayer.get_params().')
+    check(neighbor_layer.theta_lcc.shape == (1, L-1, C, C),
+          f'theta_lcc.shape={neighbor_layer.theta_lcc.shape}; '
+          f'should be {(1, L-1, C, C)}.')
+
+    # Compare phi values
+    phi_neighbor = neighbor_layer(x_int).numpy()
+    check(np.allclose(phi_pairwise, phi_neighbor, atol=1E-5),
+          f'phi_pairwise and phi_neighbor differ by up to '
+          f'{np.max(np.abs(phi_pairwise - phi_neighbor))}.')
+
+
+def test_neighbor_gpmap_layer_vs_pairwise():
+    """Test neighbor G-P map layers against pairwise G-P map layers."""
+    test_parameter_values(func=_test_neighbor_gpmap_layer_vs_pairwise,
+                          var_name='L',
+                          success_list=[2, 3, 10],
+                          fail_list=[])
+
+
+@handle_errors
+def _test_mlp_pair_features_vs_outer_product(features, seed=0):
+    """Check that the MLP G-P map computes phi from integer codes in the
+    same way as from one-hot and masked outer-product features."""
+    import tensorflow as tf
+    from mavenn.src.layers.gpmap import MultilayerPerceptronGPMap
+    L, C = 6, 4
+    for hidden_layer_sizes in [(5, 3), ()]:
+        layer = MultilayerPerceptronGPMap(L=L, C=C, theta_regularization=0.1,
+                                          features=features,
+                                          hidden_layer_sizes=hidden_layer_sizes)
+        np.random.seed(seed)
+        x_int = np.random.randint(C, size=(20, L))
+        phi = layer(x_int).numpy()
+
+        # Compute phi from masked outer-product features
+        ls1 = np.arange(L).reshape([L, 1, 1, 1])
+        ls2 = np.arange(L).reshape([1, 1, L, 1])
+        if features == 'pairwise':
+            mask_lclc = np.broadcast_to(ls2 - ls1 >= 1, [L, C, L, C])
+        elif features == 'neighbor':
+            mask_lclc = np.broadcast_to(ls2 - ls1 == 1, [L, C, L, C])
+        else:
+            mask_lclc = np.zeros([L, C, L, C], dtype=bool)
+        mask_ints = np.arange(L*C*L*C)[mask_lclc.reshape(-1)]
+        x_add = tf.reshape(tf.one_hot(x_int, depth=C), [-1, L*C])
+        x_lclc = tf.reshape(x_add, [-1, 1, 1, L, C]) * \
+            tf.reshape(x_add, [-1, L, C, 1, 1])
+        x_2pt = tf.gather(tf.reshape(x_lclc, [-1, L*C*L*C]),
+                          mask_ints, axis=1)
+        tensor = tf.concat([x_add, x_2pt], axis=1)
+        check(tensor.shape[1] == layer.num_features,
+              f'outer-product features have {tensor.shape[1]} columns; '
+              f'should have {layer.num_features}.')
+        for sublayer in layer.layers:
+            tensor = sublayer(tensor)
+        phi_outer = tensor.numpy()
+        check(np.allclose(phi, phi_outer, atol=1E-5),
+              f'phi and phi_outer differ by up to '
+              f'{np.max(np.abs(phi - phi_outer))}.')
+
+
+def test_mlp_pair_features_vs_outer_product():
+    """Test MLP G-P map pairwise features against outer-product features."""
+    test_parameter_values(func=_test_mlp_pair_features_vs_outer_product,
+                          var_name='features',
+                          success_list=['pairwise', 'neighbor', 'additive'],
+                          fail_list=['triplet'])
+
+
+@handle_errors
+def _test_set_data_from_disk(regression_type, shard_size=40):
+    """Check that set_data_from_disk() computes the same statistics as
+    set_data(), and that models can be fit to sharded datasets."""
+    import tempfile
+    import shutil
+
+    # Get small dataset
+    if regression_type == 'GE':
+        data_df = load_example_dataset('mpsa').iloc[:200]
+        alphabet = 'rna'
+        y = data_df['y'].values
+        Y = 2
+    else:
+        data_df = load_example_dataset('sortseq').iloc[:200]
+        alphabet = 'dna'
+        y_cols = [c for c in data_df.columns if 'ct_' in c]
+        y = data_df[y_cols].values
+        Y = len(y_cols)
+    x = data_df['x'].values
+    L = len(x[0])
+
+    # Save as sharded dataset, then set data from disk and from memory
+    dirname = tempfile.mkdtemp()
+    try:
+        mavenn.save_sharded_dataset(dirname + '/data', x, y,
+                                    alphabet=alphabet,
+                                    regression_type=regression_type,
+                                    shard_size=shard_size)
+        dataset = mavenn.load_sharded_dataset(dirname + '/data')
+        check(dataset.N == len(x),
+              f'dataset.N={dataset.N}; should be {len(x)}.')
+        x_int = np.concatenate([x_int for x_int, _, _
+                                in dataset.iter_shards()])
+        check(np.array_equal(x_int, x_to_int(x, alphabet)),
+              'Sequences were not recovered from sharded dataset.')
+
+        model_kwargs = dict(L=L, alphabet=alphabet, Y=Y,
+                            regression_type=regression_type)
+        disk_model = mavenn.Model(**model_kwargs)
+        disk_model.set_data_from_disk(dirname + '/data', verbose=False)
+        mem_model = mavenn.Model(**model_kwargs)
+        mem_model.set_data(x, y, shuffle=False, verbose=False)
+
+        # Compare statistics
+        check(np.isclose(disk_model.y_mean, mem_model.y_mean) and
+              np.isclose(disk_model.y_std, mem_model.y_std),
+              'y statistics do not match.')
+        check(np.allclose(disk_model.x_stats['probability_df'].values,
+                          mem_model.x_stats['probability_df'].values),
+              'x statistics do not match.')
+
+        # Fit model, and check linear initialization against least squares
+        # on the training observations
+        disk_model.fit(epochs=1, verbose=False)
+        from scipy.linalg import lstsq
+        from mavenn.src.utils import _x_int_to_csc
+        train = ~disk_model.validation_flags
+        if regression_type == 'GE':
+            y_targets = (y - disk_model.y_mean) / disk_model.y_std
+        else:
+            y_targets = (y * np.arange(Y)).sum(axis=1) / y.sum(axis=1)
+        x_train = _x_int_to_csc(x_int[train], disk_model.C).toarray()
+        theta_lc = lstsq(x_train.astype(float), y_targets[train],
+                         cond=1E-10)[0]
+        check(np.allclose(disk_model.theta_lc_init, theta_lc, atol=1E-3),
+              'Linear initialization does not match least squares.')
+        phi = disk_model.x_to_phi(x)
+        check(np.all(np.isfinite(phi)),
+              'Model fit to sharded dataset gives non-finite phi.')
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_set_data_from_disk():
+    """Test training from sharded datasets on disk."""
+    test_parameter_values(func=_test_set_data_from_disk,
+                          var_name='regression_type',
+                          success_list=['GE', 'MPA'],
+                          fail_list=['blah'])
+
+
+@handle_errors
+def _test_set_data_dedup(ge_noise_model_type, regression_type='GE'):
+    """Check that deduplicating training data leaves the total negative log
+    likelihood of the data unchanged."""
+    from mavenn.src.utils import _y_norm_to_ge_labels
+
+    # Get small dataset containing repeated sequences
+    data_df = load_example_dataset('mpsa').iloc[:100]
+    ix = np.random.choice(len(data_df), size=500)
+    x = data_df['x'].values[ix]
+    y = data_df['y'].values[ix] + 0.1*np.random.randn(len(ix))
+    y[::2] = data_df['y'].values[ix[::2]]
+    L = len(x[0])
+
+    # Compute total negative log likelihood with and without dedup
+    model = mavenn.Model(L=L,
+                         alphabet='rna',
+                         regression_type=regression_type,
+                         ge_noise_model_type=ge_noise_model_type)
+    nll_sums = []
+    for dedup in [True, False]:
+        model.set_data(x, y, dedup=dedup, verbose=False)
+        labels = _y_norm_to_ge_labels(y_norm=model.y_norm,
+                                      weights=model.sample_weights,
+                                      y_norm_vars=model.y_norm_var)
+        nlls = model.get_nn().predict([model.x_int.astype(np.int32), labels],
+                                      verbose=0)
+        nll_sums.append(nlls.sum())
+        if dedup:
+            check(model.N < len(x),
+                  f'Deduplicated data has {model.N} rows; '
+                  f'expected < {len(x)}.')
+            check(np.isclose(model.sample_weights.sum(), len(x)),
+                  'Row weights do not sum to the number of observations.')
+    check(np.isclose(nll_sums[0], nll_sums[1], rtol=1E-4),
+          f'Negative log likelihoods differ: {nll_sums}.')
+
+    # Fit model to deduplicated data
+    model.set_data(x, y, dedup=True, verbose=False)
+    model.fit(epochs=1, verbose=False)
+
+
+def test_set_data_dedup():
+    """Test deduplication of training data by set_data()."""
+    test_parameter_values(func=_test_set_data_dedup,
+                          var_name='ge_noise_model_type',
+                          success_list=['Gaussian', 'Cauchy', 'SkewedT'],
+                          fail_list=[])
+    test_parameter_values(func=_test_set_data_dedup,
+                          var_name='regression_type',
+                          success_list=[],
+                          fail_list=['MPA'],
+                          ge_noise_model_type='Gaussian')
+
+
+@handle_errors
+def _test_vec_mat_data_conversion(x_n):
+    """Check conversion between vector and matrix data formats."""
+    from scipy.sparse import issparse
+    from mavenn.src.utils import vec_data_to_mat_data, mat_data_to_vec_data
+    y_n = np.array([0, 1, 1, 0, 2])
+    ct_n = np.array([1, 2, 3, 1, 1])
+
+    # Check matrix format, dense and sparse
+    ct_my_expected = np.array([[0, 5, 1], [2, 0, 0]])
+    ct_my, x_m = vec_data_to_mat_data(y_n=y_n, ct_n=ct_n, x_n=x_n)
+    ct_my_sparse, _ = vec_data_to_mat_data(y_n=y_n, ct_n=ct_n, x_n=x_n,
+                                           sparse=True)
+    check(np.array_equal(ct_my, ct_my_expected),
+          f'ct_my={ct_my}; expected {ct_my_expected}.')
+    check(issparse(ct_my_sparse) and
+          np.array_equal(ct_my_sparse.toarray(), ct_my_expected),
+          'Sparse ct_my does not match dense ct_my.')
+
+    # Check vector format, ordered by decreasing count then bin number
+    for ct in [ct_my, ct_my_sparse]:
+        y, ct, x = mat_data_to_vec_data(ct_my=ct, x_m=x_m)
+        check(np.array_equal(y, [1, 0, 2]) and
+              np.array_equal(ct, [5, 2, 1]),
+              f'y={y}, ct={ct}; expected [1, 0, 2], [5, 2, 1].')
+        check(np.array_equal(x, np.asarray(x_m)[[0, 1, 0]]),
+              f'x={x} is not in the expected order.')
+
+
+def test_vec_mat_data_conversion():
+    """Test vec_data_to_mat_data() and mat_data_to_vec_data()."""
+    test_parameter_values(func=_test_vec_mat_data_conversion,
+                          var_name='x_n',
+                          success_list=[
+                              np.array(['GT', 'AC', 'AC', 'GT', 'AC']),
+                              np.array([b'GT', b'AC', b'AC', b'GT', b'AC']),
+                              ['GT', 'AC', 'AC', 'GT', 'AC'],
+                              np.array([[2, 3], [0, 1], [0, 1],
+                                        [2, 3], [0, 1]]),
+                              np.array([7, 3, 3, 7, 3])],
+                          fail_list=[np.array(['GT', 'AC'])])
+
+
+@handle_errors
+def _test_sequence_stats_accumulator(x_new, chunk_size=7):
+    """Check that sequence stats accumulated over chunks, and merged
+    across accumulators, match those computed from a one-hot encoding."""
+    from mavenn.src.utils import SequenceStatsAccumulator
+    x = np.array(['ACGT', 'AAGT', 'ACGA', 'TCGT'] * 10)
+    weights = np.arange(len(x)) % 3
+
+    # Compute expected probabilities from one-hot encoding
+    x_ohe = x_to_ohe(x, 'dna').reshape(len(x), 4, 4)
+    p_lc = (weights[:, None, None] * x_ohe).sum(axis=0)
+    p_lc = p_lc / p_lc.sum(axis=1)[:, None]
+
+    # Accumulate stats for two halves of the data separately, then merge
+    half = len(x) // 2
+    acc = SequenceStatsAccumulator('dna', chunk_size=chunk_size)
+    acc.update(x[:half], weights=weights[:half])
+    acc_other = SequenceStatsAccumulator('dna', chunk_size=chunk_size)
+    acc_other.update(x_to_int(x[half:], 'dna'), weights=weights[half:])
+    stats = acc.merge(acc_other).get_stats()
+    check(np.allclose(stats['probability_df'].values, p_lc),
+          'Accumulated probabilities do not match one-hot computation.')
+    check(stats['N'] == len(x) and
+          stats['sparsity_factor'] == (weights != 0).sum() / (len(x) * 4),
+          'Accumulated N or sparsity_factor is incorrect.')
+    check(stats['consensus_seq'] == 'ACGT',
+          f"consensus_seq={stats['consensus_seq']}; expected 'ACGT'.")
+    check(stats['missing_char_dict'] == {0: 'CG', 1: 'GT', 2: 'ACT', 3: 'CG'},
+          f"missing_char_dict={stats['missing_char_dict']} is incorrect.")
+
+    # Update with new data
+    acc.update(x_new)
+
+
+def test_sequence_stats_accumulator():
+    """Test SequenceStatsAccumulator."""
+    test_parameter_values(func=_test_sequence_stats_accumulator,
+                          var_name='x_new',
+                          success_list=[['GGGG'], np.array([[2, 2, 2, 2]])],
+                          fail_list=[['GGG'], ['NNNN']])
+
+
+@handle_errors
+def _test_parallel_encoding(n_jobs, x=None):
+    """Check that sequences encoded in parallel match those encoded
+    serially."""
+    if x is None:
+        x = load_example_dataset('mpsa')['x'].values[:1000]
+    x_int = x_to_int(x, 'rna')
+    x_int_parallel = x_to_int(x, 'rna', n_jobs=n_jobs)
+    check(np.array_equal(x_int, x_int_parallel),
+          f'Sequences encoded with n_jobs={n_jobs} do not match.')
+
+
+def test_parallel_encoding():
+    """Test validation and encoding of sequences in worker processes."""
+    test_parameter_values(func=_test_parallel_encoding,
+                          var_name='n_jobs',
+                          success_list=[1, 2, 3, -1],
+                          fail_list=[0, -2, 1.5, '2'])
+    test_parameter_values(func=_test_parallel_encoding,
+                          var_name='x',
+                          success_list=[np.array([b'ACGU', b'UUUU', b'GGGC'])],
+                          fail_list=[np.array(['ACGU', 'ACGT', 'UUUU']),
+                                     np.array(['ACGU', 'ACG', 'UUUU'])],
+                          n_jobs=2)
+
+
+@handle_errors
+def _test_p_lc_to_x_batches(chunk_size):
+    """Check that sequences sampled in batches have the requested batch
+    sizes and formats, and never contain characters of zero probability."""
+    from mavenn.src.utils import p_lc_to_x_batches
+    p_lc = np.array([[.1, .2, .3, .4],
+                     [0., 1., 0., 0.],
+                     [.5, 0., 0., .5]])
+    N = 25
+
+    # Check integer batches
+    batches = list(p_lc_to_x_batches(N=N, p_lc=p_lc, alphabet='dna',
+                                     chunk_size=chunk_size))
+    x_int = np.concatenate(batches, axis=0)
+    check(all(len(b) <= chunk_size for b in batches) and len(x_int) == N,
+          'Batches do not have the requested sizes.')
+    check(np.all(p_lc[np.arange(3), x_int] > 0),
+          'Sampled characters with zero probability.')
+
+    # Check bytes batches
+    for x in p_lc_to_x_batches(N=N, p_lc=p_lc, alphabet='dna',
+                               x_format='bytes', chunk_size=chunk_size):
+        check(x.dtype == np.dtype('S3'),
+              f'x.dtype={x.dtype}; expected S3.')
+
+
+def test_p_lc_to_x_batches():
+    """Test batched sequence generation with p_lc_to_x_batches()."""
+    test_parameter_values(func=_test_p_lc_to_x_batches,
+                          var_name='chunk_size',
+                          success_list=[1, 7, 25, 100],
+                          fail_list=[0, 7.0])
+
+
+@handle_errors
+def _test_load_csv_dataset(columns):
+    """Check that cached CSV datasets match those parsed by pandas, that
+    changing a file invalidates its cache, and that nothing is cached
+    unless requested."""
+    import tempfile
+    import shutil
+    dirname = tempfile.mkdtemp()
+    try:
+        # Write small CSV file, including strings and booleans with
+        # missing values
+        data_df = load_example_dataset('mpsa').iloc[:100].copy()
+        data_df['note'] = np.where(np.arange(100) % 3 == 0, None, 'ok')
+        data_df['flag'] = np.where(np.arange(100) % 4 == 0, None, True)
+        file_name = dirname + '/test_data.csv.gz'
+        data_df.to_csv(file_name, index=False)
+        cache_dir = dirname + '/cache'
+
+        # Check that no cache is written by default
+        mavenn.load_csv_dataset(file_name, columns=columns,
+                                cache_dir=cache_dir)
+        check(not os.path.exists(cache_dir),
+              'Cache written although cache=False.')
+
+        # Load twice, once creating cache and once reading it
+        for _ in range(2):
+            loaded_df = mavenn.load_csv_dataset(file_name,
+                                                columns=columns,
+                                                cache=True,
+                                                cache_dir=cache_dir)
+            expected_df = pd.read_csv(file_name, usecols=columns)
+            if columns is not None:
+                expected_df = expected_df[columns]
+            check(loaded_df.equals(expected_df),
+                  'Loaded dataset does not match pd.read_csv().')
+        check(len(glob.glob(cache_dir + '/test_data.*')) == 1,
+              'Expected one cached dataset.')
+
+        # Check memory-mapped loading
+        data_dict = mavenn.load_csv_dataset(file_name,
+                                            columns=columns,
+                                            cache=True,
+                                            cache_dir=cache_dir,
+                                            mmap=True,
+                                            x_format='bytes')
+        check(list(data_dict.keys()) == list(expected_df.columns),
+              'Memory-mapped columns do not match.')
+
+        # Overwrite file and check that a new cache is created
+        data_df.iloc[:50].to_csv(file_name, index=False)
+        loaded_df = mavenn.load_csv_dataset(file_name,
+                                            columns=columns,
+                                            cache=True,
+                                            cache_dir=cache_dir)
+        check(len(loaded_df) == 50, 'Cache was not invalidated.')
+        check(len(glob.glob(cache_dir + '/test_data.*')) == 2,
+              'Expected two cached datasets.')
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_load_csv_dataset():
+    """Test cached loading of CSV datasets."""
+    test_parameter_values(func=_test_load_csv_dataset,
+                          var_name='columns',
+                          success_list=[None, ['x', 'y'], ['y', 'set'],
+                                        ['note', 'flag', 'x']],
+                          fail_list=[['x', 'z'], 'x'])
+
+
 # def test_get_1pt_variants():
 #     """20.09.01 JBK"""
 #
@@ -368,6 +980,469 @@ def test_x_to_yhat(model, seq):
           f'yhat={yhat} does not have the expected shape={shape}')
 
 
+@handle_errors
+def _test_x_to_phi_seq_formats(model_name):
+    """Check that x_to_phi() gives the same result for sequences provided
+    as str, fixed-width bytes, and integer codes."""
+    model = load_example_model(model_name)
+    x = model.simulate_dataset(N=50)['x'].values
+    x_int = x_to_int(x, model.alphabet)
+    phi = model.x_to_phi(x)
+    for x_other in [list(x), x.astype(bytes), x_int]:
+        phi_other = model.x_to_phi(x_other)
+        check(np.array_equal(phi, phi_other),
+              f'x_to_phi() differs for sequences of type '
+              f'{type(x_other)}, dtype {np.asarray(x_other).dtype}.')
+
+    # Check simulated sequences in bytes format
+    data_df = model.simulate_dataset(x=x_int, x_format='bytes')
+    check(all(isinstance(seq, bytes) for seq in data_df['x']),
+          'simulate_dataset(x_format="bytes") did not return bytes.')
+
+
+def test_x_to_phi_seq_formats():
+    """Test x_to_phi() on sequences in different formats."""
+    test_parameter_values(func=_test_x_to_phi_seq_formats,
+                          var_name='model_name',
+                          success_list=['mpsa_ge_additive',
+                                        'mpsa_ge_pairwise'],
+                          fail_list=[])
+
+
+@handle_errors
+def _test_mpa_information_counts(ct):
+    """Check that I_variational() for MPA models gives the same result
+    for count matrices, count vectors, and one row per observation."""
+    model = load_example_model('sortseq_mpa_additive')
+    data_df = model.simulate_dataset(N=200)
+    ct_my = data_df[[f'ct_{y}' for y in range(model.Y)]].values
+    x = data_df['x'].values
+
+    # Compute I_var from count matrix
+    I_var_my, dI_var_my = model.I_variational(x=x, y=ct_my)
+
+    # Compute I_var with one row per observation
+    m_n, y_n = np.nonzero(ct_my)
+    ct_n = ct_my[m_n, y_n]
+    x_n = np.repeat(x[m_n], ct_n)
+    y_n = np.repeat(y_n, ct_n)
+    I_var_n, dI_var_n = model.I_variational(x=x_n, y=y_n)
+    check(np.isclose(I_var_my, I_var_n) and np.isclose(dI_var_my, dI_var_n),
+          f'I_var={I_var_my:.6f}+-{dI_var_my:.6f} from counts does not '
+          f'match I_var={I_var_n:.6f}+-{dI_var_n:.6f} from observations.')
+
+    # Compute I_pred from count vectors
+    model.I_predictive(x=x_n, y=y_n, ct=ct, uncertainty=False)
+
+
+def test_mpa_information_counts():
+    """Test count-weighted I_variational() and I_predictive() for MPA."""
+    test_parameter_values(func=_test_mpa_information_counts,
+                          var_name='ct',
+                          success_list=[None],
+                          fail_list=[np.ones(10, dtype=int)])
+
+
+@handle_errors
+def _test_mpa_knn_max_points(knn_max_points):
+    """Check that I_predictive() for MPA models subsamples observations
+    without replacement when there are more than knn_max_points."""
+    from mavenn.src.utils import _subsample_counts
+    model = load_example_model('sortseq_mpa_additive')
+    data_df = model.simulate_dataset(N=200)
+    ct_my = data_df[[f'ct_{y}' for y in range(model.Y)]].values
+    x = data_df['x'].values
+
+    # Check subsampled counts
+    if isinstance(knn_max_points, int) and knn_max_points > 0:
+        ct_n = ct_my[ct_my > 0]
+        ct_sub = _subsample_counts(ct_n, knn_max_points)
+        check(ct_sub.sum() == min(knn_max_points, ct_n.sum()) and
+              np.all(ct_sub <= ct_n),
+              f'Subsampled counts total {ct_sub.sum()}; should total '
+              f'{min(knn_max_points, ct_n.sum())} with none exceeding ct.')
+
+    # Compute I_pred from subsampled observations
+    I_pred, dI_pred = model.I_predictive(x=x, y=ct_my,
+                                         knn_max_points=knn_max_points,
+                                         uncertainty=False)
+    check(np.isfinite(I_pred), f'I_pred={I_pred} is not finite.')
+
+
+def test_mpa_knn_max_points():
+    """Test subsampling of observations in I_predictive() for MPA."""
+    test_parameter_values(func=_test_mpa_knn_max_points,
+                          var_name='knn_max_points',
+                          success_list=[50, 150, 1000000],
+                          fail_list=[0, 5, 1.5])
+
+
+@handle_errors
+def _test_simulate_mpa_counts(ct):
+    """Check that MPA datasets simulated with counts have one row per
+    unique sequence and the requested total number of reads."""
+    model = load_example_model('sortseq_mpa_additive')
+    x = model.simulate_dataset(N=20)['x'].values[:10]
+    x = np.concatenate([x, x[:5]])
+    data_df = model.simulate_dataset(x=x, ct=ct)
+    ct_my = data_df[[f'ct_{y}' for y in range(model.Y)]].values
+
+    # Compute expected totals for each unique sequence
+    ct_n = np.ones(len(x), dtype=int) if ct is None else np.array(ct)
+    x_m, ix = np.unique(x, return_inverse=True)
+    ct_m = np.bincount(ix, weights=ct_n).astype(int)
+    x_m, ct_m = x_m[ct_m > 0], ct_m[ct_m > 0]
+
+    # Check unique sequences and their total counts
+    order = np.argsort(data_df['x'].values)
+    check(np.array_equal(data_df['x'].values[order], x_m),
+          'Simulated sequences do not match unique input sequences.')
+    check(np.array_equal(ct_my.sum(axis=1)[order], ct_m),
+          'Simulated counts do not sum to input counts.')
+
+
+def test_simulate_mpa_counts():
+    """Test simulate_dataset() for MPA models with sequence counts."""
+    test_parameter_values(func=_test_simulate_mpa_counts,
+                          var_name='ct',
+                          success_list=[None,
+                                        np.arange(15),
+                                        np.full(15, 10**6)],
+                          fail_list=[np.ones(10),
+                                     -np.ones(15)])
+
+
+@handle_errors
+def _test_simulate_dataset_to_disk(chunk_size):
+    """Check that datasets simulated in chunks and written to disk contain
+    all simulated observations, split into training/validation and test
+    datasets."""
+    import tempfile
+    import shutil
+    dirname = tempfile.mkdtemp()
+    try:
+        for model_name in ['mpsa_ge_additive', 'sortseq_mpa_additive']:
+            model = load_example_model(model_name)
+            N = 500
+            sim_dir = f'{dirname}/{model_name}'
+            dataset = model.simulate_dataset(N=N,
+                                             dirname=sim_dir,
+                                             chunk_size=chunk_size)
+            test_dataset = mavenn.load_sharded_dataset(sim_dir + '/test')
+            check(dataset.has_validation_flags and
+                  not test_dataset.has_validation_flags,
+                  'Validation flags were not saved as expected.')
+
+            # Count observations in both datasets
+            num_obs = 0
+            for ds in [dataset, test_dataset]:
+                for x_int, y, _ in ds.iter_shards():
+                    check(x_int.shape[1] == model.L,
+                          f'x_int.shape={x_int.shape} does not match L.')
+                    num_obs += y.sum() if y.ndim == 2 else len(y)
+            check(num_obs == N,
+                  f'{num_obs} observations written; expected {N}.')
+    finally:
+        shutil.rmtree(dirname)
+
+
+def test_simulate_dataset_to_disk():
+    """Test simulate_dataset() with chunked writing to disk."""
+    test_parameter_values(func=_test_simulate_dataset_to_disk,
+                          var_name='chunk_size',
+                          success_list=[100, 500, 1000],
+                          fail_list=[0, 100.0])
+
+
+@handle_errors
+def _test_inference_function_cache(name):
+    """Check that compiled inference functions are cached, and that they
+    use current rather than initial weights."""
+    model = load_example_model('mpsa_ge_additive')
+    x = model.simulate_dataset(N=20)['x'].values
+    func = model._get_inference_function(name, np.uint8)
+    check(model._get_inference_function(name, np.uint8) is func,
+          f'Inference function {repr(name)} was not cached.')
+    engine = model._get_numpy_engine()
+    check(model._get_numpy_engine() is engine,
+          'NumPy inference engine was not cached.')
+
+    # Check that results change when weights are changed
+    phi = model.x_to_phi(x)
+    yhat = model.x_to_yhat(x)
+    weights = model.layer_gpmap.get_weights()
+    model.layer_gpmap.set_weights([w + 1 for w in weights])
+    check(not np.allclose(phi, model.x_to_phi(x)),
+          'x_to_phi() did not reflect updated weights.')
+    model.layer_gpmap.set_weights(weights)
+    check(np.allclose(yhat, model.x_to_yhat(x)),
+          'x_to_yhat() did not reflect restored weights.')
+
+
+def test_inference_function_cache():
+    """Test caching of compiled inference functions."""
+    test_parameter_values(func=_test_inference_function_cache,
+                          var_name='name',
+                          success_list=['unfixed_phi'],
+                          fail_list=['p_all_y', 'yhat_norm'])
+
+
+@handle_errors
+def _test_x_to_phi_batches(batch_size):
+    """Check that x_to_phi() and x_to_yhat() give the same results when
+    evaluated in batches, or on iterators over batches."""
+    from mavenn.src.utils import p_lc_to_x_batches
+    model = load_example_model('mpsa_ge_additive')
+    x = model.simulate_dataset(N=100)['x'].values
+    phi = model.x_to_phi(x)
+    yhat = model.x_to_yhat(x)
+
+    # Compare results computed in batches
+    check(np.allclose(phi, model.x_to_phi(x, batch_size=batch_size)),
+          'x_to_phi() results differ when computed in batches.')
+    check(np.allclose(yhat, model.x_to_yhat(x, batch_size=batch_size)),
+          'x_to_yhat() results differ when computed in batches.')
+
+    # Compare results computed from an iterator over batches
+    x_batches = (x[i:i + 30] for i in range(0, len(x), 30))
+    phi_batches = list(model.x_to_phi(x_batches, batch_size=batch_size))
+    check(len(phi_batches) == 4 and np.allclose(phi,
+                                                np.concatenate(phi_batches)),
+          'x_to_phi() results differ when computed from an iterator.')
+
+    # Compute yhat for generated batches of integer-encoded sequences
+    x_batches = p_lc_to_x_batches(N=50,
+                                  p_lc=model.x_stats['probability_df'].values,
+                                  alphabet=model.alphabet,
+                                  chunk_size=20)
+    for yhat_batch in model.x_to_yhat(x_batches, batch_size=batch_size):
+        check(len(yhat_batch) <= 20,
+              f'len(yhat_batch)={len(yhat_batch)}; expected <= 20.')
+
+
+def test_x_to_phi_batches():
+    """Test x_to_phi() and x_to_yhat() with batches and iterators."""
+    test_parameter_values(func=_test_x_to_phi_batches,
+                          var_name='batch_size',
+                          success_list=[None, 1, 7, 100, 1000],
+                          fail_list=[0, 7.0])
+
+
+@handle_errors
+def _test_numpy_inference_engine(gpmap_type):
+    """Check that the NumPy inference engine agrees with the TensorFlow
+    network for GE and MPA models."""
+    L = 10
+    x_int = np.random.choice(4, size=(200, L)).astype(np.uint8)
+    for regression_type in ['GE', 'MPA']:
+        model = mavenn.Model(L=L,
+                             alphabet='dna',
+                             gpmap_type=gpmap_type,
+                             regression_type=regression_type,
+                             Y=5)
+        model.unfixed_phi_mean = 0.5
+        model.unfixed_phi_std = 2.0
+        engine = model._get_numpy_engine()
+
+        # Compare unfixed phi values
+        tf_unfixed_phi = model._get_inference_function(
+            'unfixed_phi', x_int.dtype)(x_int).numpy()
+        if engine.has_gpmap:
+            unfixed_phi = engine.unfixed_phi_from_codes(x_int)
+            check(np.allclose(unfixed_phi, tf_unfixed_phi, atol=1E-5),
+                  'NumPy and TensorFlow phi values differ.')
+        tf_phi = (tf_unfixed_phi - model.unfixed_phi_mean) / \
+            model.unfixed_phi_std
+        check(np.allclose(model.x_to_phi(x_int), tf_phi, atol=1E-5),
+              'x_to_phi() does not match TensorFlow phi values.')
+
+        # Compare measurement process outputs
+        phi = tf_unfixed_phi
+        if regression_type == 'GE':
+            tf_yhat_norm = model.layer_nonlinearity.phi_to_yhat(
+                phi, use_arrays=True).ravel()
+            yhat_norm = engine.yhat_norm_from_unfixed_phi(phi)
+            check(np.allclose(yhat_norm, tf_yhat_norm, atol=1E-5),
+                  'NumPy and TensorFlow yhat values differ.')
+            y_norm = yhat_norm + np.random.randn(len(yhat_norm))
+            tf_p = model.layer_noise_model.p_of_y_given_yhat(
+                y_norm, yhat_norm, use_arrays=True).ravel()
+            p = engine.p_of_y_norm_given_yhat_norm(y_norm, yhat_norm)
+        else:
+            tf_p = model._get_inference_function('p_all_y')(phi).numpy()
+            p = engine.p_of_all_y_given_unfixed_phi(phi)
+        check(np.allclose(p, tf_p, atol=1E-5),
+              'NumPy and TensorFlow probabilities differ.')
+
+
+def test_numpy_inference_engine():
+    """Test the NumPy inference engine against TensorFlow."""
+    test_parameter_values(func=_test_numpy_inference_engine,
+                          var_name='gpmap_type',
+                          success_list=['additive', 'neighbor', 'pairwise',
+                                        'blackbox'],
+                          fail_list=['custom'])
+
+
+@handle_errors
+def _test_export(model_name, seed=0):
+    """Check that exported models reproduce the predictions of the
+    original models."""
+    import tempfile
+    import shutil
+    np.random.seed(seed)
+    model = load_example_model(model_name)
+    x = mavenn.src.utils.p_lc_to_x(N=100,
+                                   p_lc=np.ones([model.L, model.C])/model.C,
+                                   alphabet=model.alphabet)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        filename = temp_dir + '/model'
+        model.export(filename, verbose=False)
+        exported_model = mavenn.load_exported(filename, verbose=False)
+    finally:
+        shutil.rmtree(temp_dir)
+
+    # Compare phi values
+    phi = model.x_to_phi(x)
+    check(np.allclose(exported_model.x_to_phi(x, batch_size=30), phi),
+          'Exported model phi values differ from those of model.')
+    check(np.isclose(exported_model.x_to_phi(x[0]), phi[0]),
+          'Exported model phi value for a single sequence is wrong.')
+
+    # Compare yhat values or measurement process probabilities
+    if model.regression_type == 'GE':
+        check(np.allclose(exported_model.x_to_yhat(x), model.x_to_yhat(x)),
+              'Exported model yhat values differ from those of model.')
+        y = model.x_to_yhat(x) + np.random.randn(len(x))
+    else:
+        y = np.random.choice(model.Y, size=len(x))
+    check(np.allclose(exported_model.p_of_y_given_phi(y, phi),
+                      model.p_of_y_given_phi(y, phi, paired=True)),
+          'Exported model p(y|phi) values differ from those of model.')
+
+
+def test_export():
+    """Test exporting models and loading them without TensorFlow."""
+    test_parameter_values(func=_test_export,
+                          var_name='model_name',
+                          success_list=['mpsa_ge_additive',
+                                        'mpsa_ge_neighbor',
+                                        'mpsa_ge_pairwise',
+                                        'sortseq_mpa_additive'],
+                          fail_list=['mpsa_ge_blackbox'])
+
+
+@handle_errors
+def _test_landscape_model_effects(gpmap_type, seed=0):
+    """Check that mutational effects computed directly from a model agree
+    with those computed by evaluating mutant sequences."""
+    from mavenn.src.dev.landscape import get_1pt_effects, get_2pt_effects
+    L = 6
+    wt_seq = 'ACGTTG'
+    model = mavenn.Model(L=L,
+                         alphabet='dna',
+                         gpmap_type=gpmap_type,
+                         regression_type='GE')
+    model.unfixed_phi_mean = 0.5
+    model.unfixed_phi_std = 2.0
+
+    # Randomize G-P map parameters
+    np.random.seed(seed)
+    model.layer_gpmap.set_weights(
+        [0.1*np.random.randn(*w.shape) for w in model.layer_gpmap.weights])
+
+    # Compare single-point effects
+    cols = ['phi', 'phi_wt', 'dphi']
+    model_df = get_1pt_effects(func=model, wt_seq=wt_seq, alphabet='dna')
+    seq_df = get_1pt_effects(func=model.x_to_phi, wt_seq=wt_seq,
+                             alphabet='dna')
+    check(np.allclose(model_df[cols].values, seq_df[cols].values,
+                      atol=1E-5),
+          'Single-point effects computed from model and sequences differ.')
+
+    # Compare two-point effects
+    cols = ['phi_12', 'phi_1', 'phi_2', 'phi_wt', 'ddphi']
+    model_df = get_2pt_effects(func=model, wt_seq=wt_seq, alphabet='dna')
+    seq_df = get_2pt_effects(func=model.x_to_phi, wt_seq=wt_seq,
+                             alphabet='dna')
+    check(all(model_df.index == seq_df.index),
+          'Two-point effects are not listed in the same order.')
+    check(np.allclose(model_df[cols].values, seq_df[cols].values,
+                      atol=1E-5),
+          'Two-point effects computed from model and sequences differ.')
+
+    # Check that sequences are only listed for models when requested
+    check('seq' not in model_df.columns,
+          'Sequences listed although include_seqs=False.')
+    model_df = get_2pt_effects(func=model, wt_seq=wt_seq, alphabet='dna',
+                               include_seqs=True)
+    check(all(model_df['seq'] == seq_df['seq']),
+          'Two-point variant sequences differ.')
+
+
+def test_landscape_model_effects():
+    """Test model-aware computation of mutational effects."""
+    test_parameter_values(func=_test_landscape_model_effects,
+                          var_name='gpmap_type',
+                          success_list=['additive', 'neighbor', 'pairwise',
+                                        'blackbox'],
+                          fail_list=['custom'])
+
+
+@handle_errors
+def _test_variant_codes(wt_seq, alphabet='dna', batch_size=7):
+    """Check that integer-encoded variants agree with variant DataFrames."""
+    from mavenn.src.dev.landscape import \
+        get_1pt_variants, get_2pt_variants, \
+        get_1pt_variant_codes, get_2pt_variant_codes, \
+        iter_1pt_variants, iter_2pt_variants
+    for df, codes, batches, l_cols, c_cols in [
+            (get_1pt_variants(wt_seq, alphabet, include_wt=False),
+             get_1pt_variant_codes(wt_seq, alphabet),
+             list(iter_1pt_variants(wt_seq, alphabet, batch_size)),
+             ['l'], ['c_mut']),
+            (get_2pt_variants(wt_seq, alphabet, include_wt=False),
+             get_2pt_variant_codes(wt_seq, alphabet),
+             list(iter_2pt_variants(wt_seq, alphabet, batch_size)),
+             ['l1', 'l2'], ['c1_mut', 'c2_mut'])]:
+        alphabet_list = list(validate_alphabet(alphabet))
+        ls = codes[0::2]
+        cs = codes[1::2]
+
+        # Compare codes to DataFrame columns
+        for l_col, c_col, l, c in zip(l_cols, c_cols, ls, cs):
+            check(np.array_equal(df[l_col].values, l),
+                  f'Positions in column {l_col} do not match codes.')
+            check(np.array_equal(
+                df[c_col].values, np.array(alphabet_list)[c]),
+                  f'Characters in column {c_col} do not match codes.')
+
+        # Compare batches to codes and DataFrame sequences
+        check(len(batches) == int(np.ceil(len(df)/batch_size)),
+              f'len(batches)={len(batches)}; should be '
+              f'{int(np.ceil(len(df)/batch_size))}.')
+        check(all([len(batch[0]) == batch_size for batch in batches[:-1]]),
+              'Batches have the wrong size.')
+        if len(df) > 0:
+            for i, code in enumerate(codes):
+                check(np.array_equal(
+                    np.concatenate([batch[i] for batch in batches]), code),
+                      'Batched codes do not match codes.')
+            x_int = np.concatenate([batch[-1] for batch in batches])
+            check(np.array_equal(x_int, x_to_int(df['seq'].values,
+                                                 alphabet=alphabet)),
+                  'Batched sequences do not match DataFrame sequences.')
+
+
+def test_variant_codes():
+    """Test array-based enumeration of single- and two-point variants."""
+    test_parameter_values(func=_test_variant_codes,
+                          var_name='wt_seq',
+                          success_list=['ACGTTGA', 'AC', 'A'],
+                          fail_list=['ACGU', '', 5])
+
+
 def test_x_to_phi_or_yhat():
     mavenn_dir = mavenn.__path__[0]
     model_dir = f'{mavenn_dir}/examples/models/'
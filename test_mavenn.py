@@ -7,7 +7,9 @@ sys.path.insert(0, path_to_mavenn_local)
 
 #Load mavenn and check path
 import mavenn
-print(mavenn.__path__)
 
-# Run tests
-mavenn.run_tests()
\ No newline at end of file
+# Run tests. Guarded because parallel encoding tests start worker
+# processes, which import this script.
+if __name__ == '__main__':
+    print(mavenn.__path__)
+    mavenn.run_tests()